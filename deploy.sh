@@ -5,6 +5,7 @@ PROJECT_DIR="$(cd "$(dirname "$0")" && pwd)"
 MANAGE="$PROJECT_DIR/toolspaedeia/manage.py"
 
 export DJANGO_SETTINGS_MODULE="toolspaedeia.settings_pythonanywhere"
+: "${PA_WORKER_TASK_ID:?Set PA_WORKER_TASK_ID to the id of the always-on task running run_task_worker}"
 
 echo "==> Installing / syncing dependencies…"
 cd "$PROJECT_DIR"
@@ -24,4 +25,10 @@ echo "==> Reloading web app…"
 curl -s -X POST -H "Authorization: Token $PYTHONANYWHERE_API_TOKEN" "$PA_API"
 echo ""
 
+PA_WORKER_API="https://www.pythonanywhere.com/api/v0/user/$PA_USER/always_on/$PA_WORKER_TASK_ID/restart/"
+
+echo "==> Restarting task worker…"
+curl -s -X POST -H "Authorization: Token $PYTHONANYWHERE_API_TOKEN" "$PA_WORKER_API"
+echo ""
+
 echo "==> Done."
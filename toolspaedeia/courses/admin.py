@@ -4,18 +4,31 @@ from django.contrib import admin
 from django.contrib import messages
 from django.core.exceptions import PermissionDenied
 from django.core.validators import FileExtensionValidator
+from django.db.models import Q
 from django.http import Http404
 from django.http import HttpResponse
 from django.http import HttpResponseRedirect
+from django.http import StreamingHttpResponse
+from django.tasks import TaskResultStatus
+from django.tasks.exceptions import TaskResultDoesNotExist
+from django.tasks.exceptions import TaskResultMismatch
 from django.template.loader import render_to_string
 from django.template.response import TemplateResponse
 from django.urls import path
 from django.urls import reverse
 
+from taskqueue.models import QueuedTask
+from taskqueue.models import running_task_cutoff
+
+from .import_export import build_course_bundle_file
 from .import_export import build_course_import_file
+from .import_export import create_course_from_bundle
 from .import_export import create_course_from_import
+from .import_export import update_course_from_import
 from .models import Answer
 from .models import Course
+from .models import CourseImportJob
+from .models import CourseNearDuplicate
 from .models import CourseTag
 from .models import Module
 from .models import ModuleProgression
@@ -23,7 +36,10 @@ from .models import Question
 from .models import Quiz
 from .models import QuizAttempt
 from .models import Resource
-from .suggestions import suggest_tags
+from .suggestions import cached_tag_suggestions
+from .suggestions import course_revision
+from .tasks import import_course_archive_task
+from .tasks import suggest_course_tags_task
 
 admin.site.site_title = "Toolspaedeia Publishing"
 admin.site.site_header = "Toolspaedeia Publishing"
@@ -59,11 +75,23 @@ class CourseAdmin(nested_admin.NestedModelAdmin):
     change_form_template = "admin/courses/course/change_form.html"
 
     class CourseImportForm(forms.Form):
+        markdown_file = forms.FileField(
+            label="Markdown file or bundle",
+            validators=[FileExtensionValidator(allowed_extensions=["md", "markdown", "txt", "zip"])],
+        )
+
+    class CourseReimportForm(forms.Form):
         markdown_file = forms.FileField(
             label="Markdown file",
             validators=[FileExtensionValidator(allowed_extensions=["md", "markdown", "txt"])],
         )
 
+    class CourseArchiveImportForm(forms.Form):
+        archive_file = forms.FileField(
+            label="Zip archive",
+            validators=[FileExtensionValidator(allowed_extensions=["zip"])],
+        )
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
@@ -72,16 +100,46 @@ class CourseAdmin(nested_admin.NestedModelAdmin):
                 self.admin_site.admin_view(self.download_course_view),
                 name="courses_download",
             ),
+            path(
+                "<path:course_id>/download-bundle/",
+                self.admin_site.admin_view(self.download_course_bundle_view),
+                name="courses_download_bundle",
+            ),
+            path(
+                "<path:course_id>/reimport/",
+                self.admin_site.admin_view(self.reimport_course_view),
+                name="courses_reimport",
+            ),
             path("import/", self.admin_site.admin_view(self.import_course_view), name="courses_import"),
+            path(
+                "import-archive/",
+                self.admin_site.admin_view(self.import_course_archive_view),
+                name="courses_import_archive",
+            ),
+            path(
+                "import-jobs/<int:job_id>/",
+                self.admin_site.admin_view(self.import_job_view),
+                name="courses_import_job",
+            ),
+            path(
+                "import-jobs/<int:job_id>/status/",
+                self.admin_site.admin_view(self.import_job_status_view),
+                name="courses_import_job_status",
+            ),
             path(
                 "<int:course_id>/suggest-tags/",
                 self.admin_site.admin_view(self.suggest_tags_view),
                 name="courses_suggest_tags",
             ),
+            path(
+                "<int:course_id>/suggest-tags/<str:result_id>/",
+                self.admin_site.admin_view(self.suggest_tags_status_view),
+                name="courses_suggest_tags_status",
+            ),
         ]
         return custom_urls + urls
 
-    def download_course_view(self, request, course_id):
+    def get_publisher_course(self, request, course_id):
         course = self.get_object(request, course_id)
         if course is None:
             raise Http404
@@ -92,11 +150,36 @@ class CourseAdmin(nested_admin.NestedModelAdmin):
         if not request.user.is_superuser and course.publisher_id != request.user.id:
             raise PermissionDenied
 
-        filename, file_content = build_course_import_file(course)
-        response = HttpResponse(file_content, content_type="text/markdown; charset=utf-8")
+        return course
+
+    def download_course_view(self, request, course_id):
+        filename, file_chunks = build_course_import_file(self.get_publisher_course(request, course_id))
+        response = StreamingHttpResponse(file_chunks, content_type="text/markdown; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def download_course_bundle_view(self, request, course_id):
+        filename, file_chunks = build_course_bundle_file(self.get_publisher_course(request, course_id))
+        response = StreamingHttpResponse(file_chunks, content_type="application/zip")
         response["Content-Disposition"] = f'attachment; filename="{filename}"'
         return response
 
+    def warn_near_duplicates(self, request, course):
+        near_duplicates = CourseNearDuplicate.objects.filter(Q(course=course) | Q(duplicate_of=course)).select_related(
+            "course", "duplicate_of"
+        )
+        for near_duplicate in near_duplicates:
+            other_course = near_duplicate.duplicate_of if near_duplicate.course == course else near_duplicate.course
+            other_name = "another publisher's course"
+            if request.user.is_superuser or other_course.publisher_id == request.user.pk:
+                other_name = repr(other_course.name)
+            self.message_user(
+                request,
+                f"This course looks like a near-duplicate of {other_name} "
+                f"({near_duplicate.similarity:.0%} similar module content).",
+                level=messages.WARNING,
+            )
+
     def import_course_view(self, request):
         if not self.has_add_permission(request):
             raise PermissionDenied
@@ -105,23 +188,24 @@ class CourseAdmin(nested_admin.NestedModelAdmin):
 
         if request.method == "POST" and form.is_valid():
             markdown_file = form.cleaned_data["markdown_file"]
+            import_course = create_course_from_import
+            if markdown_file.name.lower().endswith(".zip"):
+                import_course = create_course_from_bundle
             try:
-                markdown_input = markdown_file.read().decode("utf-8")
+                course = import_course(markdown_file, request.user)
             except UnicodeDecodeError:
                 self.message_user(
                     request,
                     "Could not decode file as UTF-8. Please upload a UTF-8 markdown file.",
                     level=messages.ERROR,
                 )
+            except ValueError as exc:
+                self.message_user(request, str(exc), level=messages.ERROR)
             else:
-                try:
-                    course = create_course_from_import(markdown_input, request.user)
-                except ValueError as exc:
-                    self.message_user(request, str(exc), level=messages.ERROR)
-                else:
-                    self.message_user(request, "Course imported successfully.")
-                    change_url = reverse("admin:courses_course_change", args=[course.pk])
-                    return HttpResponseRedirect(change_url)
+                self.message_user(request, "Course imported successfully.")
+                self.warn_near_duplicates(request, course)
+                change_url = reverse("admin:courses_course_change", args=[course.pk])
+                return HttpResponseRedirect(change_url)
 
         context = {
             **self.admin_site.each_context(request),
@@ -131,7 +215,94 @@ class CourseAdmin(nested_admin.NestedModelAdmin):
         }
         return TemplateResponse(request, "admin/courses/course/import_course.html", context)
 
-    def suggest_tags_view(self, request, course_id):
+    def reimport_course_view(self, request, course_id):
+        course = self.get_publisher_course(request, course_id)
+        if not self.has_change_permission(request, obj=course):
+            raise PermissionDenied
+
+        form = self.CourseReimportForm(request.POST or None, request.FILES or None)
+
+        if request.method == "POST" and form.is_valid():
+            try:
+                summary = update_course_from_import(course, form.cleaned_data["markdown_file"])
+            except UnicodeDecodeError:
+                self.message_user(
+                    request,
+                    "Could not decode file as UTF-8. Please upload a UTF-8 markdown file.",
+                    level=messages.ERROR,
+                )
+            except ValueError as exc:
+                self.message_user(request, str(exc), level=messages.ERROR)
+            else:
+                self.message_user(
+                    request,
+                    f"Course updated: {summary['created']} created, {summary['updated']} updated, "
+                    f"{summary['deleted']} deleted.",
+                )
+                change_url = reverse("admin:courses_course_change", args=[course.pk])
+                return HttpResponseRedirect(change_url)
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": f"Re-import {course.name}",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/courses/course/import_course.html", context)
+
+    def import_course_archive_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = self.CourseArchiveImportForm(request.POST or None, request.FILES or None)
+
+        if request.method == "POST" and form.is_valid():
+            job = CourseImportJob.objects.create(
+                publisher=request.user,
+                archive=form.cleaned_data["archive_file"],
+            )
+            import_course_archive_task.enqueue(job_id=job.pk)
+            job_url = reverse("admin:courses_import_job", args=[job.pk])
+            return HttpResponseRedirect(job_url)
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": "Import course archive",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/courses/course/import_course_archive.html", context)
+
+    def get_import_job(self, request, job_id):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        jobs = CourseImportJob.objects.all()
+        if not request.user.is_superuser:
+            jobs = jobs.filter(publisher=request.user)
+
+        job = jobs.filter(pk=job_id).first()
+        if job is None:
+            raise Http404
+        return job
+
+    def import_job_view(self, request, job_id):
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.opts,
+            "title": "Course archive import",
+            "job": self.get_import_job(request, job_id),
+        }
+        return TemplateResponse(request, "admin/courses/course/import_job.html", context)
+
+    def import_job_status_view(self, request, job_id):
+        html = render_to_string(
+            "admin/courses/partials/import_job_status.html",
+            {"job": self.get_import_job(request, job_id)},
+        )
+        return HttpResponse(html)
+
+    def get_suggestion_course(self, request, course_id):
         course = self.get_object(request, course_id)
         if course is None:
             raise Http404
@@ -139,9 +310,59 @@ class CourseAdmin(nested_admin.NestedModelAdmin):
         if not self.has_view_or_change_permission(request, obj=course):
             raise PermissionDenied
 
-        suggestions_with_scores = suggest_tags(course)
+        return course
+
+    def suggest_tags_view(self, request, course_id):
+        course = self.get_suggestion_course(request, course_id)
+
+        suggestions = cached_tag_suggestions(course, course_revision(course))
+        if suggestions is not None:
+            return self.render_tag_suggestions({"suggestions": self.format_suggestions(suggestions)})
+
+        pending_task = (
+            QueuedTask.objects.filter(
+                task_path=suggest_course_tags_task.module_path,
+                args=[course.pk],
+            )
+            .filter(
+                Q(status=TaskResultStatus.READY)
+                | Q(status=TaskResultStatus.RUNNING, started_at__gte=running_task_cutoff())
+            )
+            .order_by("enqueued_at")
+            .first()
+        )
+        if pending_task is not None:
+            task_result = pending_task.to_task_result()
+        else:
+            task_result = suggest_course_tags_task.enqueue(course.pk)
+        return self.render_tag_suggestion_task(course, task_result)
+
+    def suggest_tags_status_view(self, request, course_id, result_id):
+        course = self.get_suggestion_course(request, course_id)
+
+        try:
+            task_result = suggest_course_tags_task.get_result(result_id)
+        except (TaskResultDoesNotExist, TaskResultMismatch) as exc:
+            raise Http404 from exc
+
+        if task_result.args != [course.pk]:
+            raise Http404
+
+        return self.render_tag_suggestion_task(course, task_result)
 
-        suggestions = [
+    def render_tag_suggestion_task(self, course, task_result):
+        if task_result.status == TaskResultStatus.FAILED:
+            return self.render_tag_suggestions({"error": "Tag suggestions could not be generated."})
+
+        if not task_result.is_finished:
+            status_url = reverse("admin:courses_suggest_tags_status", args=[course.pk, task_result.id])
+            return self.render_tag_suggestions({"status_url": status_url})
+
+        suggestions = cached_tag_suggestions(course, task_result.return_value) or []
+        return self.render_tag_suggestions({"suggestions": self.format_suggestions(suggestions)})
+
+    def format_suggestions(self, suggestions_with_scores):
+        return [
             {
                 "tag": tag,
                 "score_percent": round(float(score) * 100, 1),
@@ -149,10 +370,8 @@ class CourseAdmin(nested_admin.NestedModelAdmin):
             for tag, score in suggestions_with_scores
         ]
 
-        html = render_to_string(
-            "admin/courses/partials/tag_suggestions.html",
-            {"suggestions": suggestions},
-        )
+    def render_tag_suggestions(self, context):
+        html = render_to_string("admin/courses/partials/tag_suggestions.html", context)
         return HttpResponse(html)
 
     def get_queryset(self, request):
@@ -233,3 +452,16 @@ class QuizAttemptAdmin(admin.ModelAdmin):
 class CourseTagAdmin(admin.ModelAdmin):
     search_fields = ["name"]
     list_display = ["name"]
+
+
+@admin.register(CourseNearDuplicate)
+class CourseNearDuplicateAdmin(admin.ModelAdmin):
+    list_display = ["course", "duplicate_of", "similarity", "detected_at"]
+    list_select_related = ["course", "duplicate_of"]
+    ordering = ["-similarity"]
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if request.user.is_superuser:
+            return queryset
+        return queryset.filter(course__publisher=request.user, duplicate_of__publisher=request.user)
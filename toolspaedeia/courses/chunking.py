@@ -0,0 +1,71 @@
+import math
+import re
+
+# Token counts are a conservative estimate of the embedding model's
+# WordPiece tokens, which are capped at 128 per text including [CLS] and
+# [SEP]: a word counts one token per WORDPIECE_CHARS characters, and
+# windows stop well below the cap.
+MAX_WINDOW_TOKENS = 96
+WINDOW_OVERLAP_TOKENS = 16
+WORDPIECE_CHARS = 4
+
+_BLOCK_SEPARATOR_REGEX = re.compile(r"\n\s*\n|\n(?=#{1,6}\s)")
+_TOKEN_REGEX = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    return sum(math.ceil(len(token) / WORDPIECE_CHARS) for token in _TOKEN_REGEX.findall(text))
+
+
+def _split_long_block(block, max_tokens, overlap):
+    words = block.split()
+    word_tokens = [max(count_tokens(word), 1) for word in words]
+    windows = []
+    start = 0
+    while start < len(words):
+        end = start
+        token_count = 0
+        while end < len(words) and (end == start or token_count + word_tokens[end] <= max_tokens):
+            token_count += word_tokens[end]
+            end += 1
+        windows.append(" ".join(words[start:end]))
+        if end >= len(words):
+            break
+
+        # Overlap is capped at half the window, so every step moves forward
+        # by at least half a window even when words are long.
+        overlap_budget = min(overlap, token_count // 2)
+        next_start = end
+        while next_start > start + 1 and word_tokens[next_start - 1] <= overlap_budget:
+            overlap_budget -= word_tokens[next_start - 1]
+            next_start -= 1
+        start = next_start
+    return windows
+
+
+def split_into_windows(text, max_tokens=MAX_WINDOW_TOKENS, overlap=WINDOW_OVERLAP_TOKENS):
+    windows = []
+    current_blocks = []
+    current_tokens = 0
+    for raw_block in _BLOCK_SEPARATOR_REGEX.split(text):
+        block = raw_block.strip()
+        if not block:
+            continue
+
+        block_tokens = count_tokens(block)
+        starts_section = block.startswith("#")
+        if current_blocks and (starts_section or current_tokens + block_tokens > max_tokens):
+            windows.append("\n\n".join(current_blocks))
+            current_blocks = []
+            current_tokens = 0
+
+        if block_tokens > max_tokens:
+            windows.extend(_split_long_block(block, max_tokens, overlap))
+            continue
+
+        current_blocks.append(block)
+        current_tokens += block_tokens
+
+    if current_blocks:
+        windows.append("\n\n".join(current_blocks))
+    return windows
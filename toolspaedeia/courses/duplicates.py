@@ -0,0 +1,166 @@
+import hashlib
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from courses.lexical import tokenize
+from courses.models import CourseNearDuplicate
+from courses.models import CourseSignature
+from courses.models import CourseSignatureBand
+from courses.models import Module
+
+MINHASH_PERMUTATIONS = 128
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+SHINGLE_WORDS = 5
+SHINGLE_BLOCK_SIZE = 4096
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Stored signatures only compare if every process draws the same permutations.
+_permutation_rng = np.random.default_rng(0x6D696E68)
+_HASH_MULTIPLIERS = _permutation_rng.integers(1, 2**64, size=MINHASH_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_HASH_OFFSETS = _permutation_rng.integers(0, 2**64, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingle_hashes(text):
+    words = tokenize(text)
+    shingles = {
+        " ".join(words[start : start + SHINGLE_WORDS]) for start in range(max(len(words) - SHINGLE_WORDS, 0) + 1)
+    }
+    shingles.discard("")
+    return np.fromiter((zlib.crc32(shingle.encode()) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def minhash_signature(hashes):
+    signature = np.full(MINHASH_PERMUTATIONS, np.iinfo(np.uint32).max, dtype=np.uint64)
+    for start in range(0, len(hashes), SHINGLE_BLOCK_SIZE):
+        block = hashes[start : start + SHINGLE_BLOCK_SIZE]
+        permuted = (_HASH_MULTIPLIERS[:, None] * block[None, :] + _HASH_OFFSETS[:, None]) >> np.uint64(32)
+        np.minimum(signature, permuted.min(axis=1), out=signature)
+    return signature.astype(np.uint32)
+
+
+def signature_buckets(signature):
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[band * LSH_ROWS : (band + 1) * LSH_ROWS].tobytes(), digest_size=8).digest(),
+            signed=True,
+        )
+        for band in range(LSH_BANDS)
+    ]
+
+
+def estimate_similarity(signature, other_signature):
+    return float(np.mean(signature == other_signature))
+
+
+def course_signature_texts(courses):
+    texts = {course.pk: [] for course in courses}
+    for course_id, content in (
+        Module.objects.filter(course__in=courses)
+        .order_by("course_id", "order", "pk")
+        .values_list("course_id", "content")
+    ):
+        texts[course_id].append(content)
+    return {course_id: "\n\n".join(contents) for course_id, contents in texts.items()}
+
+
+def _update_signatures(courses):
+    texts = course_signature_texts(courses)
+    stored_signatures = {
+        course_id: (content_hash, np.frombuffer(bytes(minhash), dtype=np.uint32))
+        for course_id, content_hash, minhash in CourseSignature.objects.filter(course__in=courses).values_list(
+            "course_id", "content_hash", "minhash"
+        )
+    }
+
+    signatures = {}
+    stale_courses = []
+    for course in courses:
+        content_hash = hashlib.sha256(texts[course.pk].encode()).hexdigest()
+        stored_hash, stored_signature = stored_signatures.get(course.pk, (None, None))
+        if stored_hash == content_hash:
+            if len(stored_signature):
+                signatures[course.pk] = stored_signature
+            continue
+
+        stale_courses.append(course)
+        hashes = shingle_hashes(texts[course.pk])
+        if len(hashes):
+            signatures[course.pk] = minhash_signature(hashes)
+        CourseSignature.objects.update_or_create(
+            course=course,
+            defaults={
+                "content_hash": content_hash,
+                "minhash": signatures[course.pk].tobytes() if course.pk in signatures else b"",
+            },
+        )
+
+    CourseSignatureBand.objects.filter(course__in=stale_courses).delete()
+    CourseSignatureBand.objects.bulk_create(
+        [
+            CourseSignatureBand(course=course, band=band, bucket=bucket)
+            for course in stale_courses
+            if course.pk in signatures
+            for band, bucket in enumerate(signature_buckets(signatures[course.pk]))
+        ]
+    )
+    return signatures, stale_courses
+
+
+def _candidate_course_ids(signatures):
+    buckets_by_course = {course_id: signature_buckets(signature) for course_id, signature in signatures.items()}
+    owners = defaultdict(set)
+    for course_id, buckets in buckets_by_course.items():
+        for band, bucket in enumerate(buckets):
+            owners[band, bucket].add(course_id)
+
+    buckets_by_band = defaultdict(set)
+    for band, bucket in owners:
+        buckets_by_band[band].add(bucket)
+    band_filter = Q()
+    for band, buckets in buckets_by_band.items():
+        band_filter |= Q(band=band, bucket__in=buckets)
+
+    candidates = defaultdict(set)
+    if not buckets_by_band:
+        return candidates
+    band_matches = CourseSignatureBand.objects.filter(band_filter).values_list("course_id", "band", "bucket")
+    for other_course_id, band, bucket in band_matches:
+        for course_id in owners.get((band, bucket), ()):
+            if other_course_id != course_id:
+                candidates[course_id].add(other_course_id)
+    return candidates
+
+
+def flag_near_duplicate_courses(courses, threshold=NEAR_DUPLICATE_THRESHOLD, *, force=False):
+    with transaction.atomic():
+        signatures, stale_courses = _update_signatures(courses)
+        checked_courses = courses if force else stale_courses
+        signatures = {course.pk: signatures[course.pk] for course in checked_courses if course.pk in signatures}
+        candidates = _candidate_course_ids(signatures)
+        candidate_signatures = {
+            course_id: np.frombuffer(bytes(minhash), dtype=np.uint32)
+            for course_id, minhash in CourseSignature.objects.filter(
+                course_id__in={other_id for other_ids in candidates.values() for other_id in other_ids}
+            ).values_list("course_id", "minhash")
+        }
+
+        pairs = {}
+        for course_id, other_course_ids in candidates.items():
+            for other_course_id in other_course_ids:
+                similarity = estimate_similarity(signatures[course_id], candidate_signatures[other_course_id])
+                if similarity >= threshold:
+                    pairs[max(course_id, other_course_id), min(course_id, other_course_id)] = similarity
+
+        course_ids = [course.pk for course in checked_courses]
+        CourseNearDuplicate.objects.filter(Q(course__in=course_ids) | Q(duplicate_of__in=course_ids)).delete()
+        return CourseNearDuplicate.objects.bulk_create(
+            [
+                CourseNearDuplicate(course_id=course_id, duplicate_of_id=duplicate_of_id, similarity=similarity)
+                for (course_id, duplicate_of_id), similarity in pairs.items()
+            ]
+        )
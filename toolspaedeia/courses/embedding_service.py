@@ -0,0 +1,166 @@
+import json
+import logging
+import queue
+import socket
+import socketserver
+import struct
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FRAME_HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+DEFAULT_BATCH_WAIT_SECONDS = 0.005
+DEFAULT_MAX_BATCH_TEXTS = 256
+BAD_REQUEST_STATUS = 400
+SERVER_ERROR_STATUS = 500
+
+
+class EmbeddingServiceError(Exception):
+    pass
+
+
+class EmbeddingRequestError(EmbeddingServiceError):
+    pass
+
+
+def _read_exactly(connection, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            msg = "Embedding service connection closed unexpectedly."
+            raise EmbeddingServiceError(msg)
+        data += chunk
+    return bytes(data)
+
+
+def _read_frame(connection):
+    (size,) = FRAME_HEADER.unpack(_read_exactly(connection, FRAME_HEADER.size))
+    if size > MAX_FRAME_SIZE:
+        msg = f"Embedding service frame of {size} bytes is too large."
+        raise EmbeddingServiceError(msg)
+    return _read_exactly(connection, size)
+
+
+def _write_frame(connection, payload):
+    connection.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+
+
+def _parse_request(payload):
+    try:
+        request = json.loads(payload)
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        msg = f"Malformed embedding request: {exc}"
+        raise EmbeddingRequestError(msg) from exc
+
+    texts = request.get("texts") if isinstance(request, dict) else None
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        msg = "Embedding request must be an object with a list of strings under 'texts'."
+        raise EmbeddingRequestError(msg)
+    return texts
+
+
+def encode_via_service(socket_path, texts, timeout=30.0):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(str(socket_path))
+        _write_frame(connection, json.dumps({"texts": list(texts)}).encode("utf-8"))
+        header = json.loads(_read_frame(connection))
+        if "error" in header:
+            error_class = EmbeddingRequestError if header.get("status") == BAD_REQUEST_STATUS else EmbeddingServiceError
+            raise error_class(header["error"])
+        vectors = np.frombuffer(_read_frame(connection), dtype=np.float32)
+    return vectors.reshape(header["rows"], header["dimensions"])
+
+
+class _MicroBatcher:
+    def __init__(self, encode, batch_wait, max_batch_texts):
+        self.encode = encode
+        self.batch_wait = batch_wait
+        self.max_batch_texts = max_batch_texts
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self.run, name="embedding-batcher", daemon=True)
+
+    def submit(self, texts):
+        future = Future()
+        self.pending.put((texts, future))
+        return future
+
+    def next_batch(self):
+        batch = [self.pending.get()]
+        text_count = len(batch[0][0])
+        while text_count < self.max_batch_texts:
+            try:
+                request = self.pending.get(timeout=self.batch_wait)
+            except queue.Empty:
+                break
+            batch.append(request)
+            text_count += len(request[0])
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                vectors = np.asarray(self.encode(texts), dtype=np.float32)
+            except Exception as exc:
+                logger.exception("Embedding batch of %d texts failed", len(texts))
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            start = 0
+            for request_texts, future in batch:
+                future.set_result(vectors[start : start + len(request_texts)])
+                start += len(request_texts)
+
+
+class _EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            texts = _parse_request(_read_frame(self.request))
+        except EmbeddingRequestError as exc:
+            self.write_error(exc, BAD_REQUEST_STATUS)
+            return
+        except EmbeddingServiceError:
+            logger.warning("Embedding client disconnected before sending a request")
+            return
+
+        try:
+            vectors = self.server.batcher.submit(texts).result()
+        except Exception as exc:  # noqa: BLE001
+            self.write_error(exc, SERVER_ERROR_STATUS)
+            return
+
+        rows, dimensions = vectors.shape if vectors.ndim == 2 else (len(texts), 0)  # noqa: PLR2004
+        _write_frame(self.request, json.dumps({"rows": rows, "dimensions": dimensions}).encode("utf-8"))
+        _write_frame(self.request, vectors.tobytes())
+
+    def write_error(self, exc, status):
+        _write_frame(self.request, json.dumps({"error": str(exc), "status": status}).encode("utf-8"))
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path,
+        encode,
+        batch_wait=DEFAULT_BATCH_WAIT_SECONDS,
+        max_batch_texts=DEFAULT_MAX_BATCH_TEXTS,
+    ):
+        Path(socket_path).unlink(missing_ok=True)
+        super().__init__(str(socket_path), _EmbeddingRequestHandler)
+        self.batcher = _MicroBatcher(encode, batch_wait, max_batch_texts)
+        self.batcher.thread.start()
+
+    def server_close(self):
+        super().server_close()
+        Path(self.server_address).unlink(missing_ok=True)
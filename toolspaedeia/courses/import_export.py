@@ -1,14 +1,40 @@
+import codecs
+import io
+import json
+import logging
 import re
+import zipfile
+from collections import defaultdict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from enum import StrEnum
-
+from operator import attrgetter
+from pathlib import Path
+from pathlib import PurePosixPath
+
+import django
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import DatabaseError
+from django.db import connection
+from django.db import connections
 from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
 from django.utils.text import slugify
 
+from courses.duplicates import flag_near_duplicate_courses
+from courses.markdown import ALLOWED_RESOURCE_EXTENSIONS
 from courses.models import Answer
 from courses.models import Course
+from courses.models import CourseImportJob
 from courses.models import Module
 from courses.models import Question
 from courses.models import Quiz
+from courses.models import Resource
+
+logger = logging.getLogger(__name__)
 
 
 class Tag(StrEnum):
@@ -24,117 +50,657 @@ class Tag(StrEnum):
     IS_CORRECT = "is_correct"
 
 
-_ACCEPTED_TAGS = tuple(tag.value for tag in Tag)
-
-
-def _next_tag_block(text, cursor=0):
-    start_regex = re.compile(rf"@start\s+({'|'.join(sorted(_ACCEPTED_TAGS))})", re.IGNORECASE)
-    start_match = start_regex.search(text, cursor)
-    if not start_match:
-        return None
-
-    tag = Tag(start_match.group(1).lower())
+IMPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 100
+ARCHIVE_COURSE_EXTENSIONS = (".md", ".markdown", ".txt")
+ARCHIVE_PERSIST_BATCH_SIZE = 50
+ARCHIVE_PARSE_AHEAD_PER_WORKER = 2
+BUNDLE_COURSE_FILENAME = "course.md"
+BUNDLE_MANIFEST_FILENAME = "resources.json"
+RESOURCE_COPY_CHUNK_SIZE = 1024 * 1024
 
-    end_regex = re.compile(rf"@end\s+{re.escape(tag.value)}\b", re.IGNORECASE)
-    end_match = end_regex.search(text, start_match.end())
-    if not end_match:
-        error_message = f"Unclosed @start {tag.value} block."
-        raise ValueError(error_message)
+_ACCEPTED_TAGS = tuple(tag.value for tag in Tag)
+_CONTAINER_TAGS = frozenset({Tag.MODULE, Tag.QUIZ, Tag.QUESTION, Tag.ANSWER})
+_TAG_ALTERNATIVES = "|".join(sorted(_ACCEPTED_TAGS))
+_TAG_REGEX = re.compile(
+    rf"@start\s+(?P<start>{_TAG_ALTERNATIVES})|@end\s+(?P<end>{_TAG_ALTERNATIVES})\b",
+    re.IGNORECASE,
+)
+
+
+def _iter_lines(markdown_input):
+    if isinstance(markdown_input, str):
+        yield from io.StringIO(markdown_input)
+        return
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    for chunk in markdown_input:
+        pending += decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield f"{line}\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+class _Block:
+    __slots__ = ("column", "line", "tag", "value")
+
+    def __init__(self, tag, line, column, value):
+        self.tag = tag
+        self.line = line
+        self.column = column
+        self.value = value
+
+
+class _CourseImportParser:
+    def __init__(self):
+        self.course = Course()
+        self.module_quiz_pairs = []
+        self.stack = [_Block(None, 0, 0, self.course)]
+        self.attach_handlers = {
+            None: self._attach_to_course,
+            Tag.MODULE: self._attach_to_module,
+            Tag.QUIZ: self._attach_to_quiz,
+            Tag.QUESTION: self._attach_to_question,
+            Tag.ANSWER: self._attach_to_answer,
+        }
+
+    @staticmethod
+    def _open_block(tag, line, column):
+        if tag is Tag.MODULE:
+            value = [Module(order=0), None]
+        elif tag is Tag.QUIZ:
+            value = (Quiz(), [])
+        elif tag is Tag.QUESTION:
+            value = (Question(order=0), [])
+        elif tag is Tag.ANSWER:
+            value = Answer()
+        else:
+            value = []
+        return _Block(tag, line, column, value)
 
-    inner = text[start_match.end() : end_match.start()].strip()
-    return tag, inner, end_match.end()
+    def _attach_to_course(self, _parent, tag, value):
+        if tag is Tag.NAME:
+            self.course.name = value
+        elif tag is Tag.DESCRIPTION:
+            self.course.description = value
+        elif tag is Tag.MODULE:
+            self.module_quiz_pairs.append(tuple(value))
 
+    @staticmethod
+    def _attach_to_module(parent, tag, value):
+        module = parent.value[0]
+        if tag is Tag.TITLE:
+            module.title = value
+        elif tag is Tag.DESCRIPTION:
+            module.description = value
+        elif tag is Tag.CONTENT:
+            module.content = value
+        elif tag is Tag.QUIZ:
+            value[0].module = module
+            parent.value[1] = value
 
-def _iter_blocks(text):
-    cursor = 0
-    while True:
-        block = _next_tag_block(text, cursor)
-        if block is None:
-            return
-        yield block
-        cursor = block[2]
+    @staticmethod
+    def _attach_to_quiz(parent, tag, value):
+        quiz, questions_payload = parent.value
+        if tag is Tag.TITLE:
+            quiz.title = value
+        elif tag is Tag.DESCRIPTION:
+            quiz.description = value
+        elif tag is Tag.QUESTION:
+            questions_payload.append(value)
 
+    @staticmethod
+    def _attach_to_question(parent, tag, value):
+        question, answers = parent.value
+        if tag is Tag.TEXT:
+            question.text = value
+        elif tag is Tag.ANSWER:
+            answers.append(value)
 
-def _parse_answer_block(answer_inner):
-    answer = Answer()
-    for tag, value, _ in _iter_blocks(answer_inner):
+    @staticmethod
+    def _attach_to_answer(parent, tag, value):
+        answer = parent.value
         if tag is Tag.TEXT:
             answer.text = value
         elif tag is Tag.IS_CORRECT:
             answer.is_correct = value.strip().lower() == "true"
-    return answer
 
+    def _close_block(self):
+        block = self.stack.pop()
+        value = block.value
+        if block.tag not in _CONTAINER_TAGS:
+            value = "".join(value).strip()
+        parent = self.stack[-1]
+        self.attach_handlers[parent.tag](parent, block.tag, value)
+
+    @staticmethod
+    def _unclosed_block_error(block):
+        error_message = f"Unclosed @start {block.tag.value} block at line {block.line}, column {block.column}."
+        return ValueError(error_message)
+
+    def _handle_end(self, tag):
+        if tag is self.stack[-1].tag:
+            self._close_block()
+            return
 
-def _parse_question_block(question_inner):
-    question = Question(order=0)
-    answers = []
-    for tag, value, _ in _iter_blocks(question_inner):
-        if tag is Tag.TEXT:
-            question.text = value
-        elif tag is Tag.ANSWER:
-            answers.append(_parse_answer_block(value))
-    return question, answers
+        open_tags = [block.tag for block in self.stack]
+        if tag in open_tags:
+            raise self._unclosed_block_error(self.stack[-1])
+
+    def feed_line(self, line, line_number):
+        cursor = 0
+        for match in _TAG_REGEX.finditer(line):
+            current = self.stack[-1]
+            is_leaf = current.tag is not None and current.tag not in _CONTAINER_TAGS
+
+            if is_leaf:
+                current.value.append(line[cursor : match.start()])
+                end_tag = match.group("end")
+                if end_tag and Tag(end_tag.lower()) is current.tag:
+                    self._close_block()
+                else:
+                    current.value.append(match.group(0))
+            elif match.group("start"):
+                self.stack.append(self._open_block(Tag(match.group("start").lower()), line_number, match.start() + 1))
+            else:
+                self._handle_end(Tag(match.group("end").lower()))
+            cursor = match.end()
+
+        current = self.stack[-1]
+        if current.tag is not None and current.tag not in _CONTAINER_TAGS:
+            current.value.append(line[cursor:])
+
+    def close(self):
+        if len(self.stack) > 1:
+            raise self._unclosed_block_error(self.stack[-1])
+        return self.course, self.module_quiz_pairs
+
+
+def parse_course_import(markdown_input):
+    parser = _CourseImportParser()
+    for line_number, line in enumerate(_iter_lines(markdown_input), start=1):
+        parser.feed_line(line, line_number)
+    return parser.close()
+
+
+def _bulk_create_with_pks(model, objs, key_fields=None):
+    if connection.features.can_return_rows_from_bulk_insert:
+        model.objects.bulk_create(objs, batch_size=IMPORT_BATCH_SIZE)
+        return
+
+    if key_fields is None:
+        for obj in objs:
+            obj.save()
+        return
+
+    model.objects.bulk_create(objs, batch_size=IMPORT_BATCH_SIZE)
+    objs_by_key = {tuple(getattr(obj, field) for field in key_fields): obj for obj in objs}
+    parent_field = key_fields[0]
+    for start in range(0, len(objs), IMPORT_BATCH_SIZE):
+        parent_ids = {getattr(obj, parent_field) for obj in objs[start : start + IMPORT_BATCH_SIZE]}
+        rows = model.objects.filter(**{f"{parent_field}__in": parent_ids}).values_list(*key_fields, "pk")
+        for *key, pk in rows:
+            obj = objs_by_key.get(tuple(key))
+            if obj is not None:
+                obj.pk = pk
+
+
+def _assign_modules(parsed_courses):
+    modules = []
+    for course, module_quiz_pairs in parsed_courses:
+        for order, (module, _) in enumerate(module_quiz_pairs, start=1):
+            module.course = course
+            module.order = order
+            modules.append(module)
+    return modules
 
 
-def _parse_quiz_block(quiz_inner, module):
-    quiz = Quiz(module=module)
-    questions_payload = []
-    for tag, value, _ in _iter_blocks(quiz_inner):
-        if tag is Tag.TITLE:
-            quiz.title = value
-        elif tag is Tag.DESCRIPTION:
-            quiz.description = value
-        elif tag is Tag.QUESTION:
-            question, answers = _parse_question_block(value)
-            questions_payload.append((question, answers))
-    return quiz, questions_payload
+def _assign_quizzes(parsed_courses):
+    quiz_payloads = []
+    for _, module_quiz_pairs in parsed_courses:
+        for module, quiz_payload in module_quiz_pairs:
+            if quiz_payload is not None:
+                quiz_payload[0].module = module
+                quiz_payloads.append(quiz_payload)
+    return quiz_payloads
 
 
-def _parse_module_block(module_inner):
-    module = Module(order=0)
-    quiz_payload = None
-    for tag, value, _ in _iter_blocks(module_inner):
-        if tag is Tag.TITLE:
-            module.title = value
-        elif tag is Tag.DESCRIPTION:
-            module.description = value
-        elif tag is Tag.CONTENT:
-            module.content = value
-        elif tag is Tag.QUIZ:
-            quiz_payload = _parse_quiz_block(value, module)
-    return module, quiz_payload
+def _assign_questions(quiz_payloads):
+    questions = []
+    for quiz, questions_payload in quiz_payloads:
+        for order, (question, _) in enumerate(questions_payload, start=1):
+            question.quiz = quiz
+            question.order = order
+            questions.append(question)
+    return questions
 
 
-def create_course_from_import(markdown_input, publisher):
-    course = Course(publisher=publisher)
-    module_quiz_pairs = []
+def _assign_answers(quiz_payloads):
+    answers = []
+    for _, questions_payload in quiz_payloads:
+        for question, question_answers in questions_payload:
+            for answer in question_answers:
+                answer.question = question
+                answers.append(answer)
+    return answers
 
-    for tag, inner, _ in _iter_blocks(markdown_input):
-        if tag is Tag.NAME:
-            course.name = inner
-        elif tag is Tag.DESCRIPTION:
-            course.description = inner
-        elif tag is Tag.MODULE:
-            module_quiz_pairs.append(_parse_module_block(inner))
 
+def save_course_imports(parsed_courses):
     with transaction.atomic():
-        course.save()
-        for module, quiz_payload in module_quiz_pairs:
-            module.course = course
-            module.save()
-            if quiz_payload is None:
-                continue
-
-            quiz, questions_payload = quiz_payload
-            quiz.module = module
-            quiz.save()
-
-            for question, answers in questions_payload:
-                question.quiz = quiz
-                question.save()
-                for answer in answers:
-                    answer.question = question
-                    answer.save()
+        _bulk_create_with_pks(Course, [course for course, _ in parsed_courses])
+        _bulk_create_with_pks(Module, _assign_modules(parsed_courses), ("course_id", "order"))
+        quiz_payloads = _assign_quizzes(parsed_courses)
+        _bulk_create_with_pks(Quiz, [quiz for quiz, _ in quiz_payloads], ("module_id",))
+        _bulk_create_with_pks(Question, _assign_questions(quiz_payloads), ("quiz_id", "order"))
+        Answer.objects.bulk_create(_assign_answers(quiz_payloads), batch_size=IMPORT_BATCH_SIZE)
+
+
+def create_course_from_import(markdown_input, publisher):
+    course, module_quiz_pairs = parse_course_import(markdown_input)
+    course.publisher = publisher
+    save_course_imports([(course, module_quiz_pairs)])
+    flag_near_duplicate_courses([course])
+    return course
+
+
+def _match_by_keys(parsed_items, existing_items, key_functions):
+    matches = [None] * len(parsed_items)
+    unmatched = list(existing_items)
+    for key in key_functions:
+        candidates = defaultdict(deque)
+        for item in unmatched:
+            candidates[key(item)].append(item)
+
+        for position, parsed in enumerate(parsed_items):
+            if matches[position] is None and candidates[key(parsed)]:
+                matches[position] = candidates[key(parsed)].popleft()
+
+        matched_ids = {match.pk for match in matches if match is not None}
+        unmatched = [item for item in unmatched if item.pk not in matched_ids]
+    return matches, unmatched
+
+
+class _CourseImportDiff:
+    def __init__(self, course):
+        self.course = course
+        self.updated = defaultdict(dict)
+        self.updated_fields = defaultdict(set)
+        self.deleted = defaultdict(list)
+        self.new_module_pairs = []
+        self.new_quiz_payloads = []
+        self.new_question_payloads = []
+        self.new_answers = []
+        self.created_count = 0
+
+    def update(self, existing, parsed, fields):
+        for field in fields:
+            value = getattr(parsed, field)
+            if getattr(existing, field) != value:
+                setattr(existing, field, value)
+                self.updated[type(existing)][existing.pk] = existing
+                self.updated_fields[type(existing)].add(field)
+
+    def diff_course(self, parsed_course, module_quiz_pairs):
+        self.update(self.course, parsed_course, ("name", "description"))
+
+        existing_modules = (
+            self.course.modules.order_by("order", "pk")
+            .select_related("quiz")
+            .prefetch_related(
+                Prefetch(
+                    "quiz__questions",
+                    queryset=Question.objects.order_by("order", "pk").prefetch_related("answers"),
+                )
+            )
+        )
+        parsed_modules = [module for module, _ in module_quiz_pairs]
+        for order, module in enumerate(parsed_modules, start=1):
+            module.order = order
+
+        matches, removed = _match_by_keys(
+            parsed_modules, list(existing_modules), (attrgetter("title"), attrgetter("content"))
+        )
+        self.deleted[Module] += removed
+        for (module, quiz_payload), existing_module in zip(module_quiz_pairs, matches, strict=True):
+            if existing_module is None:
+                module.course = self.course
+                self.new_module_pairs.append((module, quiz_payload))
+            else:
+                self.update(existing_module, module, ("title", "description", "content", "order"))
+                self.diff_quiz(existing_module, quiz_payload)
+
+    def diff_quiz(self, existing_module, quiz_payload):
+        existing_quiz = getattr(existing_module, "quiz", None)
+        if quiz_payload is None:
+            if existing_quiz is not None:
+                self.deleted[Quiz].append(existing_quiz)
+            return
+
+        if existing_quiz is None:
+            quiz_payload[0].module = existing_module
+            self.new_quiz_payloads.append(quiz_payload)
+            return
+
+        quiz, questions_payload = quiz_payload
+        self.update(existing_quiz, quiz, ("title", "description"))
+
+        parsed_questions = [question for question, _ in questions_payload]
+        for order, question in enumerate(parsed_questions, start=1):
+            question.order = order
+
+        matches, removed = _match_by_keys(
+            parsed_questions, list(existing_quiz.questions.all()), (attrgetter("text"), attrgetter("order"))
+        )
+        self.deleted[Question] += removed
+        for (question, answers), existing_question in zip(questions_payload, matches, strict=True):
+            if existing_question is None:
+                question.quiz = existing_quiz
+                self.new_question_payloads.append((question, answers))
+            else:
+                self.update(existing_question, question, ("text", "order"))
+                self.diff_answers(existing_question, answers)
+
+    def diff_answers(self, existing_question, answers):
+        matches, removed = _match_by_keys(answers, list(existing_question.answers.all()), (attrgetter("text"),))
+        self.deleted[Answer] += removed
+        for answer, existing_answer in zip(answers, matches, strict=True):
+            if existing_answer is None:
+                answer.question = existing_question
+                self.new_answers.append(answer)
+            else:
+                self.update(existing_answer, answer, ("is_correct",))
+
+    def save(self):
+        with transaction.atomic():
+            for model, objs in self.deleted.items():
+                if objs:
+                    model.objects.filter(pk__in=[obj.pk for obj in objs]).delete()
+
+            for model, objs_by_pk in self.updated.items():
+                model.objects.bulk_update(
+                    objs_by_pk.values(), sorted(self.updated_fields[model]), batch_size=IMPORT_BATCH_SIZE
+                )
+
+            self.save_new_rows()
+
+    def save_new_rows(self):
+        _bulk_create_with_pks(Module, [module for module, _ in self.new_module_pairs], ("course_id", "order"))
+        quiz_payloads = self.new_quiz_payloads + _assign_quizzes([(self.course, self.new_module_pairs)])
+        _bulk_create_with_pks(Quiz, [quiz for quiz, _ in quiz_payloads], ("module_id",))
+
+        questions = [question for question, _ in self.new_question_payloads] + _assign_questions(quiz_payloads)
+        _bulk_create_with_pks(Question, questions, ("quiz_id", "order"))
+
+        for question, answers in self.new_question_payloads:
+            for answer in answers:
+                answer.question = question
+                self.new_answers.append(answer)
+        answers = self.new_answers + _assign_answers(quiz_payloads)
+        Answer.objects.bulk_create(answers, batch_size=IMPORT_BATCH_SIZE)
+
+        self.created_count = len(self.new_module_pairs) + len(quiz_payloads) + len(questions) + len(answers)
+
+    def summary(self):
+        return {
+            "created": self.created_count,
+            "updated": sum(len(objs_by_pk) for objs_by_pk in self.updated.values()),
+            "deleted": sum(len(objs) for objs in self.deleted.values()),
+        }
+
+
+def update_course_from_import(course, markdown_input):
+    parsed_course, module_quiz_pairs = parse_course_import(markdown_input)
+    diff = _CourseImportDiff(course)
+    diff.diff_course(parsed_course, module_quiz_pairs)
+    diff.save()
+    flag_near_duplicate_courses([course])
+    return diff.summary()
+
+
+def _parse_archive_course(name, content):
+    try:
+        return name, parse_course_import([content]), None
+    except UnicodeDecodeError:
+        return name, None, "Could not decode file as UTF-8."
+    except ValueError as exc:
+        return name, None, str(exc)
+
+
+class _ChunkedFile(File):
+    DEFAULT_CHUNK_SIZE = RESOURCE_COPY_CHUNK_SIZE
+
+
+def _is_archive_resource(path):
+    return len(path.parts) >= 3 and path.parts[-2].isdigit()  # noqa: PLR2004
+
+
+def _split_archive_members(archive):
+    course_members = []
+    resource_members = defaultdict(list)
+    for member in archive.infolist():
+        path = PurePosixPath(member.filename)
+        if member.is_dir() or path.parts[0] == "__MACOSX":
+            continue
+        if _is_archive_resource(path):
+            resource_members[str(path.parent.parent)].append((int(path.parts[-2]), member))
+        elif path.suffix.lower() in ARCHIVE_COURSE_EXTENSIONS:
+            course_members.append(member)
+    return course_members, resource_members
+
+
+def _iter_parsed_archive_courses(archive, course_members, workers):
+    names = [member.filename for member in course_members]
+    contents = (archive.read(member) for member in course_members)
+    if workers <= 1:
+        yield from map(_parse_archive_course, names, contents)
+        return
+
+    # Submit a bounded number of files ahead of the results being consumed,
+    # so only a few archive members are held in memory at a time.
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        futures = deque()
+        for name, content in zip(names, contents, strict=True):
+            futures.append(executor.submit(_parse_archive_course, name, content))
+            if len(futures) >= ARCHIVE_PARSE_AHEAD_PER_WORKER * workers:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+
+def _is_allowed_resource_file(path):
+    return path.suffix.lower().lstrip(".") in ALLOWED_RESOURCE_EXTENSIONS
+
+
+def _copy_archive_resource(archive, member, module, title):
+    resource = Resource(module=module, title=title)
+    with archive.open(member) as source:
+        resource.file.save(PurePosixPath(member.filename).name, _ChunkedFile(source), save=False)
+    return resource
+
+
+def _import_archive_resources(archive, module_quiz_pairs, resource_members):
+    modules_by_order = {module.order: module for module, _ in module_quiz_pairs}
+    resources = []
+    failures = []
+    for module_order, member in resource_members:
+        path = PurePosixPath(member.filename)
+        module = modules_by_order.get(module_order)
+        if module is None:
+            failures.append({"file": member.filename, "error": f"Course has no module {module_order}."})
+            continue
+        if not _is_allowed_resource_file(path):
+            failures.append({"file": member.filename, "error": "File type is not allowed as a resource."})
+            continue
+
+        resources.append(_copy_archive_resource(archive, member, module, path.stem))
+
+    Resource.objects.bulk_create(resources)
+    return failures
+
+
+def _persist_archive_courses(archive, job, parsed_courses, resource_members):
+    failures = []
+    try:
+        save_course_imports([parsed_course for _, parsed_course in parsed_courses])
+        saved_courses = parsed_courses
+    except DatabaseError:
+        saved_courses = []
+        for name, parsed_course in parsed_courses:
+            try:
+                save_course_imports([parsed_course])
+            except DatabaseError as exc:
+                failures.append({"file": name, "error": str(exc)})
+            else:
+                saved_courses.append((name, parsed_course))
+
+    for name, (_, module_quiz_pairs) in saved_courses:
+        course_key = str(PurePosixPath(name).with_suffix(""))
+        try:
+            failures += _import_archive_resources(archive, module_quiz_pairs, resource_members.get(course_key, []))
+        except (OSError, ValidationError) as exc:
+            failures.append({"file": name, "error": f"Could not import resources: {exc}"})
+
+    flag_near_duplicate_courses([course for _, (course, _) in saved_courses])
+    job.imported_courses += len(saved_courses)
+    return failures
+
+
+def import_courses_from_archive(archive, job, workers=None):
+    workers = settings.COURSE_IMPORT_WORKERS if workers is None else workers
+    course_members, resource_members = _split_archive_members(archive)
+    job.total_files = len(course_members)
+    job.save(update_fields=["total_files"])
+
+    pending = []
+    for name, parsed_course, error in _iter_parsed_archive_courses(
+        archive, course_members, min(workers, len(course_members))
+    ):
+        job.processed_files += 1
+        if error is not None:
+            job.failures.append({"file": name, "error": error})
+        else:
+            parsed_course[0].publisher = job.publisher
+            pending.append((name, parsed_course))
+
+        if len(pending) >= ARCHIVE_PERSIST_BATCH_SIZE or job.processed_files == job.total_files:
+            job.failures += _persist_archive_courses(archive, job, pending, resource_members)
+            pending = []
+            job.save(update_fields=["processed_files", "imported_courses", "failures"])
+        else:
+            job.save(update_fields=["processed_files", "failures"])
+
+
+def import_course_archive(job, workers=None):
+    job.status = CourseImportJob.Status.RUNNING
+    job.save(update_fields=["status"])
+
+    try:
+        with job.archive.open("rb"), zipfile.ZipFile(job.archive) as archive:
+            import_courses_from_archive(archive, job, workers)
+    except zipfile.BadZipFile:
+        job.failures.append({"file": job.archive.name, "error": "File is not a valid zip archive."})
+        job.status = CourseImportJob.Status.FAILED
+    except Exception as exc:
+        logger.exception("Course archive import %s failed", job.pk)
+        job.failures.append({"file": job.archive.name, "error": str(exc)})
+        job.status = CourseImportJob.Status.FAILED
+    else:
+        job.status = CourseImportJob.Status.COMPLETED
+    finally:
+        job.finished_at = timezone.now()
+        job.save()
+        job.archive.delete(save=True)
+    return job
+
+
+class _DirectoryArchive:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def infolist(self):
+        return [
+            zipfile.ZipInfo(path.relative_to(self.root).as_posix())
+            for path in sorted(self.root.rglob("*"))
+            if path.is_file()
+        ]
+
+    def read(self, member):
+        return (self.root / member.filename).read_bytes()
+
+    def open(self, member):
+        return (self.root / member.filename).open("rb")
+
+
+def open_course_archive(path):
+    if Path(path).is_dir():
+        return _DirectoryArchive(path)
+    return zipfile.ZipFile(path)
+
+
+def _read_bundle_manifest(bundle, module_count):
+    names = set(bundle.namelist())
+    try:
+        manifest = json.loads(bundle.read(BUNDLE_MANIFEST_FILENAME)) if BUNDLE_MANIFEST_FILENAME in names else []
+    except json.JSONDecodeError as exc:
+        msg = f"Invalid {BUNDLE_MANIFEST_FILENAME}: {exc}"
+        raise ValueError(msg) from exc
+    if not isinstance(manifest, list) or not all(isinstance(entry, dict) for entry in manifest):
+        msg = f"Invalid {BUNDLE_MANIFEST_FILENAME}: expected a list of resource objects."
+        raise ValueError(msg)
+
+    for entry in manifest:
+        path = entry.get("path", "")
+        if path not in names:
+            msg = f"Resource file {path!r} is missing from the bundle."
+            raise ValueError(msg)
+        if not _is_allowed_resource_file(PurePosixPath(path)):
+            msg = f"Resource file {path!r} has a file type that is not allowed."
+            raise ValueError(msg)
+        if not isinstance(entry.get("module"), int) or not 1 <= entry["module"] <= module_count:
+            msg = f"Resource file {path!r} refers to an unknown module."
+            raise ValueError(msg)
+        if not entry.get("title"):
+            msg = f"Resource file {path!r} has no title."
+            raise ValueError(msg)
+    return manifest
+
+
+def create_course_from_bundle(bundle_file, publisher):
+    try:
+        with zipfile.ZipFile(bundle_file) as bundle:
+            if BUNDLE_COURSE_FILENAME not in bundle.namelist():
+                msg = f"Bundle does not contain {BUNDLE_COURSE_FILENAME}."
+                raise ValueError(msg)
+
+            with bundle.open(BUNDLE_COURSE_FILENAME) as course_file:
+                course, module_quiz_pairs = parse_course_import(course_file)
+            manifest = _read_bundle_manifest(bundle, len(module_quiz_pairs))
+
+            course.publisher = publisher
+            with transaction.atomic():
+                save_course_imports([(course, module_quiz_pairs)])
+                resources = [
+                    _copy_archive_resource(
+                        bundle, bundle.getinfo(entry["path"]), module_quiz_pairs[entry["module"] - 1][0], entry["title"]
+                    )
+                    for entry in manifest
+                ]
+                Resource.objects.bulk_create(resources)
+    except zipfile.BadZipFile as exc:
+        msg = "File is not a valid zip archive."
+        raise ValueError(msg) from exc
+    flag_near_duplicate_courses([course])
     return course
 
 
@@ -142,47 +708,141 @@ def _render_tag_block(tag, inner_text):
     return f"@start {tag.value}\n{inner_text}\n@end {tag.value}"
 
 
-def export_course_to_import_markdown(course):
-    course_blocks = [
-        _render_tag_block(Tag.NAME, course.name or ""),
-        _render_tag_block(Tag.DESCRIPTION, course.description or ""),
+def _render_module_block(module):
+    module_blocks = [
+        _render_tag_block(Tag.TITLE, module.title or ""),
+        _render_tag_block(Tag.DESCRIPTION, module.description or ""),
+        _render_tag_block(Tag.CONTENT, module.content or ""),
     ]
 
-    modules = course.modules.order_by("order", "pk")
-    for module in modules:
-        module_blocks = [
-            _render_tag_block(Tag.TITLE, module.title or ""),
-            _render_tag_block(Tag.DESCRIPTION, module.description or ""),
-            _render_tag_block(Tag.CONTENT, module.content or ""),
+    quiz = getattr(module, "quiz", None)
+    if quiz is not None:
+        quiz_blocks = [
+            _render_tag_block(Tag.TITLE, quiz.title or ""),
+            _render_tag_block(Tag.DESCRIPTION, quiz.description or ""),
         ]
 
-        quiz = getattr(module, "quiz", None)
-        if quiz is not None:
-            quiz_blocks = [
-                _render_tag_block(Tag.TITLE, quiz.title or ""),
-                _render_tag_block(Tag.DESCRIPTION, quiz.description or ""),
-            ]
+        for question in quiz.questions.all():
+            question_blocks = [_render_tag_block(Tag.TEXT, question.text or "")]
+            for answer in question.answers.all():
+                answer_blocks = [
+                    _render_tag_block(Tag.TEXT, answer.text or ""),
+                    _render_tag_block(Tag.IS_CORRECT, str(bool(answer.is_correct)).lower()),
+                ]
+                question_blocks.append(_render_tag_block(Tag.ANSWER, "\n\n".join(answer_blocks)))
 
-            for question in quiz.questions.order_by("order", "pk"):
-                question_blocks = [_render_tag_block(Tag.TEXT, question.text or "")]
-                for answer in question.answers.order_by("pk"):
-                    answer_blocks = [
-                        _render_tag_block(Tag.TEXT, answer.text or ""),
-                        _render_tag_block(Tag.IS_CORRECT, str(bool(answer.is_correct)).lower()),
-                    ]
-                    question_blocks.append(_render_tag_block(Tag.ANSWER, "\n\n".join(answer_blocks)))
+            quiz_blocks.append(_render_tag_block(Tag.QUESTION, "\n\n".join(question_blocks)))
 
-                quiz_blocks.append(_render_tag_block(Tag.QUESTION, "\n\n".join(question_blocks)))
+        module_blocks.append(_render_tag_block(Tag.QUIZ, "\n\n".join(quiz_blocks)))
 
-            module_blocks.append(_render_tag_block(Tag.QUIZ, "\n\n".join(quiz_blocks)))
+    return _render_tag_block(Tag.MODULE, "\n\n".join(module_blocks))
 
-        course_blocks.append(_render_tag_block(Tag.MODULE, "\n\n".join(module_blocks)))
 
-    return "\n\n".join(course_blocks).strip() + "\n"
+def iter_course_import_markdown(course):
+    yield _render_tag_block(Tag.NAME, course.name or "")
+    yield "\n\n"
+    yield _render_tag_block(Tag.DESCRIPTION, course.description or "")
+
+    modules = (
+        course.modules.order_by("order", "pk")
+        .select_related("quiz")
+        .prefetch_related(
+            Prefetch(
+                "quiz__questions",
+                queryset=Question.objects.order_by("order", "pk").prefetch_related(
+                    Prefetch("answers", queryset=Answer.objects.order_by("pk"))
+                ),
+            )
+        )
+    )
+    for module in modules.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield "\n\n"
+        yield _render_module_block(module)
+
+    yield "\n"
+
+
+def export_course_to_import_markdown(course):
+    return "".join(iter_course_import_markdown(course))
 
 
 def build_course_import_file(course):
-    markdown_output = export_course_to_import_markdown(course)
     base_name = slugify(course.name or "")
     filename = f"{base_name}.md"
-    return filename, markdown_output.encode("utf-8")
+    return filename, (chunk.encode("utf-8") for chunk in iter_course_import_markdown(course))
+
+
+class _ZipStreamBuffer:
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _iter_course_bundle_entries(course):
+    module_positions = {
+        module_id: position
+        for position, module_id in enumerate(
+            course.modules.order_by("order", "pk").values_list("pk", flat=True), start=1
+        )
+    }
+    yield BUNDLE_COURSE_FILENAME, (chunk.encode("utf-8") for chunk in iter_course_import_markdown(course))
+
+    manifest = []
+    resources = Resource.objects.filter(module__course=course).order_by("module__order", "module_id", "pk")
+    for resource in resources.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        module_position = module_positions[resource.module_id]
+        path = f"resources/{module_position}/{resource.pk}-{PurePosixPath(resource.file.name).name}"
+        manifest.append({"module": module_position, "title": resource.title, "path": path})
+        yield path, _iter_resource_chunks(resource)
+
+    yield BUNDLE_MANIFEST_FILENAME, [json.dumps(manifest, indent=2).encode("utf-8")]
+
+
+def _iter_resource_chunks(resource):
+    with resource.file.open("rb"):
+        yield from resource.file.chunks(RESOURCE_COPY_CHUNK_SIZE)
+
+
+def iter_course_bundle(course):
+    buffer = _ZipStreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+        for path, chunks in _iter_course_bundle_entries(course):
+            with bundle.open(path, "w", force_zip64=True) as target:
+                for chunk in chunks:
+                    target.write(chunk)
+                    if data := buffer.drain():
+                        yield data
+    yield buffer.drain()
+
+
+def build_course_bundle_file(course):
+    base_name = slugify(course.name or "")
+    return f"{base_name}.zip", iter_course_bundle(course)
+
+
+def _export_course_file(course_id):
+    course = Course.objects.get(pk=course_id)
+    filename = f"{course.pk}-{slugify(course.name or '') or 'course'}.md"
+    return filename, export_course_to_import_markdown(course).encode("utf-8")
+
+
+def iter_exported_course_files(course_ids, workers=None):
+    workers = min(settings.COURSE_IMPORT_WORKERS if workers is None else workers, len(course_ids))
+    if workers <= 1:
+        yield from map(_export_course_file, course_ids)
+        return
+
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        yield from executor.map(_export_course_file, course_ids)
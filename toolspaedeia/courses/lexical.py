@@ -0,0 +1,46 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Chunks are scored one at a time, so the length normalisation uses a fixed
+# reference length instead of the batch average: the same chunk gets the
+# same score whether a single course or a whole bulk batch is scored.
+BM25_REFERENCE_LENGTH = 100
+
+_TERM_REGEX = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TERM_REGEX.findall(text.lower())
+
+
+class LexicalTagIndex:
+    def __init__(self, tag_names):
+        self.tag_count = len(tag_names)
+        postings = {}
+        for row, name in enumerate(tag_names):
+            terms = set(tokenize(name))
+            for term in terms:
+                rows, shares = postings.setdefault(term, ([], []))
+                rows.append(row)
+                shares.append(1 / len(terms))
+        self.postings = {
+            term: (np.array(rows, dtype=np.intp), np.array(shares, dtype=np.float32))
+            for term, (rows, shares) in postings.items()
+        }
+
+    def __len__(self):
+        return self.tag_count
+
+    def score(self, texts):
+        scores = np.zeros((self.tag_count, len(texts)), dtype=np.float32)
+        for column, text in enumerate(texts):
+            tokens = tokenize(text)
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * len(tokens) / BM25_REFERENCE_LENGTH)
+            for term, frequency in Counter(token for token in tokens if token in self.postings).items():
+                rows, shares = self.postings[term]
+                scores[rows, column] += shares * (frequency / (frequency + length_norm))
+        return scores
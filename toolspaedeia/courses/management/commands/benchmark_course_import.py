@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db import transaction
+from django.test.utils import CaptureQueriesContext
+
+from courses.import_export import parse_course_import
+from courses.import_export import save_course_imports
+
+
+def build_synthetic_course_markdown(module_count, questions_per_module, answers_per_question):
+    blocks = [
+        "@start name\nSynthetic Course\n@end name",
+        "@start description\nGenerated for benchmarks.\n@end description",
+    ]
+    paragraph = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20
+    for module_index in range(1, module_count + 1):
+        questions = []
+        for question_index in range(1, questions_per_module + 1):
+            answers = [
+                f"@start answer\n@start text\nAnswer {answer_index}\n@end text\n"
+                f"@start is_correct\n{str(answer_index == 1).lower()}\n@end is_correct\n@end answer"
+                for answer_index in range(1, answers_per_question + 1)
+            ]
+            questions.append(
+                f"@start question\n@start text\nQuestion {module_index}.{question_index}?\n@end text\n"
+                + "\n".join(answers)
+                + "\n@end question"
+            )
+        blocks.append(
+            f"@start module\n@start title\nModule {module_index}\n@end title\n"
+            f"@start description\nModule {module_index} description\n@end description\n"
+            f"@start content\n# Module {module_index}\n\n{paragraph}\n@end content\n"
+            f"@start quiz\n@start title\nQuiz {module_index}\n@end title\n"
+            f"@start description\nQuiz description\n@end description\n"
+            + "\n".join(questions)
+            + "\n@end quiz\n@end module"
+        )
+    return "\n\n".join(blocks) + "\n"
+
+
+class Command(BaseCommand):
+    help = "Benchmark parsing and persisting a synthetic course import. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modules", type=int, default=40)
+        parser.add_argument("--questions-per-module", type=int, default=15)
+        parser.add_argument("--answers-per-question", type=int, default=4)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, **options):
+        markdown = build_synthetic_course_markdown(
+            options["modules"], options["questions_per_module"], options["answers_per_question"]
+        )
+        question_count = options["modules"] * options["questions_per_module"]
+        answer_count = question_count * options["answers_per_question"]
+        self.stdout.write(
+            f"Synthetic course: {options['modules']} modules, {question_count} questions, "
+            f"{answer_count} answers, {len(markdown.encode('utf-8')) / 1024:.0f} KiB"
+        )
+
+        for run in range(1, options["repeat"] + 1):
+            parse_started = time.perf_counter()
+            parsed_course = parse_course_import(markdown)
+            parse_seconds = time.perf_counter() - parse_started
+
+            with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+                save_started = time.perf_counter()
+                save_course_imports([parsed_course])
+                save_seconds = time.perf_counter() - save_started
+                transaction.set_rollback(True)
+
+            insert_count = sum(1 for query in queries if query["sql"].startswith("INSERT"))
+            self.stdout.write(
+                f"Run {run}: parse {parse_seconds * 1000:.1f} ms, save {save_seconds * 1000:.1f} ms, "
+                f"{len(queries)} queries ({insert_count} INSERT)"
+            )
@@ -0,0 +1,89 @@
+import multiprocessing
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+import numpy as np
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand
+
+from courses.suggestions import EMBEDDING_INFERENCE_MODES
+from courses.suggestions import embedding_model
+
+SAMPLE_SENTENCES = (
+    "Loops repeat a block of code while a condition holds.",
+    "Gradient descent updates model weights in the direction that lowers the loss.",
+    "Knead the dough for ten minutes and let it rise in a warm place.",
+    "A foreign key links each row to a row in another table.",
+    "Use a sharp knife and keep your fingers curled while chopping onions.",
+    "Convolutional layers learn local filters that are shared across an image.",
+)
+
+
+def build_sample_texts(count, sentences_per_text):
+    return [
+        " ".join(SAMPLE_SENTENCES[(index + offset) % len(SAMPLE_SENTENCES)] for offset in range(sentences_per_text))
+        for index in range(count)
+    ]
+
+
+def _benchmark_inference(inference, texts, batch_size):
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    load_started = time.perf_counter()
+    model = embedding_model(inference)
+    load_seconds = time.perf_counter() - load_started
+
+    model.encode(texts[:batch_size], batch_size=batch_size)
+    encode_started = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, normalize_embeddings=True)
+    encode_seconds = time.perf_counter() - encode_started
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return load_seconds, encode_seconds, baseline_rss, peak_rss, np.asarray(embeddings, dtype=np.float32)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark embedding inference modes: load time, encode throughput, peak RSS and cosine drift against the "
+        "float32 model. Each mode runs in its own process so RSS figures are not shared."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--texts", type=int, default=512)
+        parser.add_argument("--sentences-per-text", type=int, default=6)
+        parser.add_argument("--batch-size", type=int, default=64)
+        parser.add_argument(
+            "--inference",
+            action="append",
+            choices=EMBEDDING_INFERENCE_MODES,
+            dest="modes",
+            help="Inference mode to benchmark; repeat to compare several. Defaults to all modes.",
+        )
+
+    def handle(self, **options):
+        modes = options["modes"] or EMBEDDING_INFERENCE_MODES
+        texts = build_sample_texts(options["texts"], options["sentences_per_text"])
+        reference_embeddings = None
+
+        for inference in sorted(modes, key=lambda mode: mode != "float32"):
+            with ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn"), initializer=django.setup
+            ) as executor:
+                try:
+                    load_seconds, encode_seconds, baseline_rss, peak_rss, embeddings = executor.submit(
+                        _benchmark_inference, inference, texts, options["batch_size"]
+                    ).result()
+                except (ImproperlyConfigured, OSError) as exc:
+                    self.stderr.write(f"{inference}: unavailable ({exc})")
+                    continue
+
+            if inference == "float32":
+                reference_embeddings = embeddings
+            summary = (
+                f"{inference}: load {load_seconds:.2f} s, {len(texts) / encode_seconds:.1f} texts/s, "
+                f"peak RSS {peak_rss / 1024:.0f} MiB, +{(peak_rss - baseline_rss) / 1024:.0f} MiB over Django alone"
+            )
+            if reference_embeddings is not None and inference != "float32":
+                similarities = np.sum(reference_embeddings * embeddings, axis=1)
+                summary += f", cosine vs float32 mean {similarities.mean():.4f} min {similarities.min():.4f}"
+            self.stdout.write(summary)
@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.import_export import create_course_from_import
+from courses.management.commands.benchmark_course_import import build_synthetic_course_markdown
+from courses.models import CourseTag
+from courses.suggestions import SUGGESTION_BACKENDS
+from courses.suggestions import suggest_tags
+
+SYNTHETIC_TAG_WORDS = ("lorem", "ipsum", "dolor", "amet", "consectetur", "adipiscing", "elit", "module")
+
+
+class Command(BaseCommand):
+    help = "Benchmark tag suggestion backends on a synthetic course and catalog of tags. All rows are rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--modules", type=int, default=40)
+        parser.add_argument("--tags", type=int, default=500)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--top", type=int, default=5)
+        parser.add_argument(
+            "--backend",
+            action="append",
+            choices=SUGGESTION_BACKENDS,
+            dest="backends",
+            help="Backend to benchmark; repeat to compare several. Defaults to all backends.",
+        )
+
+    def handle(self, **options):
+        backends = options["backends"] or SUGGESTION_BACKENDS
+        markdown = build_synthetic_course_markdown(options["modules"], 1, 2)
+
+        with transaction.atomic():
+            course = create_course_from_import(markdown, None)
+            tag_names = [*SYNTHETIC_TAG_WORDS, *(f"topic {index}" for index in range(options["tags"]))]
+            CourseTag.objects.bulk_create([CourseTag(name=name) for name in tag_names[: options["tags"]]])
+            self.stdout.write(f"Synthetic course: {options['modules']} modules, {options['tags']} tags")
+
+            top_tags = {}
+            for backend in backends:
+                cold_started = time.perf_counter()
+                try:
+                    suggest_tags(course, min_score=0.0, backend=backend)
+                except OSError as exc:
+                    self.stderr.write(f"{backend}: unavailable ({exc})")
+                    continue
+                cold_seconds = time.perf_counter() - cold_started
+
+                warm_timings = []
+                for _ in range(options["repeat"]):
+                    warm_started = time.perf_counter()
+                    suggestions = suggest_tags(course, min_score=0.0, backend=backend)
+                    warm_timings.append(time.perf_counter() - warm_started)
+
+                top_tags[backend] = [tag.name for tag, _ in suggestions[: options["top"]]]
+                self.stdout.write(
+                    f"{backend}: cold {cold_seconds * 1000:.1f} ms, warm median "
+                    f"{statistics.median(warm_timings) * 1000:.1f} ms, top {', '.join(top_tags[backend])}"
+                )
+
+            if len(top_tags) > 1:
+                shared_tags = set.intersection(*(set(names) for names in top_tags.values()))
+                self.stdout.write(f"Top {options['top']} overlap: {len(shared_tags)} tags")
+            transaction.set_rollback(True)
@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from courses.search import build_course_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Encode every published course and write the memory-mapped embedding matrix used by semantic search. "
+        "Courses published after the last build are only found by the lexical filter until it is run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--directory", default=None, help="Defaults to COURSE_SEARCH_INDEX_DIR.")
+        parser.add_argument("--batch-size", type=int, default=256, help="Courses encoded per block.")
+
+    def handle(self, **options):
+        directory = options["directory"] or settings.COURSE_SEARCH_INDEX_DIR
+        started = time.perf_counter()
+        course_count = build_course_search_index(directory, options["batch_size"])
+        self.stdout.write(
+            f"Indexed {course_count} published courses in {directory} in {time.perf_counter() - started:.2f} s."
+        )
@@ -0,0 +1,58 @@
+import time
+import zipfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from courses.import_export import iter_exported_course_files
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = "Export courses as import markdown files into a directory or a .zip archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("destination", help="Directory or .zip archive to write the course files to.")
+        parser.add_argument(
+            "--publisher",
+            action="append",
+            dest="publishers",
+            default=[],
+            help="Only export courses of this publisher username. Can be repeated.",
+        )
+        parser.add_argument("--workers", type=int, default=None, help="Number of export processes.")
+
+    def handle(self, **options):
+        courses = Course.objects.order_by("pk")
+        if options["publishers"]:
+            courses = courses.filter(publisher__username__in=options["publishers"])
+        course_ids = list(courses.values_list("pk", flat=True))
+
+        destination = Path(options["destination"])
+        started = time.perf_counter()
+        if destination.suffix.lower() == ".zip":
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            with zipfile.ZipFile(destination, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                total_bytes = self.write_files(course_ids, options["workers"], archive.writestr)
+        else:
+            if destination.exists() and not destination.is_dir():
+                msg = f"{destination} is not a directory or .zip archive."
+                raise CommandError(msg)
+            destination.mkdir(parents=True, exist_ok=True)
+            total_bytes = self.write_files(
+                course_ids, options["workers"], lambda filename, data: (destination / filename).write_bytes(data)
+            )
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Exported {len(course_ids)} courses ({total_bytes / 1024:.0f} KiB) to {destination} "
+            f"in {elapsed:.2f} s, {len(course_ids) / elapsed if elapsed else 0:.1f} courses/s."
+        )
+
+    def write_files(self, course_ids, workers, write):
+        total_bytes = 0
+        for filename, data in iter_exported_course_files(course_ids, workers):
+            write(filename, data)
+            total_bytes += len(data)
+        return total_bytes
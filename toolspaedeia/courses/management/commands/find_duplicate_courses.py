@@ -0,0 +1,42 @@
+import time
+from itertools import batched
+
+from django.core.management.base import BaseCommand
+
+from courses.duplicates import NEAR_DUPLICATE_THRESHOLD
+from courses.duplicates import flag_near_duplicate_courses
+from courses.models import Course
+from courses.models import CourseNearDuplicate
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute MinHash signatures for every course and flag near-duplicates through the LSH band index. "
+        "Only courses whose module content changed since their last signature are re-checked unless --force is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Courses signed per block.")
+        parser.add_argument("--threshold", type=float, default=NEAR_DUPLICATE_THRESHOLD)
+        parser.add_argument("--force", action="store_true", help="Re-check courses with up to date signatures.")
+
+    def handle(self, **options):
+        started = time.perf_counter()
+        course_ids = list(Course.objects.order_by("pk").values_list("pk", flat=True))
+        for block_ids in batched(course_ids, options["batch_size"], strict=False):
+            courses = list(Course.objects.filter(pk__in=block_ids).order_by("pk"))
+            flag_near_duplicate_courses(courses, options["threshold"], force=options["force"])
+
+        near_duplicates = CourseNearDuplicate.objects.select_related("course", "duplicate_of").order_by(
+            "course_id", "duplicate_of_id"
+        )
+        for near_duplicate in near_duplicates:
+            self.stdout.write(
+                f"{near_duplicate.course.name} (#{near_duplicate.course_id}) ~ "
+                f"{near_duplicate.duplicate_of.name} (#{near_duplicate.duplicate_of_id}): "
+                f"{near_duplicate.similarity:.0%}"
+            )
+        self.stdout.write(
+            f"Scanned {len(course_ids)} courses, {len(near_duplicates)} near-duplicate pairs flagged "
+            f"in {time.perf_counter() - started:.2f} s."
+        )
@@ -0,0 +1,50 @@
+import time
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from courses.import_export import import_courses_from_archive
+from courses.import_export import open_course_archive
+from courses.models import CourseImportJob
+
+
+class Command(BaseCommand):
+    help = "Import course markdown files from a directory or a .zip archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory or .zip archive with course files.")
+        parser.add_argument("--publisher", required=True, help="Username of the publisher that owns the courses.")
+        parser.add_argument("--workers", type=int, default=None, help="Number of parsing processes.")
+
+    def handle(self, **options):
+        publisher = get_user_model().objects.filter(username=options["publisher"]).first()
+        if publisher is None:
+            msg = f"Publisher {options['publisher']!r} does not exist."
+            raise CommandError(msg)
+
+        job = CourseImportJob.objects.create(publisher=publisher, status=CourseImportJob.Status.RUNNING)
+        started = time.perf_counter()
+        try:
+            with open_course_archive(options["source"]) as archive:
+                import_courses_from_archive(archive, job, options["workers"])
+        except (OSError, zipfile.BadZipFile) as exc:
+            job.status = CourseImportJob.Status.FAILED
+            job.failures.append({"file": options["source"], "error": str(exc)})
+            job.finished_at = timezone.now()
+            job.save()
+            raise CommandError(str(exc)) from exc
+        elapsed = time.perf_counter() - started
+
+        job.status = CourseImportJob.Status.COMPLETED
+        job.finished_at = timezone.now()
+        job.save()
+
+        for failure in job.failures:
+            self.stderr.write(f"{failure['file']}: {failure['error']}")
+        self.stdout.write(
+            f"Imported {job.imported_courses} of {job.total_files} courses in {elapsed:.2f} s, "
+            f"{job.processed_files / elapsed if elapsed else 0:.1f} files/s, {len(job.failures)} failures."
+        )
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from courses.embedding_service import DEFAULT_BATCH_WAIT_SECONDS
+from courses.embedding_service import DEFAULT_MAX_BATCH_TEXTS
+from courses.embedding_service import EmbeddingServer
+from courses.suggestions import embedding_model
+from courses.suggestions import encode_texts_locally
+
+
+class Command(BaseCommand):
+    help = "Serve sentence embeddings to web workers over a Unix socket, micro-batching concurrent requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=None, help="Socket path. Defaults to EMBEDDING_SERVICE_SOCKET.")
+        parser.add_argument(
+            "--batch-wait-ms",
+            type=float,
+            default=DEFAULT_BATCH_WAIT_SECONDS * 1000,
+            help="How long to wait for more requests before encoding a batch.",
+        )
+        parser.add_argument(
+            "--max-batch-texts", type=int, default=DEFAULT_MAX_BATCH_TEXTS, help="Maximum texts per encode call."
+        )
+
+    def handle(self, **options):
+        socket_path = options["socket"] or settings.EMBEDDING_SERVICE_SOCKET
+        if not socket_path:
+            msg = "Pass --socket or set EMBEDDING_SERVICE_SOCKET."
+            raise CommandError(msg)
+
+        embedding_model()
+        server = EmbeddingServer(
+            socket_path,
+            encode_texts_locally,
+            batch_wait=options["batch_wait_ms"] / 1000,
+            max_batch_texts=options["max_batch_texts"],
+        )
+        self.stdout.write(f"Embedding service listening on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping embedding service.")
+        finally:
+            server.server_close()
@@ -0,0 +1,136 @@
+import time
+from itertools import batched
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses.models import Course
+from courses.models import CourseTag
+from courses.models import TagSuggestionResult
+from courses.suggestions import POOLING_REDUCERS
+from courses.suggestions import SUGGESTION_MIN_SCORE
+from courses.suggestions import SUGGESTION_POOLING
+from courses.suggestions import course_revision
+from courses.suggestions import modules_by_course
+from courses.suggestions import rank_tag_scores
+from courses.suggestions import score_courses
+from courses.suggestions import tag_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Suggest tags for every course in blocks, store the suggestions shown in the admin and optionally apply the "
+        "top tags above a threshold. Courses whose suggestions are up to date are skipped, so an interrupted run can "
+        "be resumed. Suggestions are only stored when --min-score and --pooling match the admin's settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=128, help="Courses scored per block.")
+        parser.add_argument("--top", type=int, default=5, help="Top suggestions per course considered for applying.")
+        parser.add_argument("--min-score", type=float, default=SUGGESTION_MIN_SCORE)
+        parser.add_argument("--pooling", choices=sorted(POOLING_REDUCERS), default=SUGGESTION_POOLING)
+        parser.add_argument(
+            "--apply-threshold",
+            type=float,
+            default=None,
+            help="Add suggested tags with at least this score to their course.",
+        )
+        parser.add_argument("--force", action="store_true", help="Recompute courses with up to date suggestions.")
+
+    def handle(self, **options):
+        started = time.perf_counter()
+        self.all_tags, self.tag_scorer = tag_index()
+        if not self.all_tags:
+            self.stdout.write("No tags to suggest.")
+            return
+
+        self.tags_by_id = {tag.pk: tag for tag in self.all_tags}
+        self.tag_items = [(tag.pk, tag.name) for tag in self.all_tags]
+        course_ids = list(Course.objects.order_by("pk").values_list("pk", flat=True))
+        totals = {"scored": 0, "skipped": 0, "applied": 0}
+
+        for block_ids in batched(course_ids, options["batch_size"], strict=False):
+            courses = list(Course.objects.filter(pk__in=block_ids).order_by("pk"))
+            block_totals = self.process_block(courses, options)
+            for key, value in block_totals.items():
+                totals[key] += value
+            processed = totals["scored"] + totals["skipped"]
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{processed}/{len(course_ids)} courses, {totals['scored']} scored, "
+                f"{processed / elapsed if elapsed else 0:.1f} courses/s"
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Scored {totals['scored']} courses against {len(self.all_tags)} tags, skipped {totals['skipped']} "
+            f"up to date, applied {totals['applied']} tags in {elapsed:.2f} s."
+        )
+
+    def process_block(self, courses, options):
+        shared_results = options["min_score"] == SUGGESTION_MIN_SCORE and options["pooling"] == SUGGESTION_POOLING
+        grouped_modules = modules_by_course(courses)
+        revisions = {
+            course.pk: course_revision(course, grouped_modules[course.pk], self.tag_items) for course in courses
+        }
+        stored_results = {
+            course_id: suggestions
+            for course_id, revision, suggestions in TagSuggestionResult.objects.filter(course__in=courses).values_list(
+                "course_id", "revision", "suggestions"
+            )
+            if revision == revisions[course_id] and shared_results and not options["force"]
+        }
+
+        pending_courses = [course for course in courses if course.pk not in stored_results]
+        suggestions_by_course = {
+            course_id: [
+                (self.tags_by_id[item["tag_id"]], item["score"])
+                for item in suggestions
+                if item["tag_id"] in self.tags_by_id
+            ]
+            for course_id, suggestions in stored_results.items()
+        }
+        if pending_courses:
+            scores = score_courses(pending_courses, self.tag_scorer, options["pooling"], grouped_modules)
+            for position, course in enumerate(pending_courses):
+                suggestions_by_course[course.pk] = rank_tag_scores(
+                    self.all_tags, scores[:, position], options["min_score"]
+                )
+
+        with transaction.atomic():
+            if shared_results:
+                TagSuggestionResult.objects.filter(course__in=pending_courses).delete()
+                TagSuggestionResult.objects.bulk_create(
+                    [
+                        TagSuggestionResult(
+                            course=course,
+                            revision=revisions[course.pk],
+                            suggestions=[
+                                {"tag_id": tag.pk, "score": score} for tag, score in suggestions_by_course[course.pk]
+                            ],
+                        )
+                        for course in pending_courses
+                    ]
+                )
+            applied = self.apply_tags(suggestions_by_course, options["top"], options["apply_threshold"])
+
+        return {"scored": len(pending_courses), "skipped": len(stored_results), "applied": applied}
+
+    def apply_tags(self, suggestions_by_course, top, threshold):
+        if threshold is None:
+            return 0
+
+        links = [
+            CourseTag.courses.through(course_id=course_id, coursetag_id=tag.pk)
+            for course_id, suggestions in suggestions_by_course.items()
+            for tag, score in suggestions[:top]
+            if score >= threshold
+        ]
+        existing_links = set(
+            CourseTag.courses.through.objects.filter(course_id__in=suggestions_by_course).values_list(
+                "course_id", "coursetag_id"
+            )
+        )
+        new_links = [link for link in links if (link.course_id, link.coursetag_id) not in existing_links]
+        CourseTag.courses.through.objects.bulk_create(new_links, ignore_conflicts=True)
+        return len(new_links)
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.5 on 2026-10-19 13:27
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0020_remove_course_end_date_remove_course_start_date"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnswerStatistics",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("times_selected", models.PositiveIntegerField(default=0)),
+                (
+                    "answer",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="statistics", to="courses.answer"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Answer Statistics",
+                "verbose_name_plural": "Answer Statistics",
+            },
+        ),
+        migrations.CreateModel(
+            name="QuestionStatistics",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("times_shown", models.PositiveIntegerField(default=0)),
+                ("times_correct", models.PositiveIntegerField(default=0)),
+                (
+                    "question",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="statistics", to="courses.question"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Question Statistics",
+                "verbose_name_plural": "Question Statistics",
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.5 on 2026-10-19 14:13
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0022_courseimportjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseTagEmbedding",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=64)),
+                ("model_name", models.CharField(max_length=255)),
+                ("vector", models.BinaryField()),
+                (
+                    "tag",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="embedding", to="courses.coursetag"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Course Tag Embedding",
+                "verbose_name_plural": "Course Tag Embeddings",
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.5 on 2026-10-19 14:14
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0023_coursetagembedding"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ModuleEmbedding",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("content_hash", models.CharField(max_length=64)),
+                ("model_name", models.CharField(max_length=255)),
+                ("vector", models.BinaryField()),
+                (
+                    "module",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="embedding", to="courses.module"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Module Embedding",
+                "verbose_name_plural": "Module Embeddings",
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0.5 on 2026-10-19 14:17
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0024_moduleembedding"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TagSuggestionResult",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("revision", models.CharField(max_length=64)),
+                ("suggestions", models.JSONField(blank=True, default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tag_suggestion_results",
+                        to="courses.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tag Suggestion Result",
+                "verbose_name_plural": "Tag Suggestion Results",
+                "unique_together": {("course", "revision")},
+            },
+        ),
+    ]
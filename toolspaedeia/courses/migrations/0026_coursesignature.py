@@ -0,0 +1,80 @@
+# Generated by Django 6.0.5 on 2026-10-19 15:11
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0025_tagsuggestionresult"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseSignature",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("content_hash", models.CharField(max_length=64)),
+                ("minhash", models.BinaryField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "course",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="signature", to="courses.course"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Course Signature",
+                "verbose_name_plural": "Course Signatures",
+            },
+        ),
+        migrations.CreateModel(
+            name="CourseNearDuplicate",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("similarity", models.FloatField()),
+                ("detected_at", models.DateTimeField(auto_now=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="near_duplicates", to="courses.course"
+                    ),
+                ),
+                (
+                    "duplicate_of",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="near_duplicate_copies",
+                        to="courses.course",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Course Near Duplicate",
+                "verbose_name_plural": "Course Near Duplicates",
+                "unique_together": {("course", "duplicate_of")},
+            },
+        ),
+        migrations.CreateModel(
+            name="CourseSignatureBand",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("band", models.PositiveSmallIntegerField()),
+                ("bucket", models.BigIntegerField()),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="signature_bands", to="courses.course"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Course Signature Band",
+                "verbose_name_plural": "Course Signature Bands",
+                "indexes": [models.Index(fields=["band", "bucket"], name="courses_cou_band_da7003_idx")],
+                "unique_together": {("course", "band")},
+            },
+        ),
+    ]
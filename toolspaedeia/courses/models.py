@@ -54,6 +54,79 @@ class CourseTag(models.Model):
             raise ValidationError({"name": "Tag name must contain only lowercase letters and numbers."})
 
 
+class CourseTagEmbedding(models.Model):
+    tag = models.OneToOneField(CourseTag, related_name="embedding", on_delete=models.CASCADE)
+    name = models.CharField(max_length=64)
+    model_name = models.CharField(max_length=255)
+    vector = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Course Tag Embedding"
+        verbose_name_plural = "Course Tag Embeddings"
+
+    def __str__(self) -> str:
+        return f"{self.name} ({self.model_name})"
+
+
+class TagSuggestionResult(models.Model):
+    course = models.ForeignKey(Course, related_name="tag_suggestion_results", on_delete=models.CASCADE)
+    revision = models.CharField(max_length=64)
+    suggestions = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("course", "revision")
+        verbose_name = "Tag Suggestion Result"
+        verbose_name_plural = "Tag Suggestion Results"
+
+    def __str__(self) -> str:
+        return f"{self.course} - {self.revision[:12]}"
+
+
+class CourseSignature(models.Model):
+    course = models.OneToOneField(Course, related_name="signature", on_delete=models.CASCADE)
+    content_hash = models.CharField(max_length=64)
+    minhash = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Course Signature"
+        verbose_name_plural = "Course Signatures"
+
+    def __str__(self) -> str:
+        return f"{self.course} - {self.content_hash[:12]}"
+
+
+class CourseSignatureBand(models.Model):
+    course = models.ForeignKey(Course, related_name="signature_bands", on_delete=models.CASCADE)
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ("course", "band")
+        indexes = [models.Index(fields=["band", "bucket"])]
+        verbose_name = "Course Signature Band"
+        verbose_name_plural = "Course Signature Bands"
+
+    def __str__(self) -> str:
+        return f"{self.course} - band {self.band}"
+
+
+class CourseNearDuplicate(models.Model):
+    course = models.ForeignKey(Course, related_name="near_duplicates", on_delete=models.CASCADE)
+    duplicate_of = models.ForeignKey(Course, related_name="near_duplicate_copies", on_delete=models.CASCADE)
+    similarity = models.FloatField()
+    detected_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("course", "duplicate_of")
+        verbose_name = "Course Near Duplicate"
+        verbose_name_plural = "Course Near Duplicates"
+
+    def __str__(self) -> str:
+        return f"{self.course} ~ {self.duplicate_of} ({self.similarity:.0%})"
+
+
 class Module(models.Model):
     course = models.ForeignKey(Course, related_name="modules", on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
@@ -78,6 +151,20 @@ class Module(models.Model):
         super().save(*args, **kwargs)
 
 
+class ModuleEmbedding(models.Model):
+    module = models.OneToOneField(Module, related_name="embedding", on_delete=models.CASCADE)
+    content_hash = models.CharField(max_length=64)
+    model_name = models.CharField(max_length=255)
+    vector = models.BinaryField()
+
+    class Meta:
+        verbose_name = "Module Embedding"
+        verbose_name_plural = "Module Embeddings"
+
+    def __str__(self) -> str:
+        return f"{self.module} ({self.model_name})"
+
+
 class ModuleProgression(models.Model):
     user = models.ForeignKey(get_user_model(), related_name="module_progressions", on_delete=models.CASCADE)
     module = models.ForeignKey(Module, related_name="progressions", on_delete=models.CASCADE)
@@ -178,6 +265,37 @@ class Answer(models.Model):
         return self.text
 
 
+class QuestionStatistics(models.Model):
+    question = models.OneToOneField(Question, related_name="statistics", on_delete=models.CASCADE)
+    times_shown = models.PositiveIntegerField(default=0)
+    times_correct = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Question Statistics"
+        verbose_name_plural = "Question Statistics"
+
+    def __str__(self) -> str:
+        return f"{self.question} - {self.times_correct}/{self.times_shown} correct"
+
+    @property
+    def correct_rate(self):
+        if not self.times_shown:
+            return None
+        return round(self.times_correct / self.times_shown * 100, 2)
+
+
+class AnswerStatistics(models.Model):
+    answer = models.OneToOneField(Answer, related_name="statistics", on_delete=models.CASCADE)
+    times_selected = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Answer Statistics"
+        verbose_name_plural = "Answer Statistics"
+
+    def __str__(self) -> str:
+        return f"{self.answer} - selected {self.times_selected} times"
+
+
 class Resource(models.Model):
     module = models.ForeignKey(Module, related_name="resources", on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
@@ -191,3 +309,39 @@ class Resource(models.Model):
 
     def __str__(self) -> str:
         return self.title
+
+
+class CourseImportJob(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        COMPLETED = "COMPLETED", "Completed"
+        FAILED = "FAILED", "Failed"
+
+    publisher = models.ForeignKey(get_user_model(), related_name="course_import_jobs", on_delete=models.CASCADE)
+    archive = models.FileField(upload_to="course_imports/", blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    total_files = models.PositiveIntegerField(default=0)
+    processed_files = models.PositiveIntegerField(default=0)
+    imported_courses = models.PositiveIntegerField(default=0)
+    failures = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        verbose_name = "Course Import Job"
+        verbose_name_plural = "Course Import Jobs"
+
+    def __str__(self) -> str:
+        return f"Import by {self.publisher.username} on {self.created_at} - {self.get_status_display()}"
+
+    @property
+    def is_finished(self):
+        return self.status in {self.Status.COMPLETED, self.Status.FAILED}
+
+    @property
+    def progress_percent(self):
+        if not self.total_files:
+            return 100 if self.is_finished else 0
+        return round(self.processed_files / self.total_files * 100)
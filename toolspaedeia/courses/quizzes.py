@@ -1,6 +1,13 @@
+from collections import Counter
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
 from django.utils.safestring import mark_safe
 
 from courses.markdown import markdown_to_html
+from courses.models import AnswerStatistics
+from courses.models import QuestionStatistics
 
 
 def build_fresh_answers_data(question):
@@ -50,18 +57,35 @@ def get_answers_in_display_order(question, posted_answer_ids):
     return list(question.get_answers())
 
 
+def _checked_answer_data(answer, submitted_answer_ids):
+    was_selected = str(answer.id) in submitted_answer_ids
+    return {
+        "answer": answer,
+        "was_selected": was_selected,
+        "is_correct_choice": was_selected == answer.is_correct,
+    }
+
+
 def build_checked_answers_data(question, submitted_answer_ids, posted_answer_ids):
-    answers_data = []
-    for answer in get_answers_in_display_order(question, posted_answer_ids):
-        was_selected = str(answer.id) in submitted_answer_ids
-        answers_data.append(
+    return [
+        _checked_answer_data(answer, submitted_answer_ids)
+        for answer in get_answers_in_display_order(question, posted_answer_ids)
+    ]
+
+
+def grade_submission(questions, submitted_answer_ids_by_question):
+    quiz_data = []
+    for question in questions:
+        submitted_answer_ids = set(submitted_answer_ids_by_question.get(str(question.id), []))
+        quiz_data.append(
             {
-                "answer": answer,
-                "was_selected": was_selected,
-                "is_correct_choice": was_selected == answer.is_correct,
+                "question": question,
+                "answers_data": [
+                    _checked_answer_data(answer, submitted_answer_ids) for answer in question.answers.all()
+                ],
             }
         )
-    return answers_data
+    return quiz_data
 
 
 def calculate_final_grade(quiz_data):
@@ -70,3 +94,43 @@ def calculate_final_grade(quiz_data):
         return 0
     correct = sum(1 for a in all_answers if a["is_correct_choice"])
     return round(correct / len(all_answers) * 100, 2)
+
+
+def _increment_counters(model, key_field, counter_field, counts):
+    ids_by_increment = defaultdict(list)
+    for object_id, increment in counts.items():
+        if increment:
+            ids_by_increment[increment].append(object_id)
+
+    for increment, object_ids in ids_by_increment.items():
+        model.objects.filter(**{f"{key_field}__in": object_ids}).update(**{counter_field: F(counter_field) + increment})
+
+
+def record_quiz_statistics(graded_quizzes):
+    times_shown = Counter()
+    times_correct = Counter()
+    times_selected = Counter()
+
+    for quiz_data in graded_quizzes:
+        for item in quiz_data:
+            question_id = item["question"].id
+            times_shown[question_id] += 1
+            times_correct[question_id] += all(a["is_correct_choice"] for a in item["answers_data"])
+            for answer_data in item["answers_data"]:
+                times_selected[answer_data["answer"].id] += answer_data["was_selected"]
+
+    if not times_shown:
+        return
+
+    with transaction.atomic():
+        QuestionStatistics.objects.bulk_create(
+            [QuestionStatistics(question_id=question_id) for question_id in times_shown],
+            ignore_conflicts=True,
+        )
+        AnswerStatistics.objects.bulk_create(
+            [AnswerStatistics(answer_id=answer_id) for answer_id in times_selected],
+            ignore_conflicts=True,
+        )
+        _increment_counters(QuestionStatistics, "question_id", "times_shown", times_shown)
+        _increment_counters(QuestionStatistics, "question_id", "times_correct", times_correct)
+        _increment_counters(AnswerStatistics, "answer_id", "times_selected", times_selected)
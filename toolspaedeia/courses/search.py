@@ -0,0 +1,120 @@
+import logging
+from functools import lru_cache
+from itertools import batched
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from courses.models import Course
+from courses.suggestions import course_chunk_text
+from courses.suggestions import encode_texts
+from courses.suggestions import module_embedding_matrix
+from courses.suggestions import modules_by_course
+
+COURSE_SEARCH_IDS_FILENAME = "course_ids.npy"
+COURSE_SEARCH_VECTORS_FILENAME = "course_vectors.npy"
+SEMANTIC_SEARCH_TOP_K = 50
+SEMANTIC_LEXICAL_CANDIDATES = 200
+SEMANTIC_MIN_SIMILARITY = 0.3
+SEMANTIC_WEIGHT = 0.7
+LEXICAL_WEIGHT = 0.3
+
+logger = logging.getLogger(__name__)
+
+
+def course_embedding_matrix(courses):
+    grouped_modules = modules_by_course(courses)
+    header_embeddings = encode_texts([course_chunk_text(course) for course in courses])
+    module_embeddings = module_embedding_matrix(courses, grouped_modules)
+
+    course_embeddings = header_embeddings.copy()
+    module_row = 0
+    for position, course in enumerate(courses):
+        module_count = len(grouped_modules[course.pk])
+        if module_count:
+            course_embeddings[position] += module_embeddings[module_row : module_row + module_count].sum(axis=0)
+            course_embeddings[position] /= module_count + 1
+        module_row += module_count
+
+    norms = np.linalg.norm(course_embeddings, axis=1, keepdims=True)
+    return course_embeddings / np.where(norms == 0, 1, norms)
+
+
+def build_course_search_index(directory, batch_size=256):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    course_ids = np.fromiter(
+        Course.objects.filter(is_draft=False).order_by("pk").values_list("pk", flat=True), dtype=np.int64
+    )
+
+    vectors_path = directory / f"{COURSE_SEARCH_VECTORS_FILENAME}.tmp"
+    vectors = None
+    for block_start, block_ids in zip(
+        range(0, len(course_ids), batch_size), batched(course_ids.tolist(), batch_size, strict=False), strict=True
+    ):
+        courses = list(Course.objects.filter(pk__in=block_ids).order_by("pk"))
+        block_vectors = course_embedding_matrix(courses)
+        if vectors is None:
+            vectors = np.lib.format.open_memmap(
+                vectors_path, mode="w+", dtype=np.float32, shape=(len(course_ids), block_vectors.shape[1])
+            )
+        vectors[block_start : block_start + len(courses)] = block_vectors
+    if vectors is None:
+        with vectors_path.open("wb") as vectors_file:
+            np.save(vectors_file, np.empty((0, 0), dtype=np.float32))
+    else:
+        vectors.flush()
+        del vectors
+
+    ids_path = directory / f"{COURSE_SEARCH_IDS_FILENAME}.tmp"
+    with ids_path.open("wb") as ids_file:
+        np.save(ids_file, course_ids)
+    vectors_path.replace(directory / COURSE_SEARCH_VECTORS_FILENAME)
+    ids_path.replace(directory / COURSE_SEARCH_IDS_FILENAME)
+    return len(course_ids)
+
+
+@lru_cache(maxsize=1)
+def _load_course_search_index(directory, modified_ns):  # noqa: ARG001
+    course_ids = np.load(Path(directory) / COURSE_SEARCH_IDS_FILENAME)
+    vectors = np.load(Path(directory) / COURSE_SEARCH_VECTORS_FILENAME, mmap_mode="r")
+    if len(course_ids) != len(vectors):
+        return None
+    return course_ids, vectors
+
+
+def course_search_index():
+    directory = Path(settings.COURSE_SEARCH_INDEX_DIR)
+    try:
+        modified_ns = (directory / COURSE_SEARCH_IDS_FILENAME).stat().st_mtime_ns
+        return _load_course_search_index(str(directory), modified_ns)
+    except FileNotFoundError:
+        return None
+
+
+def rank_courses_semantically(query, lexical_course_ids, top_k=SEMANTIC_SEARCH_TOP_K):
+    index = course_search_index()
+    if index is None or not len(index[0]):
+        return None
+    course_ids, vectors = index
+    try:
+        query_embedding = encode_texts([query])[0]
+    except OSError:
+        logger.exception("Could not encode search query, falling back to lexical search")
+        return None
+
+    similarities = vectors @ query_embedding
+    top_k = min(top_k, len(similarities))
+    scores = {}
+    for row in np.argpartition(similarities, -top_k)[-top_k:]:
+        if similarities[row] >= SEMANTIC_MIN_SIMILARITY:
+            scores[int(course_ids[row])] = SEMANTIC_WEIGHT * float(similarities[row])
+
+    lexical_course_ids = np.fromiter(lexical_course_ids, dtype=np.int64)
+    rows = np.minimum(np.searchsorted(course_ids, lexical_course_ids), len(course_ids) - 1)
+    for course_id, row in zip(lexical_course_ids.tolist(), rows.tolist(), strict=True):
+        similarity = float(similarities[row]) if course_ids[row] == course_id else 0.0
+        scores[course_id] = LEXICAL_WEIGHT + SEMANTIC_WEIGHT * similarity
+
+    return sorted(scores, key=lambda course_id: (-scores[course_id], course_id))
@@ -1,35 +1,298 @@
+import hashlib
+import importlib.util
+import logging
 import operator
 from functools import cache
+from functools import lru_cache
 
-from sentence_transformers import SentenceTransformer
-from sentence_transformers.util import cos_sim
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
 
+from courses.chunking import MAX_WINDOW_TOKENS
+from courses.chunking import WINDOW_OVERLAP_TOKENS
+from courses.chunking import WORDPIECE_CHARS
+from courses.chunking import split_into_windows
+from courses.embedding_service import EmbeddingServiceError
+from courses.embedding_service import encode_via_service
+from courses.lexical import BM25_REFERENCE_LENGTH
+from courses.lexical import LexicalTagIndex
 from courses.models import CourseTag
+from courses.models import CourseTagEmbedding
+from courses.models import Module
+from courses.models import ModuleEmbedding
+from courses.models import TagSuggestionResult
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/paraphrase-MiniLM-L3-v2"
+EMBEDDING_ONNX_FILE_NAME = "onnx/model_qint8_avx2.onnx"
+EMBEDDING_INFERENCE_MODES = ("float32", "int8", "onnx")
+SUGGESTION_BACKENDS = ("embedding", "bm25")
+SCORE_BLOCK_TAGS = 1024
+SUGGESTION_MIN_SCORE = 0.2
+SUGGESTION_POOLING = "max"
+EMBEDDING_BATCH_WINDOWS = 64
+CHUNKING_FINGERPRINT = f"token-windows:{MAX_WINDOW_TOKENS}:{WINDOW_OVERLAP_TOKENS}:{WORDPIECE_CHARS}"
+POOLING_REDUCERS = {
+    "max": np.maximum,
+    "mean": np.add,
+}
+
+logger = logging.getLogger(__name__)
 
 
 @cache
-def embedding_model():
-    return SentenceTransformer("sentence-transformers/paraphrase-MiniLM-L3-v2")
+def embedding_model(inference=None):
+    from sentence_transformers import SentenceTransformer  # noqa: PLC0415
 
+    inference = inference or settings.EMBEDDING_INFERENCE
+    model_path = settings.EMBEDDING_MODEL_PATH or EMBEDDING_MODEL_NAME
+    load_options = {"device": "cpu", "local_files_only": bool(settings.EMBEDDING_MODEL_PATH)}
+    if inference == "onnx":
+        if importlib.util.find_spec("onnxruntime") is None or importlib.util.find_spec("optimum") is None:
+            msg = "EMBEDDING_INFERENCE = 'onnx' requires the onnxruntime and optimum packages."
+            raise ImproperlyConfigured(msg)
+        return SentenceTransformer(
+            model_path, backend="onnx", model_kwargs={"file_name": EMBEDDING_ONNX_FILE_NAME}, **load_options
+        )
 
-def suggest_tags(course, min_score: float = 0.2) -> list[tuple]:
-    all_tags = list(CourseTag.objects.all())
-    if not all_tags:
-        return []
+    model = SentenceTransformer(model_path, **load_options)
+    if inference == "int8":
+        import torch  # noqa: PLC0415
+
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def embedding_model_label():
+    inference = settings.EMBEDDING_INFERENCE
+    return EMBEDDING_MODEL_NAME if inference == "float32" else f"{EMBEDDING_MODEL_NAME}:{inference}"
+
+
+def encode_texts(texts):
+    socket_path = settings.EMBEDDING_SERVICE_SOCKET
+    if socket_path:
+        try:
+            return encode_via_service(socket_path, texts)
+        except (OSError, EmbeddingServiceError) as exc:
+            logger.warning("Embedding service at %s is unavailable, encoding in process: %s", socket_path, exc)
+    return encode_texts_locally(texts)
+
+
+def encode_texts_locally(texts):
+    embeddings = embedding_model().encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def encode_windowed_texts(texts):
+    window_owners = []
+    windows = []
+    for position, text in enumerate(texts):
+        text_windows = split_into_windows(text) or [text]
+        window_owners.extend([position] * len(text_windows))
+        windows.extend(text_windows)
+
+    pooled = None
+    for start in range(0, len(windows), EMBEDDING_BATCH_WINDOWS):
+        batch_vectors = encode_texts(windows[start : start + EMBEDDING_BATCH_WINDOWS])
+        if pooled is None:
+            pooled = np.zeros((len(texts), batch_vectors.shape[1]), dtype=np.float32)
+        np.add.at(pooled, window_owners[start : start + EMBEDDING_BATCH_WINDOWS], batch_vectors)
+
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return pooled / np.where(norms == 0, 1, norms)
 
-    modules = [f"{module.title}\n{module.description}\n\n{module.content}" for module in course.modules.all()]
 
-    course_chunks = [
-        f"{course.name}\n{course.description}",
-        *modules,
+def _cached_embedding_matrix(embeddings, owner_field, fingerprint_field, entries, encode=encode_texts):
+    cached_embeddings = {
+        owner_id: (fingerprint, vector)
+        for owner_id, fingerprint, vector in embeddings.filter(model_name=embedding_model_label()).values_list(
+            f"{owner_field}_id", fingerprint_field, "vector"
+        )
+    }
+
+    stale_entries = [
+        (owner, fingerprint, text)
+        for owner, fingerprint, text in entries
+        if owner.pk not in cached_embeddings or cached_embeddings[owner.pk][0] != fingerprint
     ]
+    if stale_entries:
+        stale_vectors = encode([text for _, _, text in stale_entries])
+        with transaction.atomic():
+            embeddings.model.objects.filter(**{f"{owner_field}__in": [owner for owner, _, _ in stale_entries]}).delete()
+            embeddings.model.objects.bulk_create(
+                [
+                    embeddings.model(
+                        **{owner_field: owner, fingerprint_field: fingerprint},
+                        model_name=embedding_model_label(),
+                        vector=vector.tobytes(),
+                    )
+                    for (owner, fingerprint, _), vector in zip(stale_entries, stale_vectors, strict=True)
+                ]
+            )
+        for (owner, fingerprint, _), vector in zip(stale_entries, stale_vectors, strict=True):
+            cached_embeddings[owner.pk] = (fingerprint, vector.tobytes())
+
+    matrix = np.frombuffer(b"".join(bytes(cached_embeddings[owner.pk][1]) for owner, _, _ in entries), dtype=np.float32)
+    return matrix.reshape(len(entries), -1)
+
+
+def tag_embedding_matrix():
+    all_tags = list(CourseTag.objects.order_by("name"))
+    if not all_tags:
+        return all_tags, None
+
+    entries = [(tag, tag.name, tag.name) for tag in all_tags]
+    return all_tags, _cached_embedding_matrix(CourseTagEmbedding.objects.all(), "tag", "name", entries)
+
+
+def course_chunk_text(course):
+    return f"{course.name}\n{course.description}"
+
+
+def module_chunk_text(module):
+    return f"{module.title}\n{module.description}\n\n{module.content}"
+
+
+def module_content_hash(chunk):
+    return hashlib.sha256(f"{CHUNKING_FINGERPRINT}\0{chunk}".encode()).hexdigest()
+
+
+def modules_by_course(courses):
+    grouped_modules = {course.pk: [] for course in courses}
+    for module in Module.objects.filter(course__in=courses).order_by("course_id", "order", "pk"):
+        grouped_modules[module.course_id].append(module)
+    return grouped_modules
 
-    tag_names = [tag.name for tag in all_tags]
 
-    course_embedding = embedding_model().encode(course_chunks, convert_to_tensor=True)
-    tag_embeddings = embedding_model().encode(tag_names, convert_to_tensor=True)
+def module_embedding_matrix(courses, grouped_modules):
+    entries = []
+    for course in courses:
+        for module in grouped_modules[course.pk]:
+            chunk = module_chunk_text(module)
+            entries.append((module, module_content_hash(chunk), chunk))
+    if not entries:
+        return None
 
-    scores = cos_sim(course_embedding, tag_embeddings)[0]
+    return _cached_embedding_matrix(
+        ModuleEmbedding.objects.filter(module__course__in=courses),
+        "module",
+        "content_hash",
+        entries,
+        encode=encode_windowed_texts,
+    )
 
+
+@lru_cache(maxsize=1)
+def lexical_tag_index(tag_items):
+    all_tags = [CourseTag(pk=tag_id, name=name) for tag_id, name in tag_items]
+    return all_tags, LexicalTagIndex([name for _, name in tag_items]) if all_tags else None
+
+
+def tag_index(backend=None):
+    backend = backend or settings.TAG_SUGGESTION_BACKEND
+    if backend != "bm25":
+        return tag_embedding_matrix()
+
+    return lexical_tag_index(tuple(CourseTag.objects.order_by("name").values_list("pk", "name")))
+
+
+def _chunk_score_blocks(courses, tag_scorer, grouped_modules):
+    if isinstance(tag_scorer, LexicalTagIndex):
+        chunk_texts = []
+        for course in courses:
+            chunk_texts.append(course_chunk_text(course))
+            chunk_texts.extend(module_chunk_text(module) for module in grouped_modules[course.pk])
+        yield 0, tag_scorer.score(chunk_texts)
+        return
+
+    header_embeddings = encode_texts([course_chunk_text(course) for course in courses])
+    module_embeddings = module_embedding_matrix(courses, grouped_modules)
+
+    row_order = []
+    module_row = len(courses)
+    for course_position, course in enumerate(courses):
+        row_order.append(course_position)
+        module_count = len(grouped_modules[course.pk])
+        row_order.extend(range(module_row, module_row + module_count))
+        module_row += module_count
+
+    chunk_embeddings = (
+        header_embeddings if module_embeddings is None else np.vstack([header_embeddings, module_embeddings])
+    )
+    chunk_embeddings = chunk_embeddings[row_order]
+    for start in range(0, len(tag_scorer), SCORE_BLOCK_TAGS):
+        yield start, tag_scorer[start : start + SCORE_BLOCK_TAGS] @ chunk_embeddings.T
+
+
+def score_courses(courses, tag_scorer, pooling="max", grouped_modules=None):
+    grouped_modules = modules_by_course(courses) if grouped_modules is None else grouped_modules
+    offsets = []
+    chunk_count = 0
+    for course in courses:
+        offsets.append(chunk_count)
+        chunk_count += 1 + len(grouped_modules[course.pk])
+
+    course_scores = np.empty((len(tag_scorer), len(courses)), dtype=np.float32)
+    for start, block_scores in _chunk_score_blocks(courses, tag_scorer, grouped_modules):
+        course_scores[start : start + len(block_scores)] = POOLING_REDUCERS[pooling].reduceat(
+            block_scores, offsets, axis=1
+        )
+    if pooling == "mean":
+        course_scores /= np.diff([*offsets, chunk_count])
+    return course_scores
+
+
+def rank_tag_scores(all_tags, scores, min_score):
     results = [(all_tags[i], float(scores[i])) for i in range(len(all_tags)) if float(scores[i]) >= min_score]
     return sorted(results, key=operator.itemgetter(1), reverse=True)
+
+
+def suggest_tags(
+    course, min_score: float = SUGGESTION_MIN_SCORE, pooling: str = SUGGESTION_POOLING, backend: str | None = None
+) -> list[tuple]:
+    all_tags, tag_scorer = tag_index(backend)
+    if not all_tags:
+        return []
+
+    scores = score_courses([course], tag_scorer, pooling)[:, 0]
+    return rank_tag_scores(all_tags, scores, min_score)
+
+
+def course_revision(course, modules=None, tag_items=None):
+    modules = course.modules.all() if modules is None else modules
+    if tag_items is None:
+        tag_items = CourseTag.objects.values_list("pk", "name")
+
+    if settings.TAG_SUGGESTION_BACKEND == "bm25":
+        digest = hashlib.sha256(f"bm25:{BM25_REFERENCE_LENGTH}".encode())
+    else:
+        digest = hashlib.sha256(f"{embedding_model_label()}\0{CHUNKING_FINGERPRINT}".encode())
+    digest.update(course_chunk_text(course).encode())
+    for module in sorted(modules, key=operator.attrgetter("pk")):
+        digest.update(f"\0{module.pk}\0{module_chunk_text(module)}".encode())
+    for tag_id, tag_name in sorted(tag_items):
+        digest.update(f"\0{tag_id}:{tag_name}".encode())
+    return digest.hexdigest()
+
+
+def store_tag_suggestions(course, revision, suggestions):
+    TagSuggestionResult.objects.filter(course=course).exclude(revision=revision).delete()
+    TagSuggestionResult.objects.update_or_create(
+        course=course,
+        revision=revision,
+        defaults={"suggestions": [{"tag_id": tag.pk, "score": score} for tag, score in suggestions]},
+    )
+
+
+def cached_tag_suggestions(course, revision):
+    result = TagSuggestionResult.objects.filter(course=course, revision=revision).first()
+    if result is None:
+        return None
+
+    tags = CourseTag.objects.in_bulk([suggestion["tag_id"] for suggestion in result.suggestions])
+    return [
+        (tags[suggestion["tag_id"]], suggestion["score"])
+        for suggestion in result.suggestions
+        if suggestion["tag_id"] in tags
+    ]
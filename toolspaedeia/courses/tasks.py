@@ -0,0 +1,23 @@
+from django.tasks import task
+
+from courses.import_export import import_course_archive
+from courses.models import Course
+from courses.models import CourseImportJob
+from courses.suggestions import course_revision
+from courses.suggestions import store_tag_suggestions
+from courses.suggestions import suggest_tags
+
+
+@task
+def import_course_archive_task(job_id):
+    job = CourseImportJob.objects.get(pk=job_id)
+    import_course_archive(job)
+    return job.status
+
+
+@task
+def suggest_course_tags_task(course_id):
+    course = Course.objects.get(pk=course_id)
+    revision = course_revision(course)
+    store_tag_suggestions(course, revision, suggest_tags(course))
+    return revision
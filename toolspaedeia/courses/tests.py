@@ -1,20 +1,85 @@
+import io
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
 import tempfile
-
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
 from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError
+from django.db import connection
+from django.tasks import TaskResultStatus
+from django.test import SimpleTestCase
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.test.utils import override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django_webtest import WebTest
 
+from courses.chunking import count_tokens
+from courses.chunking import split_into_windows
+from courses.duplicates import LSH_BANDS
+from courses.embedding_service import FRAME_HEADER
+from courses.embedding_service import EmbeddingRequestError
+from courses.embedding_service import EmbeddingServer
+from courses.embedding_service import encode_via_service
+from courses.import_export import create_course_from_bundle
+from courses.import_export import create_course_from_import
+from courses.import_export import export_course_to_import_markdown
+from courses.import_export import import_course_archive
+from courses.import_export import iter_course_bundle
+from courses.import_export import iter_course_import_markdown
+from courses.import_export import parse_course_import
+from courses.import_export import update_course_from_import
+from courses.management.commands.benchmark_course_import import build_synthetic_course_markdown
+from courses.markdown import markdown_to_html
 from courses.models import Answer
+from courses.models import AnswerStatistics
 from courses.models import Course
+from courses.models import CourseImportJob
+from courses.models import CourseNearDuplicate
+from courses.models import CourseSignatureBand
 from courses.models import CourseTag
+from courses.models import CourseTagEmbedding
 from courses.models import Module
+from courses.models import ModuleEmbedding
 from courses.models import ModuleProgression
 from courses.models import Question
+from courses.models import QuestionStatistics
 from courses.models import Quiz
+from courses.models import QuizAttempt
 from courses.models import Resource
+from courses.models import TagSuggestionResult
+from courses.search import course_search_index
+from courses.search import rank_courses_semantically
+from courses.suggestions import EMBEDDING_BATCH_WINDOWS
+from courses.suggestions import cached_tag_suggestions
+from courses.suggestions import course_revision
+from courses.suggestions import embedding_model
+from courses.suggestions import embedding_model_label
+from courses.suggestions import encode_texts
+from courses.suggestions import suggest_tags
+from courses.suggestions import tag_index
 from purchases.models import Purchase
+from taskqueue.models import QueuedTask
+from taskqueue.worker import run_worker
 from users.models import UserSitePreferences
 
 
@@ -362,6 +427,210 @@ class HtmxViewIntegrationTests(CoursesWebTestBase):
         self.assertEqual(resp.status_code, 404)
 
 
+class CourseAdminDownloadTests(CoursesWebTestBase):
+    def test_download_streams_course_markdown(self):
+        self.publisher.is_staff = True
+        self.publisher.is_superuser = True
+        self.publisher.save()
+
+        self.app.set_user(self.publisher.username)
+        response = self.app.get(reverse("admin:courses_download", args=[self.course.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('filename="integration-course.md"', response.headers["Content-Disposition"])
+        self.assertEqual(response.text, export_course_to_import_markdown(self.course))
+
+
+class QuizStatisticsIntegrationTests(CoursesWebTestBase):
+    def setUp(self):
+        super().setUp()
+        self.attempt_url = reverse(
+            "courses:attempt_quiz", kwargs={"course_id": self.course.id, "quiz_id": self.quiz.id}
+        )
+        self.statistics_url = reverse(
+            "courses:quiz_statistics", kwargs={"course_id": self.course.id, "quiz_id": self.quiz.id}
+        )
+
+    def submit_answer(self, answer):
+        return self.app.post(
+            self.attempt_url,
+            params={
+                "question_ids": [str(self.question.id)],
+                f"answer_ids_{self.question.id}": [str(self.correct_answer.id), str(self.wrong_answer.id)],
+                f"question-{self.question.id}": [str(answer.id)],
+            },
+        )
+
+    def test_attempts_update_question_and_answer_counters(self):
+        self.login_through_form()
+        self.submit_answer(self.correct_answer)
+        self.submit_answer(self.wrong_answer)
+        self.submit_answer(self.wrong_answer)
+
+        question_statistics = QuestionStatistics.objects.get(question=self.question)
+        self.assertEqual(question_statistics.times_shown, 3)
+        self.assertEqual(question_statistics.times_correct, 1)
+        self.assertEqual(question_statistics.correct_rate, 33.33)
+        self.assertEqual(AnswerStatistics.objects.get(answer=self.correct_answer).times_selected, 1)
+        self.assertEqual(AnswerStatistics.objects.get(answer=self.wrong_answer).times_selected, 2)
+
+    def test_publisher_attempts_are_not_counted(self):
+        self.app.set_user(self.publisher.username)
+        self.submit_answer(self.correct_answer)
+
+        self.assertFalse(QuestionStatistics.objects.filter(question=self.question).exists())
+
+    def test_statistics_page_shows_counters_to_publisher(self):
+        QuestionStatistics.objects.create(question=self.question, times_shown=4, times_correct=1)
+        AnswerStatistics.objects.create(answer=self.wrong_answer, times_selected=3)
+
+        self.app.set_user(self.publisher.username)
+        response = self.app.get(self.statistics_url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("1 of 4 answered correctly (25.00%)", response.text)
+        self.assertIn("(75.00%)", response.text)
+
+    def test_statistics_page_query_count_does_not_grow_with_questions(self):
+        self.app.set_user(self.publisher.username)
+        self.app.get(self.statistics_url)
+        with CaptureQueriesContext(connection) as single_question_queries:
+            self.app.get(self.statistics_url)
+
+        for order in range(2, 12):
+            question = Question.objects.create(quiz=self.quiz, text=f"Question {order}", order=order)
+            Answer.objects.create(question=question, text="Yes", is_correct=True)
+            QuestionStatistics.objects.create(question=question, times_shown=10, times_correct=order)
+
+        with CaptureQueriesContext(connection) as many_questions_queries:
+            self.app.get(self.statistics_url)
+
+        self.assertEqual(len(single_question_queries), len(many_questions_queries))
+
+    def test_statistics_page_forbidden_for_students(self):
+        self.login_through_form()
+        response = self.app.get(self.statistics_url, expect_errors=True)
+
+        self.assertEqual(response.status_code, 404)
+
+
+class QuizSyncIntegrationTests(CoursesWebTestBase):
+    def sync(self, submissions, **kwargs):
+        return self.app.post(
+            reverse("courses:quiz_sync"),
+            params=json.dumps({"submissions": submissions}),
+            content_type="application/json",
+            **kwargs,
+        )
+
+    def submission(self, client_id, answer, quiz=None, course=None):
+        quiz = quiz or self.quiz
+        course = course or self.course
+        return {
+            "client_id": client_id,
+            "course_id": course.id,
+            "quiz_id": quiz.id,
+            "question_ids": [self.question.id],
+            "selected_answer_ids": {str(self.question.id): [answer.id]},
+        }
+
+    def test_sync_grades_submissions_in_one_request(self):
+        self.app.set_user(self.student.username)
+        response = self.sync(
+            [
+                self.submission("first", self.correct_answer),
+                self.submission("second", self.wrong_answer),
+            ]
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json["results"],
+            [
+                {"client_id": "first", "status": "graded", "grade": 100.0},
+                {"client_id": "second", "status": "graded", "grade": 0.0},
+            ],
+        )
+        self.assertEqual(QuizAttempt.objects.filter(user=self.student, quiz=self.quiz).count(), 2)
+        self.assertEqual(QuestionStatistics.objects.get(question=self.question).times_shown, 2)
+
+    def test_sync_query_count_does_not_grow_with_submissions(self):
+        self.app.set_user(self.student.username)
+        self.sync([self.submission("warmup", self.correct_answer)])
+
+        with CaptureQueriesContext(connection) as single_submission_queries:
+            self.sync([self.submission("single", self.correct_answer)])
+        with CaptureQueriesContext(connection) as many_submission_queries:
+            self.sync([self.submission(f"many-{index}", self.correct_answer) for index in range(20)])
+
+        self.assertEqual(len(single_submission_queries), len(many_submission_queries))
+
+    def test_sync_reports_per_submission_failures(self):
+        other_quiz = Quiz.objects.create(module=self.module_intro, title="Other", description="Other quiz")
+        self.app.set_user(self.student.username)
+        response = self.sync(
+            [
+                self.submission("wrong-course", self.correct_answer, course=self.bug_course),
+                self.submission("foreign-question", self.correct_answer, quiz=other_quiz),
+                {"client_id": "malformed", "quiz_id": "abc"},
+                self.submission("ok", self.correct_answer),
+            ]
+        )
+
+        statuses = {result["client_id"]: result["status"] for result in response.json["results"]}
+        self.assertEqual(
+            statuses,
+            {"wrong-course": "not_found", "foreign-question": "invalid", "malformed": "invalid", "ok": "graded"},
+        )
+
+    def test_sync_forbidden_without_purchase(self):
+        outsider = get_user_model().objects.create_user(username="outsider", password="outsider-pass")  # noqa: S106
+        self.app.set_user(outsider.username)
+        response = self.sync([self.submission("blocked", self.correct_answer)])
+
+        self.assertEqual(response.json["results"], [{"client_id": "blocked", "status": "forbidden"}])
+        self.assertFalse(QuizAttempt.objects.exists())
+
+    def test_sync_respects_max_attempts_across_batch(self):
+        self.quiz.max_attempts = 1
+        self.quiz.save()
+
+        self.app.set_user(self.student.username)
+        response = self.sync(
+            [
+                self.submission("first", self.correct_answer),
+                self.submission("second", self.correct_answer),
+            ]
+        )
+
+        statuses = [result["status"] for result in response.json["results"]]
+        self.assertEqual(statuses, ["graded", "max_attempts_reached"])
+        self.assertEqual(QuizAttempt.objects.filter(user=self.student).count(), 1)
+
+    def test_publisher_preview_is_not_limited_by_max_attempts(self):
+        self.quiz.max_attempts = 1
+        self.quiz.save()
+
+        self.app.set_user(self.publisher.username)
+        response = self.sync(
+            [
+                self.submission("first", self.correct_answer),
+                self.submission("second", self.correct_answer),
+            ]
+        )
+
+        statuses = [result["status"] for result in response.json["results"]]
+        self.assertEqual(statuses, ["graded", "graded"])
+
+    def test_sync_rejects_malformed_body(self):
+        self.app.set_user(self.student.username)
+        response = self.app.post(
+            reverse("courses:quiz_sync"), params="not json", content_type="application/json", expect_errors=True
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+
 @override_settings(MEDIA_ROOT=tempfile.mkdtemp())
 class ResourceIntegrationTests(CoursesWebTestBase):
     def _attach_resource(self, module, title="Handout", filename="handout.pdf"):
@@ -536,3 +805,1053 @@ class CourseRecommendationsListViewTests(CoursesWebTestBase):
                 course_count += 1
 
         self.assertLessEqual(course_count, 5)
+
+
+class CourseImportExportTests(TestCase):
+    def setUp(self):
+        self.publisher = get_user_model().objects.create_user(username="publisher", password="publisher-pass")  # noqa: S106
+        self.course = Course.objects.create(name="Exported Course", description="Course description")
+        module = Module.objects.create(
+            course=self.course, title="Basics", description="First module", content="# Héllo\n\nSome `code`.", order=1
+        )
+        Module.objects.create(course=self.course, title="No Quiz", description="Plain", content="Text", order=2)
+        quiz = Quiz.objects.create(module=module, title="Check", description="Quick check")
+        question = Question.objects.create(quiz=quiz, text="Pick the *right* one", order=1)
+        Answer.objects.create(question=question, text="Right", is_correct=True)
+        Answer.objects.create(question=question, text="Wrong", is_correct=False)
+
+    def test_export_then_import_round_trips_course_tree(self):
+        markdown = export_course_to_import_markdown(self.course)
+        imported_course = create_course_from_import(markdown, self.publisher)
+
+        self.assertEqual(imported_course.publisher, self.publisher)
+        self.assertEqual(export_course_to_import_markdown(imported_course), markdown)
+
+    def test_import_reads_uploaded_file_incrementally(self):
+        markdown = export_course_to_import_markdown(self.course).encode("utf-8")
+        uploaded_file = SimpleUploadedFile("course.md", markdown)
+
+        imported_course = create_course_from_import(uploaded_file, self.publisher)
+
+        self.assertEqual(imported_course.modules.get(title="Basics").content, "# Héllo\n\nSome `code`.")
+
+    def test_import_accepts_chunks_split_inside_characters_and_tags(self):
+        markdown = export_course_to_import_markdown(self.course).encode("utf-8")
+        chunks = [markdown[index : index + 7] for index in range(0, len(markdown), 7)]
+
+        course, module_quiz_pairs = parse_course_import(chunks)
+
+        self.assertEqual(course.name, "Exported Course")
+        self.assertEqual(module_quiz_pairs[0][0].content, "# Héllo\n\nSome `code`.")
+
+    def test_leaf_blocks_keep_tag_like_text_verbatim(self):
+        course, module_quiz_pairs = parse_course_import(
+            "@start name\nCourse\n@end name\n"
+            "@start module\n@start content\nUse @start module and @end module literally.\n@end content\n@end module\n"
+        )
+
+        self.assertEqual(course.name, "Course")
+        self.assertEqual(module_quiz_pairs[0][0].content, "Use @start module and @end module literally.")
+
+    def test_unclosed_block_reports_line_and_column(self):
+        markdown = "@start module\n@start title\nTitle\n@end title\n  @start quiz\n@end module\n"
+        with self.assertRaisesMessage(ValueError, "Unclosed @start quiz block at line 5, column 3."):
+            parse_course_import(markdown)
+
+    def test_invalid_utf8_raises_decode_error(self):
+        with self.assertRaises(UnicodeDecodeError):
+            parse_course_import([b"@start name\n", b"\xff\xfe\n"])
+
+    def test_import_query_count_does_not_grow_with_course_size(self):
+        small_course = build_synthetic_course_markdown(1, 1, 1)
+        large_course = build_synthetic_course_markdown(12, 5, 4)
+
+        with CaptureQueriesContext(connection) as small_course_queries:
+            create_course_from_import(small_course, self.publisher)
+        with CaptureQueriesContext(connection) as large_course_queries:
+            course = create_course_from_import(large_course, self.publisher)
+
+        self.assertEqual(len(small_course_queries), len(large_course_queries))
+        self.assertEqual(list(course.modules.values_list("order", flat=True)), list(range(1, 13)))
+        self.assertEqual(Answer.objects.filter(question__quiz__module__course=course).count(), 240)
+
+    def test_import_without_returned_primary_keys_matches_rows_back(self):
+        markdown = build_synthetic_course_markdown(3, 2, 2)
+        returned_pks_course = create_course_from_import(markdown, self.publisher)
+        with patch.object(type(connection.features), "can_return_rows_from_bulk_insert", new=False):
+            matched_pks_course = create_course_from_import(markdown, self.publisher)
+
+        self.assertEqual(
+            export_course_to_import_markdown(matched_pks_course),
+            export_course_to_import_markdown(returned_pks_course),
+        )
+
+    def test_export_query_count_does_not_grow_with_course_size(self):
+        large_course = create_course_from_import(build_synthetic_course_markdown(12, 5, 4), self.publisher)
+
+        with CaptureQueriesContext(connection) as small_course_queries:
+            export_course_to_import_markdown(self.course)
+        with CaptureQueriesContext(connection) as large_course_queries:
+            export_course_to_import_markdown(large_course)
+
+        self.assertEqual(len(small_course_queries), len(large_course_queries))
+
+    def test_export_streams_document_in_chunks(self):
+        chunks = list(iter_course_import_markdown(self.course))
+
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), export_course_to_import_markdown(self.course))
+        self.assertIn("@start is_correct\ntrue\n@end is_correct", "".join(chunks))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class CourseArchiveImportTests(TestCase):
+    def setUp(self):
+        self.publisher = get_user_model().objects.create_user(username="publisher", password="publisher-pass")  # noqa: S106
+
+    def build_archive(self, files):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+        return ContentFile(buffer.getvalue(), name="courses.zip")
+
+    def create_job(self, files):
+        return CourseImportJob.objects.create(publisher=self.publisher, archive=self.build_archive(files))
+
+    def test_archive_import_creates_courses_and_collects_failures(self):
+        job = self.create_job(
+            {
+                "first.md": build_synthetic_course_markdown(2, 2, 2),
+                "second.md": build_synthetic_course_markdown(1, 0, 0),
+                "broken.md": "@start name\nBroken\n",
+                "notes/readme.rst": "ignored",
+            }
+        )
+
+        import_course_archive(job, workers=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CourseImportJob.Status.COMPLETED)
+        self.assertEqual(job.total_files, 3)
+        self.assertEqual(job.processed_files, 3)
+        self.assertEqual(job.imported_courses, 2)
+        self.assertEqual([failure["file"] for failure in job.failures], ["broken.md"])
+        self.assertEqual(Course.objects.filter(publisher=self.publisher).count(), 2)
+        self.assertFalse(job.archive)
+
+    def test_archive_import_attaches_module_resources(self):
+        job = self.create_job(
+            {
+                "course.md": build_synthetic_course_markdown(2, 1, 2),
+                "course/2/handout.pdf": b"%PDF-1.4",
+                "course/3/missing.pdf": b"%PDF-1.4",
+                "course/1/script.exe": b"MZ",
+            }
+        )
+
+        import_course_archive(job, workers=1)
+
+        job.refresh_from_db()
+        resource = Resource.objects.get()
+        self.assertEqual(resource.title, "handout")
+        self.assertEqual(resource.module.order, 2)
+        self.assertEqual(
+            sorted(failure["file"] for failure in job.failures), ["course/1/script.exe", "course/3/missing.pdf"]
+        )
+
+    def test_archive_import_parses_in_worker_processes(self):
+        job = self.create_job({f"course-{index}.md": build_synthetic_course_markdown(1, 1, 2) for index in range(3)})
+
+        import_course_archive(job, workers=2)
+
+        job.refresh_from_db()
+        self.assertEqual(job.imported_courses, 3)
+        self.assertEqual(job.progress_percent, 100)
+
+    def test_archive_members_are_read_as_parsed_courses_are_recorded(self):
+        job = self.create_job({f"course-{index}.md": build_synthetic_course_markdown(1, 1, 2) for index in range(8)})
+        progress_at_read = []
+        original_read = zipfile.ZipFile.read
+
+        def tracking_read(archive, member):
+            progress_at_read.append(CourseImportJob.objects.get(pk=job.pk).processed_files)
+            return original_read(archive, member)
+
+        with patch.object(zipfile.ZipFile, "read", tracking_read):
+            import_course_archive(job, workers=2)
+
+        self.assertEqual(progress_at_read, [0, 0, 0, 0, 1, 2, 3, 4])
+        job.refresh_from_db()
+        self.assertEqual(job.imported_courses, 8)
+
+    def test_invalid_archive_marks_job_failed(self):
+        job = CourseImportJob.objects.create(
+            publisher=self.publisher, archive=ContentFile(b"not a zip", name="courses.zip")
+        )
+
+        import_course_archive(job, workers=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CourseImportJob.Status.FAILED)
+        self.assertTrue(job.is_finished)
+
+    def test_unexpected_import_error_marks_job_failed_and_removes_archive(self):
+        job = self.create_job({"course.md": build_synthetic_course_markdown(1, 1, 2)})
+
+        with (
+            patch("courses.import_export.import_courses_from_archive", side_effect=DatabaseError("connection lost")),
+            self.assertLogs("courses.import_export", level="ERROR"),
+        ):
+            import_course_archive(job, workers=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CourseImportJob.Status.FAILED)
+        self.assertEqual(job.failures[-1]["error"], "connection lost")
+        self.assertFalse(job.archive)
+
+    def test_admin_archive_upload_runs_job_and_reports_status(self):
+        self.publisher.is_staff = True
+        self.publisher.is_superuser = True
+        self.publisher.save()
+        self.client.force_login(self.publisher)
+        archive = self.build_archive({"course.md": build_synthetic_course_markdown(1, 1, 2)})
+
+        response = self.client.post(
+            reverse("admin:courses_import_archive"),
+            {"archive_file": SimpleUploadedFile("courses.zip", archive.read())},
+        )
+
+        job = CourseImportJob.objects.get()
+        self.assertRedirects(response, reverse("admin:courses_import_job", args=[job.pk]))
+        self.assertEqual(job.status, CourseImportJob.Status.PENDING)
+        self.assertContains(self.client.get(reverse("admin:courses_import_job_status", args=[job.pk])), "hx-trigger")
+
+        run_worker("test-worker", ["default"], max_tasks=1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, CourseImportJob.Status.COMPLETED)
+        status_response = self.client.get(reverse("admin:courses_import_job_status", args=[job.pk]))
+        self.assertContains(status_response, "imported 1 courses")
+        self.assertNotContains(status_response, "hx-trigger")
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class CourseBundleTests(TestCase):
+    def setUp(self):
+        self.publisher = get_user_model().objects.create_user(username="publisher", password="publisher-pass")  # noqa: S106
+        self.course = Course.objects.create(
+            name="Bundled Course", description="Course description", publisher=self.publisher
+        )
+        Module.objects.create(course=self.course, title="Intro", description="First", content="Hello", order=1)
+        self.module = Module.objects.create(
+            course=self.course, title="Media", description="Second", content="See resource:Diagram", order=5
+        )
+        self.resource = Resource(module=self.module, title="Diagram")
+        self.resource.file.save("diagram.png", ContentFile(b"png-bytes"), save=True)
+
+    def test_bundle_round_trips_resources_and_references(self):
+        bundle = b"".join(iter_course_bundle(self.course))
+
+        imported_course = create_course_from_bundle(io.BytesIO(bundle), self.publisher)
+
+        imported_module = imported_course.modules.get(title="Media")
+        imported_resource = imported_module.resources.get()
+        self.assertEqual(imported_resource.title, "Diagram")
+        with imported_resource.file.open("rb") as imported_file:
+            self.assertEqual(imported_file.read(), b"png-bytes")
+        self.assertIn(
+            f'<img src="{imported_resource.file.url}" alt="Diagram" />',
+            markdown_to_html(imported_module.content, resources=[imported_resource]),
+        )
+
+    def test_bundle_export_streams_resource_in_chunks(self):
+        large_resource = Resource(module=self.module, title="Video")
+        large_resource.file.save("video.mp4", ContentFile(os.urandom(3 * 1024 * 1024)), save=True)
+
+        chunks = list(iter_course_bundle(self.course))
+
+        self.assertGreater(len(chunks), 3)
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as bundle:
+            self.assertEqual(len(json.loads(bundle.read("resources.json"))), 2)
+
+    def test_bundle_with_missing_resource_file_is_rejected(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as bundle:
+            bundle.writestr("course.md", export_course_to_import_markdown(self.course))
+            bundle.writestr("resources.json", json.dumps([{"module": 2, "title": "Gone", "path": "gone.png"}]))
+
+        with self.assertRaisesMessage(ValueError, "'gone.png' is missing"):
+            create_course_from_bundle(buffer, self.publisher)
+        self.assertEqual(Course.objects.count(), 1)
+
+    def test_bundle_with_malformed_manifest_is_rejected(self):
+        for manifest in ({"module": 2}, 5, ["gone.png"]):
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w") as bundle:
+                bundle.writestr("course.md", export_course_to_import_markdown(self.course))
+                bundle.writestr("resources.json", json.dumps(manifest))
+
+            with self.assertRaisesMessage(ValueError, "Invalid resources.json: expected a list"):
+                create_course_from_bundle(buffer, self.publisher)
+        self.assertEqual(Course.objects.count(), 1)
+
+    def test_admin_downloads_and_imports_bundle(self):
+        self.publisher.is_staff = True
+        self.publisher.is_superuser = True
+        self.publisher.save()
+        self.client.force_login(self.publisher)
+
+        response = self.client.get(reverse("admin:courses_download_bundle", args=[self.course.pk]))
+        self.assertIn('filename="bundled-course.zip"', response["Content-Disposition"])
+        bundle = b"".join(response.streaming_content)
+
+        response = self.client.post(
+            reverse("admin:courses_import"), {"markdown_file": SimpleUploadedFile("bundled-course.zip", bundle)}
+        )
+
+        imported_course = Course.objects.exclude(pk=self.course.pk).get()
+        self.assertRedirects(response, reverse("admin:courses_course_change", args=[imported_course.pk]))
+        self.assertEqual(Resource.objects.filter(module__course=imported_course).count(), 1)
+
+
+class CourseReimportTests(TestCase):
+    def setUp(self):
+        self.publisher = get_user_model().objects.create_user(username="publisher", password="publisher-pass")  # noqa: S106
+        self.student = get_user_model().objects.create_user(username="student", password="student-pass")  # noqa: S106
+        self.markdown = build_synthetic_course_markdown(12, 3, 3)
+        self.course = create_course_from_import(self.markdown, self.publisher)
+        self.module = self.course.modules.get(order=7)
+        ModuleProgression.objects.create(user=self.student, module=self.module, completed=True)
+        QuizAttempt.objects.create(user=self.student, quiz=self.module.quiz, grade=100)
+
+    def reimport(self, markdown):
+        with CaptureQueriesContext(connection) as queries:
+            summary = update_course_from_import(self.course, markdown)
+        writes = [query["sql"] for query in queries if query["sql"].split()[0] in {"INSERT", "UPDATE", "DELETE"}]
+        return summary, writes
+
+    def test_unchanged_reimport_issues_no_writes(self):
+        summary, writes = self.reimport(self.markdown)
+
+        self.assertEqual(summary, {"created": 0, "updated": 0, "deleted": 0})
+        self.assertEqual(writes, [])
+
+    def test_single_edited_paragraph_updates_one_row(self):
+        summary, writes = self.reimport(self.markdown.replace("# Module 7\n", "# Module 7 revised\n"))
+
+        self.assertEqual(summary, {"created": 0, "updated": 1, "deleted": 0})
+        self.assertEqual(len([sql for sql in writes if "courses_module" in sql]), 1)
+        self.module.refresh_from_db()
+        self.assertTrue(self.module.content.startswith("# Module 7 revised"))
+        self.assertTrue(self.module.progressions.get(user=self.student).completed)
+        self.assertEqual(self.module.quiz.attempts.count(), 1)
+
+    def test_inserted_module_keeps_existing_rows_and_history(self):
+        new_module = "@start module\n@start title\nWelcome\n@end title\n@start content\nHi\n@end content\n@end module"
+        name_block, description_block, modules = self.markdown.split("\n\n", 2)
+        markdown = f"{name_block}\n\n{description_block}\n\n{new_module}\n\n{modules}"
+        module_ids = set(self.course.modules.values_list("pk", flat=True))
+
+        summary, _ = self.reimport(markdown)
+
+        self.assertEqual(summary, {"created": 1, "updated": 12, "deleted": 0})
+        self.assertTrue(module_ids <= set(self.course.modules.values_list("pk", flat=True)))
+        self.assertEqual(self.course.modules.get(title="Welcome").order, 1)
+        self.assertEqual(Module.objects.get(pk=self.module.pk).order, 8)
+        self.assertEqual(ModuleProgression.objects.filter(module=self.module).count(), 1)
+
+    def test_renamed_module_is_matched_by_content(self):
+        summary, _ = self.reimport(self.markdown.replace("Module 7\n@end title", "Seventh Module\n@end title"))
+
+        self.assertEqual(summary, {"created": 0, "updated": 1, "deleted": 0})
+        self.assertEqual(Module.objects.get(pk=self.module.pk).title, "Seventh Module")
+
+    def test_quiz_changes_update_questions_and_answers_in_place(self):
+        question = self.module.quiz.questions.get(order=2)
+        markdown = self.markdown.replace("Question 7.2?", "Question 7.2, reworded?")
+        markdown = markdown.replace(
+            "Question 7.3?\n@end text\n@start answer\n@start text\nAnswer 1\n@end text\n"
+            "@start is_correct\ntrue\n@end is_correct\n@end answer",
+            "Question 7.3?\n@end text\n@start answer\n@start text\nAnswer 1\n@end text\n"
+            "@start is_correct\nfalse\n@end is_correct\n@end answer\n"
+            "@start answer\n@start text\nAnswer 4\n@end text\n@start is_correct\ntrue\n@end is_correct\n@end answer",
+        )
+
+        summary, _ = self.reimport(markdown)
+
+        self.assertEqual(summary, {"created": 1, "updated": 2, "deleted": 0})
+        question.refresh_from_db()
+        self.assertEqual(question.text, "Question 7.2, reworded?")
+        third_question = self.module.quiz.questions.get(order=3)
+        self.assertEqual(
+            sorted(third_question.answers.values_list("text", "is_correct")),
+            [("Answer 1", False), ("Answer 2", False), ("Answer 3", False), ("Answer 4", True)],
+        )
+
+    def test_removed_modules_are_deleted(self):
+        summary, _ = self.reimport(build_synthetic_course_markdown(1, 3, 3))
+
+        self.assertEqual(summary["deleted"], 11)
+        self.assertEqual(list(self.course.modules.values_list("title", flat=True)), ["Module 1"])
+
+    def test_reimport_refreshes_near_duplicates(self):
+        other_markdown = build_synthetic_course_markdown(3, 1, 1)
+        other_course = create_course_from_import(other_markdown, self.publisher)
+        self.assertFalse(CourseNearDuplicate.objects.exists())
+
+        self.reimport(other_markdown)
+
+        self.assertEqual(
+            list(CourseNearDuplicate.objects.values_list("course", "duplicate_of")), [(other_course.pk, self.course.pk)]
+        )
+
+    def test_admin_reimport_updates_existing_course(self):
+        self.publisher.is_staff = True
+        self.publisher.is_superuser = True
+        self.publisher.save()
+        self.client.force_login(self.publisher)
+        markdown = self.markdown.replace("# Module 7\n", "# Module 7 revised\n").encode("utf-8")
+
+        response = self.client.post(
+            reverse("admin:courses_reimport", args=[self.course.pk]),
+            {"markdown_file": SimpleUploadedFile("course.md", markdown)},
+            follow=True,
+        )
+
+        self.assertContains(response, "Course updated: 0 created, 1 updated, 0 deleted.")
+        self.assertEqual(Course.objects.count(), 1)
+
+
+class CourseImportExportCommandTests(TestCase):
+    def setUp(self):
+        self.publisher = get_user_model().objects.create_user(username="publisher", password="publisher-pass")  # noqa: S106
+        self.other_publisher = get_user_model().objects.create_user(username="other", password="other-pass")  # noqa: S106
+        for index in range(3):
+            create_course_from_import(build_synthetic_course_markdown(index + 1, 1, 2), self.publisher)
+        create_course_from_import(build_synthetic_course_markdown(1, 0, 0), self.other_publisher)
+        self.output_dir = Path(tempfile.mkdtemp())
+
+    def test_export_to_directory_filters_by_publisher(self):
+        stdout = io.StringIO()
+
+        call_command(
+            "export_courses", str(self.output_dir / "backup"), publisher=["publisher"], workers=1, stdout=stdout
+        )
+
+        self.assertEqual(len(list((self.output_dir / "backup").glob("*.md"))), 3)
+        self.assertIn("Exported 3 courses", stdout.getvalue())
+
+    def test_exported_archive_imports_for_publisher(self):
+        archive_path = self.output_dir / "backup.zip"
+        call_command("export_courses", str(archive_path), workers=1, stdout=io.StringIO())
+        stdout = io.StringIO()
+
+        call_command("import_courses", str(archive_path), publisher="other", workers=1, stdout=stdout)
+
+        self.assertIn("Imported 4 of 4 courses", stdout.getvalue())
+        self.assertEqual(Course.objects.filter(publisher=self.other_publisher).count(), 5)
+        self.assertEqual(CourseImportJob.objects.get().status, CourseImportJob.Status.COMPLETED)
+
+    def test_import_from_directory_parses_in_worker_processes(self):
+        call_command("export_courses", str(self.output_dir), workers=1, stdout=io.StringIO())
+        (self.output_dir / "broken.md").write_text("@start name\nBroken\n")
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+
+        call_command(
+            "import_courses", str(self.output_dir), publisher="publisher", workers=2, stdout=stdout, stderr=stderr
+        )
+
+        self.assertIn("Imported 4 of 5 courses", stdout.getvalue())
+        self.assertIn("broken.md: Unclosed @start name block", stderr.getvalue())
+
+    def test_import_requires_existing_publisher(self):
+        with self.assertRaisesMessage(CommandError, "Publisher 'missing' does not exist."):
+            call_command("import_courses", str(self.output_dir), publisher="missing")
+
+
+class FakeEmbeddingModel:
+    dimensions = 256
+
+    def __init__(self):
+        self.encoded_texts = []
+
+    def encode(self, texts, *, normalize_embeddings=False, **_options):
+        self.encoded_texts.append(list(texts))
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.strip(".,#").encode()) % self.dimensions] += 1
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors
+
+
+class SuggestTagsTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name="Python basics", description="Learn python")
+        Module.objects.create(course=self.course, title="Loops", description="Loops", content="python loops", order=1)
+        self.python_tag = CourseTag.objects.create(name="python")
+        self.cooking_tag = CourseTag.objects.create(name="cooking")
+        self.model = FakeEmbeddingModel()
+        patcher = patch("courses.suggestions.embedding_model", return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_suggestions_use_cached_tag_embeddings(self):
+        first_suggestions = suggest_tags(self.course)
+        self.model.encoded_texts.clear()
+
+        second_suggestions = suggest_tags(self.course)
+
+        self.assertEqual([tag for tag, _ in first_suggestions], [self.python_tag])
+        self.assertEqual(second_suggestions, first_suggestions)
+        self.assertEqual(len(self.model.encoded_texts), 1)
+        self.assertNotIn("cooking", self.model.encoded_texts[0])
+        self.assertEqual(CourseTagEmbedding.objects.count(), 2)
+
+    def test_added_and_renamed_tags_are_encoded_incrementally(self):
+        suggest_tags(self.course)
+        self.model.encoded_texts.clear()
+        self.cooking_tag.name = "loops"
+        self.cooking_tag.save()
+        CourseTag.objects.create(name="baking")
+
+        suggest_tags(self.course)
+
+        self.assertEqual(sorted(self.model.encoded_texts[0]), ["baking", "loops"])
+        self.assertEqual(CourseTagEmbedding.objects.get(tag=self.cooking_tag).name, "loops")
+
+    def test_deleted_tags_drop_their_embeddings(self):
+        suggest_tags(self.course)
+
+        self.cooking_tag.delete()
+
+        self.assertEqual(list(CourseTagEmbedding.objects.values_list("name", flat=True)), ["python"])
+
+    def test_only_edited_modules_are_re_encoded(self):
+        other_module = Module.objects.create(
+            course=self.course, title="Data", description="Lists", content="python lists", order=2
+        )
+        suggest_tags(self.course)
+        self.model.encoded_texts.clear()
+        other_module.content = "python dictionaries"
+        other_module.save()
+
+        suggest_tags(self.course)
+
+        self.assertEqual(
+            self.model.encoded_texts,
+            [["Python basics\nLearn python"], ["Data\nLists\n\npython dictionaries"]],
+        )
+        self.assertEqual(ModuleEmbedding.objects.filter(module__course=self.course).count(), 2)
+
+    def test_module_content_contributes_to_pooled_scores(self):
+        loops_tag = CourseTag.objects.create(name="loops")
+
+        max_suggestions = dict(suggest_tags(self.course, min_score=0.0))
+        mean_suggestions = dict(suggest_tags(self.course, min_score=0.0, pooling="mean"))
+
+        self.assertGreater(max_suggestions[loops_tag], 0.5)
+        self.assertLess(mean_suggestions[loops_tag], max_suggestions[loops_tag])
+        self.assertNotIn(self.cooking_tag, [tag for tag, _ in suggest_tags(self.course)])
+
+    def test_long_modules_are_encoded_as_bounded_window_batches(self):
+        filler = "\n\n".join(" ".join(f"filler{i}x{j}" for j in range(40)) for i in range(200))
+        Module.objects.create(
+            course=self.course,
+            title="Appendix",
+            description="Extras",
+            content=f"{filler}\n\n## Closing\n\ncooking recipes",
+            order=2,
+        )
+
+        suggestions = dict(suggest_tags(self.course, min_score=0.0))
+
+        module_batches = self.model.encoded_texts[2:]
+        self.assertGreater(len(module_batches), 1)
+        self.assertTrue(all(len(batch) <= EMBEDDING_BATCH_WINDOWS for batch in module_batches))
+        self.assertIn("## Closing\n\ncooking recipes", module_batches[-1])
+        self.assertGreater(suggestions[self.cooking_tag], 0.0)
+
+
+@override_settings(TAG_SUGGESTION_BACKEND="bm25")
+class LexicalSuggestTagsTests(TestCase):
+    def setUp(self):
+        self.course = Course.objects.create(name="Python basics", description="Learn python")
+        Module.objects.create(
+            course=self.course,
+            title="Loops",
+            description="Iteration",
+            content="Machine learning pipelines use python loops. Loops repeat work.",
+            order=1,
+        )
+        self.python_tag = CourseTag.objects.create(name="Python")
+        self.learning_tag = CourseTag.objects.create(name="machine learning")
+        self.cooking_tag = CourseTag.objects.create(name="cooking")
+        patcher = patch("courses.suggestions.embedding_model", side_effect=AssertionError("model loaded"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tags_are_ranked_without_the_embedding_model(self):
+        suggestions = suggest_tags(self.course, min_score=0.0)
+
+        self.assertEqual({tag for tag, _ in suggestions[:2]}, {self.python_tag, self.learning_tag})
+        self.assertEqual(dict(suggestions)[self.cooking_tag], 0.0)
+        self.assertTrue(all(0.0 <= score < 1.0 for _, score in suggestions))
+
+    def test_subject_found_in_every_chunk_ranks_first(self):
+        suggestions = suggest_tags(self.course, min_score=0.0)
+
+        self.assertEqual(suggestions[0][0], self.python_tag)
+
+    def test_chunk_scores_do_not_depend_on_the_batch(self):
+        _, tag_scorer = tag_index()
+        texts = ["python loops", "cooking recipes for machine learning"]
+
+        batch_scores = tag_scorer.score(texts)
+
+        for column, text in enumerate(texts):
+            np.testing.assert_array_equal(tag_scorer.score([text])[:, 0], batch_scores[:, column])
+
+    def test_partial_multi_word_matches_score_lower(self):
+        vision_tag = CourseTag.objects.create(name="machine vision")
+
+        suggestions = dict(suggest_tags(self.course, min_score=0.0))
+
+        self.assertGreater(suggestions[vision_tag], 0.0)
+        self.assertLess(suggestions[vision_tag], suggestions[self.learning_tag])
+
+    def test_renamed_tags_rebuild_the_index(self):
+        suggest_tags(self.course)
+        self.cooking_tag.name = "loops"
+        self.cooking_tag.save()
+
+        self.assertIn("loops", [tag.name for tag, _ in suggest_tags(self.course)])
+
+    def test_revision_depends_on_backend(self):
+        lexical_revision = course_revision(self.course)
+
+        with override_settings(TAG_SUGGESTION_BACKEND="embedding"):
+            self.assertNotEqual(course_revision(self.course), lexical_revision)
+
+
+class ChunkingTests(SimpleTestCase):
+    def test_paragraphs_are_packed_and_headings_start_new_windows(self):
+        text = "# Intro\n\nFirst paragraph.\n\nSecond paragraph.\n## Details\nMore text."
+
+        self.assertEqual(
+            split_into_windows(text),
+            ["# Intro\n\nFirst paragraph.\n\nSecond paragraph.", "## Details\nMore text."],
+        )
+
+    def test_long_words_count_as_several_wordpieces(self):
+        self.assertEqual(count_tokens("a cat."), 3)
+        self.assertEqual(count_tokens("internationalization"), 5)
+
+    def test_long_paragraphs_slide_with_overlap(self):
+        max_tokens = 30
+        words = [f"word{i}" for i in range(100)]
+
+        windows = split_into_windows(" ".join(words), max_tokens=max_tokens, overlap=10)
+
+        self.assertTrue(all(count_tokens(window) <= max_tokens for window in windows))
+        self.assertEqual(windows[0].split()[-5:], windows[1].split()[:5])
+        self.assertNotEqual(windows[0].split()[-6], windows[1].split()[0])
+        self.assertEqual(windows[-1].split()[-1], "word99")
+
+    def test_long_words_still_advance_half_a_window(self):
+        max_tokens = 30
+        words = [f"{i:02d}" + "x" * 18 for i in range(60)]
+
+        windows = split_into_windows(" ".join(words), max_tokens=max_tokens, overlap=16)
+
+        self.assertLessEqual(len(windows), 2 * count_tokens(" ".join(words)) // max_tokens)
+        for previous, current in itertools.pairwise(windows):
+            shared = [word for word in current.split() if word in previous.split()]
+            self.assertLessEqual(count_tokens(" ".join(shared)), max_tokens // 2)
+        self.assertEqual(windows[-1].split()[-1], words[-1])
+
+
+class TagSuggestionJobTests(CoursesWebTestBase):
+    def setUp(self):
+        super().setUp()
+        self.publisher.is_staff = True
+        self.publisher.is_superuser = True
+        self.publisher.save()
+        self.app.set_user(self.publisher.username)
+        self.tag = CourseTag.objects.create(name="module")
+        self.model = FakeEmbeddingModel()
+        patcher = patch("courses.suggestions.embedding_model", return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.suggest_url = reverse("admin:courses_suggest_tags", args=[self.course.pk])
+
+    def test_suggestions_run_in_background_and_are_cached_per_revision(self):
+        response = self.app.get(self.suggest_url)
+
+        self.assertIn("Generating suggestions", response.text)
+        self.assertEqual(self.model.encoded_texts, [])
+        result_id = QueuedTask.objects.get().pk
+        status_url = reverse("admin:courses_suggest_tags_status", args=[self.course.pk, result_id])
+        self.assertIn(status_url, response.text)
+
+        run_worker("test-worker", ["default"], max_tasks=1)
+
+        status_response = self.app.get(status_url)
+        self.assertIn("module (", status_response.text)
+        self.assertNotIn("hx-trigger", status_response.text)
+
+        cached_response = self.app.get(self.suggest_url)
+        self.assertIn("module (", cached_response.text)
+        self.assertEqual(QueuedTask.objects.count(), 1)
+
+    def test_course_edit_invalidates_cached_suggestions(self):
+        self.app.get(self.suggest_url)
+        run_worker("test-worker", ["default"], max_tasks=1)
+
+        self.module_intro.content = "Rewritten module"
+        self.module_intro.save()
+        response = self.app.get(self.suggest_url)
+
+        self.assertIn("Generating suggestions", response.text)
+        self.assertEqual(QueuedTask.objects.count(), 2)
+
+    def test_repeated_requests_reuse_pending_job(self):
+        first_response = self.app.get(self.suggest_url)
+        second_response = self.app.get(self.suggest_url)
+
+        result_id = QueuedTask.objects.get().pk
+        status_url = reverse("admin:courses_suggest_tags_status", args=[self.course.pk, result_id])
+        self.assertIn(status_url, first_response.text)
+        self.assertIn(status_url, second_response.text)
+
+    def test_stale_running_job_is_not_reused(self):
+        self.app.get(self.suggest_url)
+        QueuedTask.objects.update(
+            status=TaskResultStatus.RUNNING,
+            started_at=timezone.now() - timedelta(seconds=settings.TASK_RUNNING_TIMEOUT + 1),
+        )
+
+        self.app.get(self.suggest_url)
+
+        self.assertEqual(QueuedTask.objects.filter(status=TaskResultStatus.READY).count(), 1)
+
+    def test_status_of_unknown_job_is_not_found(self):
+        response = self.app.get(
+            reverse("admin:courses_suggest_tags_status", args=[self.course.pk, "missing"]), expect_errors=True
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+
+class SemanticSearchTests(CoursesWebTestBase):
+    def setUp(self):
+        super().setUp()
+        self.loops_course = Course.objects.create(
+            name="Iteration in practice", description="Control flow", is_draft=False, publisher=self.publisher
+        )
+        Module.objects.create(
+            course=self.loops_course, title="Loops", description="Repetition", content="python loops explained", order=1
+        )
+        draft_course = Course.objects.create(
+            name="Draft iteration", description="Python loops", is_draft=True, publisher=self.publisher
+        )
+        Module.objects.create(course=draft_course, title="Loops", description="Loops", content="python loops", order=1)
+        self.model = FakeEmbeddingModel()
+        patcher = patch("courses.suggestions.embedding_model", return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        index_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(index_directory.cleanup)
+        self.index_directory = Path(index_directory.name)
+        self.app.set_user(self.student.username)
+
+    def search(self, query):
+        with override_settings(COURSE_SEMANTIC_SEARCH=True, COURSE_SEARCH_INDEX_DIR=self.index_directory):
+            response = self.app.get(reverse("courses:course_browse_list"), params={"q": query})
+        return [course.name for course in response.context["courses"]]
+
+    def test_index_is_a_memory_mapped_matrix_of_published_courses(self):
+        call_command("build_course_search_index", directory=str(self.index_directory), stdout=io.StringIO())
+
+        with override_settings(COURSE_SEARCH_INDEX_DIR=self.index_directory):
+            course_ids, vectors = course_search_index()
+
+        self.assertEqual(course_ids.tolist(), [self.course.pk, self.bug_course.pk, self.loops_course.pk])
+        self.assertIsInstance(vectors, np.memmap)
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+
+    def test_semantic_matches_are_found_without_lexical_matches(self):
+        call_command("build_course_search_index", directory=str(self.index_directory), stdout=io.StringIO())
+
+        self.assertEqual(self.search("python loops"), ["Iteration in practice"])
+
+    def test_lexical_matches_are_ranked_by_similarity(self):
+        call_command("build_course_search_index", directory=str(self.index_directory), stdout=io.StringIO())
+
+        self.assertEqual(self.search("course"), ["Duplicate Purchase Course", "Integration Course"])
+        self.assertEqual(self.search("iteration"), ["Iteration in practice"])
+
+    def test_lexical_candidates_are_capped_before_reranking(self):
+        call_command("build_course_search_index", directory=str(self.index_directory), stdout=io.StringIO())
+
+        with (
+            patch("courses.views.SEMANTIC_LEXICAL_CANDIDATES", 1),
+            patch("courses.views.rank_courses_semantically", wraps=rank_courses_semantically) as rank,
+        ):
+            self.search("course")
+
+        self.assertEqual(len(list(rank.call_args.args[1])), 1)
+
+    def test_missing_index_falls_back_to_lexical_search(self):
+        self.assertEqual(self.search("python loops"), [])
+        self.assertEqual(self.search("iteration"), ["Iteration in practice"])
+        self.assertEqual(self.model.encoded_texts, [])
+
+
+def build_varied_course_markdown(name, seed, module_count=4, words_per_module=300):
+    rng = np.random.default_rng(seed)
+    blocks = [f"@start name\n{name}\n@end name", "@start description\nGenerated\n@end description"]
+    for module_index in range(1, module_count + 1):
+        content = " ".join(f"term{rng.integers(5000)}" for _ in range(words_per_module))
+        blocks.append(
+            f"@start module\n@start title\nModule {module_index}\n@end title\n"
+            f"@start description\nDescription\n@end description\n"
+            f"@start content\n{content}\n@end content\n@end module"
+        )
+    return "\n\n".join(blocks) + "\n"
+
+
+class NearDuplicateDetectionTests(TestCase):
+    def setUp(self):
+        self.publisher = get_user_model().objects.create_user(username="publisher", password="publisher-pass")  # noqa: S106
+        self.original = create_course_from_import(build_varied_course_markdown("Original", seed=1), self.publisher)
+
+    def test_edited_copy_is_flagged_at_import(self):
+        markdown = build_varied_course_markdown("Copy", seed=1)
+        edited_markdown = markdown.replace(" term", " edited", 10)
+
+        copy = create_course_from_import(edited_markdown, self.publisher)
+
+        near_duplicate = CourseNearDuplicate.objects.get()
+        self.assertEqual((near_duplicate.course, near_duplicate.duplicate_of), (copy, self.original))
+        self.assertGreater(near_duplicate.similarity, 0.8)
+        self.assertEqual(CourseSignatureBand.objects.filter(course=copy).count(), LSH_BANDS)
+
+    def test_unrelated_course_is_not_flagged(self):
+        create_course_from_import(build_varied_course_markdown("Other", seed=2), self.publisher)
+
+        self.assertFalse(CourseNearDuplicate.objects.exists())
+
+    def test_command_refreshes_signatures_of_edited_courses(self):
+        copy = create_course_from_import(build_varied_course_markdown("Copy", seed=1), self.publisher)
+        self.assertTrue(CourseNearDuplicate.objects.exists())
+        copy.modules.update(content="Rewritten from scratch")
+
+        call_command("find_duplicate_courses", stdout=io.StringIO())
+
+        self.assertFalse(CourseNearDuplicate.objects.exists())
+
+    def test_command_scans_courses_created_outside_imports(self):
+        copy = Course.objects.create(name="Manual copy", description="Copied by hand")
+        for module in self.original.modules.all():
+            Module.objects.create(
+                course=copy, title=module.title, description="", content=module.content, order=module.order
+            )
+        output = io.StringIO()
+
+        call_command("find_duplicate_courses", stdout=output)
+
+        self.assertIn(f"Manual copy (#{copy.pk}) ~ Original (#{self.original.pk}): 100%", output.getvalue())
+        self.assertEqual(CourseNearDuplicate.objects.get().duplicate_of, self.original)
+
+
+class WebStartupImportTests(SimpleTestCase):
+    max_startup_rss_mib = 200
+    # ru_maxrss survives exec and would report this test process's peak.
+    startup_script = (
+        "import os, resource, sys\n"
+        "from toolspaedeia.wsgi import application\n"
+        "from django.urls import get_resolver\n"
+        "get_resolver().url_patterns\n"
+        "heavy_modules = sorted({'torch', 'sentence_transformers', 'transformers'} & set(sys.modules))\n"
+        "peak_kib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+        "if os.path.exists('/proc/self/status'):\n"
+        "    with open('/proc/self/status') as status:\n"
+        "        peak_kib = next(int(line.split()[1]) for line in status if line.startswith('VmHWM:'))\n"
+        "print(json.dumps({'heavy_modules': heavy_modules, 'rss_mib': peak_kib // 1024}))\n"
+    )
+
+    def test_web_startup_does_not_import_the_ml_stack(self):
+        completed = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", f"import json\n{self.startup_script}"],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "toolspaedeia.settings"},
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        startup = json.loads(completed.stdout)
+
+        self.assertEqual(startup["heavy_modules"], [])
+        self.assertLess(startup["rss_mib"], self.max_startup_rss_mib)
+
+
+class EmbeddingInferenceTests(SimpleTestCase):
+    def setUp(self):
+        embedding_model.cache_clear()
+        self.addCleanup(embedding_model.cache_clear)
+
+    @override_settings(EMBEDDING_INFERENCE="int8", EMBEDDING_MODEL_PATH="/models/minilm")
+    def test_int8_inference_quantizes_linear_layers_of_a_local_model(self):
+        import torch  # noqa: PLC0415
+
+        float_model = torch.nn.Sequential(torch.nn.Linear(4, 4))
+        with patch("sentence_transformers.SentenceTransformer", return_value=float_model) as model_class:
+            model = embedding_model()
+
+        model_class.assert_called_once_with("/models/minilm", device="cpu", local_files_only=True)
+        self.assertIsInstance(model[0], torch.ao.nn.quantized.dynamic.Linear)
+        self.assertEqual(embedding_model_label(), "sentence-transformers/paraphrase-MiniLM-L3-v2:int8")
+
+    @override_settings(EMBEDDING_INFERENCE="onnx")
+    def test_onnx_inference_requires_onnxruntime(self):
+        with (
+            patch("courses.suggestions.importlib.util.find_spec", return_value=None),
+            self.assertRaises(ImproperlyConfigured),
+        ):
+            embedding_model()
+
+
+class EmbeddingServiceTests(SimpleTestCase):
+    def setUp(self):
+        self.socket_path = Path(tempfile.mkdtemp()) / "embeddings.sock"
+        self.model = FakeEmbeddingModel()
+        self.batch_sizes = []
+        self.server = EmbeddingServer(self.socket_path, self.encode, batch_wait=0.05)
+        server_thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        server_thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def encode(self, texts):
+        self.batch_sizes.append(len(texts))
+        return self.model.encode(texts, normalize_embeddings=True)
+
+    def test_concurrent_requests_are_micro_batched(self):
+        texts_by_request = [[f"python lesson {index}", f"cooking recipe {index}"] for index in range(8)]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda texts: encode_via_service(self.socket_path, texts), texts_by_request))
+
+        for texts, vectors in zip(texts_by_request, results, strict=True):
+            np.testing.assert_allclose(vectors, self.model.encode(texts, normalize_embeddings=True))
+        self.assertEqual(sum(self.batch_sizes), 16)
+        self.assertLess(len(self.batch_sizes), 8)
+
+    def send_raw_request(self, payload):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(5)
+            connection.connect(str(self.socket_path))
+            connection.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+            (size,) = FRAME_HEADER.unpack(connection.recv(FRAME_HEADER.size))
+            return json.loads(connection.recv(size))
+
+    def test_malformed_requests_are_rejected_without_stopping_the_service(self):
+        for payload in (b"{not json", b'{"texts": 5}', b'["python"]', b"\xff"):
+            response = self.send_raw_request(payload)
+            self.assertEqual(response["status"], 400)
+
+        with self.assertRaises(EmbeddingRequestError):
+            encode_via_service(self.socket_path, [1, 2])
+        self.assertEqual(encode_via_service(self.socket_path, ["python"]).shape, (1, FakeEmbeddingModel.dimensions))
+        self.assertEqual(self.batch_sizes, [1])
+
+    def test_encode_texts_uses_service_when_configured(self):
+        with (
+            override_settings(EMBEDDING_SERVICE_SOCKET=str(self.socket_path)),
+            patch("courses.suggestions.embedding_model") as local_model,
+        ):
+            vectors = encode_texts(["python"])
+
+        local_model.assert_not_called()
+        self.assertEqual(vectors.shape, (1, FakeEmbeddingModel.dimensions))
+
+    def test_encode_texts_falls_back_when_service_is_absent(self):
+        with (
+            override_settings(EMBEDDING_SERVICE_SOCKET=str(self.socket_path.with_name("missing.sock"))),
+            patch("courses.suggestions.embedding_model", return_value=self.model),
+            self.assertLogs("courses.suggestions", level="WARNING"),
+        ):
+            vectors = encode_texts(["python"])
+
+        self.assertEqual(self.batch_sizes, [])
+        self.assertEqual(vectors.shape, (1, FakeEmbeddingModel.dimensions))
+
+
+class SuggestTagsBulkCommandTests(TestCase):
+    def setUp(self):
+        self.python_course = Course.objects.create(name="Python basics", description="Learn python")
+        Module.objects.create(
+            course=self.python_course, title="Loops", description="Loops", content="python loops", order=1
+        )
+        self.cooking_course = Course.objects.create(name="Cooking basics", description="Learn cooking")
+        self.empty_course = Course.objects.create(name="Misc", description="Nothing")
+        self.python_tag = CourseTag.objects.create(name="python")
+        self.cooking_tag = CourseTag.objects.create(name="cooking")
+        self.loops_tag = CourseTag.objects.create(name="loops")
+        self.model = FakeEmbeddingModel()
+        patcher = patch("courses.suggestions.embedding_model", return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_command(self, *args):
+        stdout = io.StringIO()
+        call_command("suggest_tags_bulk", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_bulk_scores_match_single_course_suggestions(self):
+        self.run_command("--batch-size", "2", "--top", "1")
+
+        for course in (self.python_course, self.cooking_course, self.empty_course):
+            stored = cached_tag_suggestions(course, course_revision(course))
+            expected = suggest_tags(course)
+            self.assertEqual([tag for tag, _ in stored], [tag for tag, _ in expected])
+            for (_, stored_score), (_, expected_score) in zip(stored, expected, strict=True):
+                self.assertAlmostEqual(stored_score, expected_score, places=5)
+
+    @override_settings(TAG_SUGGESTION_BACKEND="bm25")
+    def test_lexical_bulk_scores_match_single_course_suggestions(self):
+        self.run_command("--batch-size", "2")
+
+        for course in (self.python_course, self.cooking_course, self.empty_course):
+            stored = cached_tag_suggestions(course, course_revision(course))
+            expected = suggest_tags(course)
+            self.assertEqual(stored, expected)
+
+    def test_custom_scoring_does_not_replace_admin_suggestions(self):
+        self.run_command("--min-score", "0.9")
+
+        self.assertFalse(TagSuggestionResult.objects.exists())
+
+    def test_rerun_skips_up_to_date_courses(self):
+        self.run_command()
+        self.model.encoded_texts.clear()
+        self.cooking_course.description = "Learn cooking and python"
+        self.cooking_course.save()
+
+        output = self.run_command()
+
+        self.assertIn("Scored 1 courses against 3 tags, skipped 2 up to date", output)
+        self.assertEqual(self.model.encoded_texts, [["Cooking basics\nLearn cooking and python"]])
+
+    def test_apply_threshold_adds_tags_once(self):
+        self.run_command("--apply-threshold", "0.5")
+        output = self.run_command("--apply-threshold", "0.5")
+
+        self.assertIn("applied 0 tags", output)
+        self.assertEqual(list(self.python_course.tags.order_by("name")), [self.loops_tag, self.python_tag])
+        self.assertEqual(list(self.cooking_course.tags.all()), [self.cooking_tag])
+        self.assertFalse(self.empty_course.tags.exists())
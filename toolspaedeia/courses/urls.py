@@ -8,6 +8,8 @@ from .views import CoursePublishedListView
 from .views import CoursePurchasedListView
 from .views import CourseRecommendationsListView
 from .views import ModuleMarkCompleteView
+from .views import QuizStatisticsView
+from .views import QuizSyncView
 
 app_name = "courses"
 
@@ -16,6 +18,7 @@ urlpatterns = [
     path("purchased-courses/", CoursePurchasedListView.as_view(), name="course_purchased_list"),
     path("published-courses/", CoursePublishedListView.as_view(), name="course_published_list"),
     path("recommendations/", CourseRecommendationsListView.as_view(), name="course_recommendations_list"),
+    path("quiz-sync/", QuizSyncView.as_view(), name="quiz_sync"),
     path("<int:course_id>/", CourseDetailView.as_view(), name="course_detail"),
     path("<int:course_id>/modules/<int:module_id>/", CourseModuleDetailView.as_view(), name="module_detail"),
     path(
@@ -28,4 +31,9 @@ urlpatterns = [
         AttemptQuizView.as_view(),
         name="attempt_quiz",
     ),
+    path(
+        "<int:course_id>/quiz/<int:quiz_id>/statistics/",
+        QuizStatisticsView.as_view(),
+        name="quiz_statistics",
+    ),
 ]
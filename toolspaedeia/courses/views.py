@@ -1,10 +1,17 @@
+import json
 from datetime import timedelta
 from typing import Any
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Case
+from django.db.models import Count
+from django.db.models import Prefetch
+from django.db.models import When
 from django.db.models.query import Q
 from django.db.models.query import QuerySet
 from django.http import HttpResponse
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.template.loader import render_to_string
 from django.utils import timezone
@@ -14,14 +21,20 @@ from django.views.generic import DetailView
 from django.views.generic import ListView
 
 from courses.markdown import markdown_to_html
+from courses.models import Answer
 from courses.models import Course
 from courses.models import Module
+from courses.models import Question
 from courses.models import Quiz
 from courses.models import QuizAttempt
 from courses.quizzes import build_checked_answers_data
 from courses.quizzes import build_quiz_data
 from courses.quizzes import calculate_final_grade
 from courses.quizzes import get_attempt_questions
+from courses.quizzes import grade_submission
+from courses.quizzes import record_quiz_statistics
+from courses.search import SEMANTIC_LEXICAL_CANDIDATES
+from courses.search import rank_courses_semantically
 from purchases.models import Purchase
 from toolspaedeia.mixins import TitledViewMixin
 
@@ -152,6 +165,27 @@ class CourseBrowseListView(CourseBaseListView):
     def get_base_queryset(self):
         return Course.objects.filter(is_draft=False)
 
+    def get_queryset(self):
+        query = self.get_search_query()
+        if not query or not settings.COURSE_SEMANTIC_SEARCH:
+            return super().get_queryset()
+
+        base_queryset = self.get_base_queryset()
+        name_match = Case(When(name__icontains=query, then=0), default=1)
+        lexical_course_ids = (
+            self.apply_search(base_queryset)
+            .order_by(name_match, "pk")
+            .values_list("pk", flat=True)[:SEMANTIC_LEXICAL_CANDIDATES]
+        )
+        ranked_course_ids = rank_courses_semantically(query, lexical_course_ids)
+        if ranked_course_ids is None:
+            return super().get_queryset()
+        if not ranked_course_ids:
+            return base_queryset.none()
+
+        ranking = Case(*[When(pk=course_id, then=position) for position, course_id in enumerate(ranked_course_ids)])
+        return base_queryset.filter(pk__in=ranked_course_ids).order_by(ranking)
+
 
 class CourseRecommendationsListView(CourseBaseListView):
     title = "Recommended Courses"
@@ -362,4 +396,168 @@ class AttemptQuizView(LoginRequiredMixin, View):
         final_grade = calculate_final_grade(quiz_data)
         if quiz.track_attempts:
             QuizAttempt.objects.create(user=request.user, quiz=quiz, grade=str(final_grade))
+        if not user_is_publisher:
+            record_quiz_statistics([quiz_data])
         return self.render_quiz_section(request, quiz, course, quiz_data, final_grade=final_grade)
+
+
+class QuizSyncView(LoginRequiredMixin, View):
+    http_method_names = ["post"]
+    login_url = "users:login"
+    max_submissions = 200
+
+    STATUS_GRADED = "graded"
+    STATUS_INVALID = "invalid"
+    STATUS_NOT_FOUND = "not_found"
+    STATUS_FORBIDDEN = "forbidden"
+    STATUS_MAX_ATTEMPTS_REACHED = "max_attempts_reached"
+
+    @staticmethod
+    def parse_submission(raw_submission):
+        try:
+            return {
+                "client_id": raw_submission.get("client_id"),
+                "course_id": int(raw_submission["course_id"]),
+                "quiz_id": int(raw_submission["quiz_id"]),
+                "question_ids": [int(question_id) for question_id in raw_submission["question_ids"]],
+                "selected_answer_ids": {
+                    str(question_id): {str(answer_id) for answer_id in answer_ids}
+                    for question_id, answer_ids in raw_submission.get("selected_answer_ids", {}).items()
+                },
+            }
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+    def load_quizzes(self, submissions):
+        quizzes = Quiz.objects.select_related("module__course").in_bulk(
+            {submission["quiz_id"] for submission in submissions if submission is not None}
+        )
+        self.purchased_course_ids = set(
+            Purchase.objects.filter(
+                user=self.request.user,
+                state=Purchase.State.ACCEPTED,
+                course_id__in={quiz.module.course_id for quiz in quizzes.values()},
+            ).values_list("course_id", flat=True)
+        )
+        self.attempt_counts = dict(
+            QuizAttempt.objects.filter(user=self.request.user, quiz_id__in=quizzes)
+            .values("quiz_id")
+            .annotate(total=Count("id"))
+            .values_list("quiz_id", "total")
+        )
+        self.questions = Question.objects.filter(quiz_id__in=quizzes).prefetch_related("answers").in_bulk()
+        return quizzes
+
+    def get_rejection_status(self, submission, quiz):
+        if quiz is None or quiz.module.course_id != submission["course_id"]:
+            return self.STATUS_NOT_FOUND
+
+        user_is_publisher = self.request.user.id == quiz.module.course.publisher_id
+        if not user_is_publisher and quiz.module.course_id not in self.purchased_course_ids:
+            return self.STATUS_FORBIDDEN
+
+        if (
+            not user_is_publisher
+            and quiz.track_attempts
+            and quiz.max_attempts
+            and self.attempt_counts.get(quiz.id, 0) >= quiz.max_attempts
+        ):
+            return self.STATUS_MAX_ATTEMPTS_REACHED
+
+        return None
+
+    def post(self, request):
+        try:
+            raw_submissions = json.loads(request.body)["submissions"]
+        except (json.JSONDecodeError, KeyError, TypeError):
+            raw_submissions = None
+
+        if not isinstance(raw_submissions, list):
+            return JsonResponse({"error": "Expected a JSON object with a submissions list."}, status=400)
+        if len(raw_submissions) > self.max_submissions:
+            return JsonResponse({"error": f"At most {self.max_submissions} submissions per request."}, status=400)
+
+        submissions = [self.parse_submission(raw_submission) for raw_submission in raw_submissions]
+        quizzes = self.load_quizzes(submissions)
+
+        results = []
+        attempts = []
+        graded_quizzes = []
+        for raw_submission, submission in zip(raw_submissions, submissions, strict=True):
+            if submission is None:
+                client_id = raw_submission.get("client_id") if isinstance(raw_submission, dict) else None
+                results.append({"client_id": client_id, "status": self.STATUS_INVALID})
+                continue
+
+            quiz = quizzes.get(submission["quiz_id"])
+            status = self.get_rejection_status(submission, quiz)
+            questions = [
+                self.questions[question_id]
+                for question_id in submission["question_ids"]
+                if question_id in self.questions and self.questions[question_id].quiz_id == submission["quiz_id"]
+            ]
+            if status is None and not questions:
+                status = self.STATUS_INVALID
+            if status is not None:
+                results.append({"client_id": submission["client_id"], "status": status})
+                continue
+
+            quiz_data = grade_submission(questions, submission["selected_answer_ids"])
+            final_grade = calculate_final_grade(quiz_data)
+            results.append({"client_id": submission["client_id"], "status": self.STATUS_GRADED, "grade": final_grade})
+
+            if quiz.track_attempts:
+                attempts.append(QuizAttempt(user=request.user, quiz=quiz, grade=str(final_grade)))
+                self.attempt_counts[quiz.id] = self.attempt_counts.get(quiz.id, 0) + 1
+            if request.user.id != quiz.module.course.publisher_id:
+                graded_quizzes.append(quiz_data)
+
+        QuizAttempt.objects.bulk_create(attempts)
+        record_quiz_statistics(graded_quizzes)
+        return JsonResponse({"results": results})
+
+
+class QuizStatisticsView(TitledViewMixin, LoginRequiredMixin, DetailView):
+    model = Quiz
+    pk_url_kwarg = "quiz_id"
+    context_object_name = "quiz"
+    login_url = "users:login"
+    template_name = "courses/quiz_statistics.html"
+
+    def get_title(self):
+        return f"{self.object.title} Statistics"
+
+    def get_queryset(self) -> QuerySet[Quiz]:
+        return Quiz.objects.select_related("module__course").filter(
+            module__course_id=self.kwargs["course_id"],
+            module__course__publisher=self.request.user,
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        questions = list(
+            self.object.questions.select_related("statistics").prefetch_related(
+                Prefetch("answers", queryset=Answer.objects.select_related("statistics").order_by("pk"))
+            )
+        )
+
+        for question in questions:
+            statistics = getattr(question, "statistics", None)
+            question.times_shown = statistics.times_shown if statistics else 0
+            question.times_correct = statistics.times_correct if statistics else 0
+            question.correct_rate = statistics.correct_rate if statistics else None
+            question.answer_rows = []
+            for answer in question.answers.all():
+                answer_statistics = getattr(answer, "statistics", None)
+                times_selected = answer_statistics.times_selected if answer_statistics else 0
+                selection_rate = round(times_selected / question.times_shown * 100, 2) if question.times_shown else None
+                question.answer_rows.append(
+                    {"answer": answer, "times_selected": times_selected, "selection_rate": selection_rate}
+                )
+
+        questions.sort(key=lambda question: (question.correct_rate is None, question.correct_rate or 0, question.order))
+
+        context["course"] = self.object.module.course
+        context["module"] = self.object.module
+        context["questions"] = questions
+        return context
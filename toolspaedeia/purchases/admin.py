@@ -1,6 +1,8 @@
 from django.contrib import admin
 
+from purchases.models import CheckoutSession
 from purchases.models import Purchase
+from purchases.models import StripeWebhookEvent
 
 
 @admin.register(Purchase)
@@ -8,3 +10,21 @@ class PurchaseAdmin(admin.ModelAdmin):
     list_display = ["id", "user", "course", "amount", "state", "stripe_payment_id", "purchase_date"]
     list_filter = ["state", "purchase_date"]
     search_fields = ["user__username", "course__name", "stripe_payment_id"]
+
+    def delete_queryset(self, _request, queryset):
+        for purchase in queryset:
+            purchase.delete()
+
+
+@admin.register(StripeWebhookEvent)
+class StripeWebhookEventAdmin(admin.ModelAdmin):
+    list_display = ["event_id", "event_type", "object_id", "status", "stripe_created", "received_at", "processed_at"]
+    list_filter = ["status", "event_type"]
+    search_fields = ["event_id", "object_id"]
+    readonly_fields = ["received_at", "processed_at"]
+
+
+@admin.register(CheckoutSession)
+class CheckoutSessionAdmin(admin.ModelAdmin):
+    list_display = ["session_id", "user", "course", "price", "expires_at", "created_at"]
+    search_fields = ["session_id", "user__username", "course__name"]
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class PurchasesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "purchases"
+
+    def ready(self):
+        from purchases.payments import configure_stripe  # noqa: PLC0415
+
+        configure_stripe()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from purchases.models import PurchaseDailyRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-course daily income rollups from accepted purchases. Only needed after purchases were "
+        "changed without going through Purchase.save() or Purchase.delete(), such as bulk queryset updates."
+    )
+
+    def handle(self, **_options):
+        rollup_count = PurchaseDailyRollup.rebuild()
+        self.stdout.write(f"Rebuilt {rollup_count} daily income rollups.")
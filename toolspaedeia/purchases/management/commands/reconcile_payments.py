@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from purchases.reconciliation import reconcile_payments
+
+
+class Command(BaseCommand):
+    help = (
+        "Page through Stripe checkout sessions and payment intents and bring purchases in line with them. Catches up "
+        "on purchases whose webhook events were lost."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Only reconcile Stripe objects created in the last N days.")
+        parser.add_argument("--dry-run", action="store_true", help="Report the changes without saving them.")
+
+    def handle(self, **options):
+        created_since = None
+        if options["days"] is not None:
+            created_since = timezone.now() - timedelta(days=options["days"])
+
+        updated, created = reconcile_payments(created_since, dry_run=options["dry_run"])
+        if options["dry_run"]:
+            self.stdout.write(f"Would update {updated} purchases and create {created} missing purchases.")
+        else:
+            self.stdout.write(f"Updated {updated} purchases and created {created} missing purchases.")
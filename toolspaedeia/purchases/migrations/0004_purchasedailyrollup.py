@@ -0,0 +1,55 @@
+# Generated by Django 6.0.5 on 2026-10-19 15:23
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations
+from django.db import models
+from django.utils import timezone
+
+
+def backfill_purchase_daily_rollups(apps, _schema_editor):
+    Purchase = apps.get_model("purchases", "Purchase")
+    PurchaseDailyRollup = apps.get_model("purchases", "PurchaseDailyRollup")
+
+    rollups = {}
+    accepted_purchases = Purchase.objects.filter(state="ACCEPTED", course__isnull=False)
+    for course_id, amount, purchase_date in accepted_purchases.values_list("course_id", "amount", "purchase_date"):
+        key = (course_id, timezone.localdate(purchase_date))
+        rollup = rollups.setdefault(key, PurchaseDailyRollup(course_id=course_id, day=key[1]))
+        rollup.enrollments += 1
+        rollup.sales += amount > 0
+        rollup.revenue += amount
+    PurchaseDailyRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0026_coursesignature"),
+        ("purchases", "0003_alter_purchase_course_alter_purchase_user"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PurchaseDailyRollup",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                ("enrollments", models.IntegerField(default=0)),
+                ("sales", models.IntegerField(default=0)),
+                ("revenue", models.DecimalField(decimal_places=2, default=Decimal("0.00"), max_digits=12)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="income_rollups", to="courses.course"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Purchase Daily Rollup",
+                "verbose_name_plural": "Purchase Daily Rollups",
+                "unique_together": {("course", "day")},
+            },
+        ),
+        migrations.RunPython(backfill_purchase_daily_rollups, migrations.RunPython.noop),
+    ]
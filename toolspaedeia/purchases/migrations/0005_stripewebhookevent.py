@@ -0,0 +1,48 @@
+# Generated by Django 6.0.5 on 2026-10-19 15:33
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("purchases", "0004_purchasedailyrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StripeWebhookEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("event_id", models.CharField(max_length=255, unique=True)),
+                ("event_type", models.CharField(max_length=255)),
+                ("object_id", models.CharField(blank=True, max_length=255)),
+                ("stripe_created", models.DateTimeField()),
+                ("payload", models.JSONField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("PROCESSED", "Processed"),
+                            ("IGNORED", "Ignored"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="PENDING",
+                        max_length=20,
+                    ),
+                ),
+                ("error", models.TextField(blank=True)),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+                ("processed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name": "Stripe Webhook Event",
+                "verbose_name_plural": "Stripe Webhook Events",
+                "indexes": [
+                    models.Index(fields=["status", "stripe_created"], name="purchases_s_status_6a16ea_idx"),
+                    models.Index(fields=["object_id", "stripe_created"], name="purchases_s_object__d96a5a_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 6.0.5 on 2026-10-19 15:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("courses", "0026_coursesignature"),
+        ("purchases", "0005_stripewebhookevent"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CheckoutSession",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("price", models.DecimalField(decimal_places=2, max_digits=6)),
+                ("session_id", models.CharField(max_length=255, unique=True)),
+                ("url", models.URLField(max_length=2048)),
+                ("expires_at", models.DateTimeField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="checkout_sessions",
+                        to="courses.course",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="checkout_sessions",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Checkout Session",
+                "verbose_name_plural": "Checkout Sessions",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "course", "price", "expires_at"], name="purchases_c_user_id_ffbc70_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -1,5 +1,11 @@
+from collections import defaultdict
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
 
 class Purchase(models.Model):
@@ -28,3 +34,155 @@ class Purchase(models.Model):
         if self.course:
             return f"{self.state} purchase of {self.course.name} by {user_name} on {self.purchase_date}"
         return f"{self.state} purchase by {user_name} on {self.purchase_date}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous_values = self.stored_rollup_values()
+            super().save(*args, **kwargs)
+            current_values = (self.course_id, self.state, Decimal(str(self.amount)), self.purchase_date)
+            if previous_values == current_values:
+                return
+            if previous_values is not None:
+                PurchaseDailyRollup.record(*previous_values, sign=-1)
+            PurchaseDailyRollup.record(*current_values)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            previous_values = self.stored_rollup_values()
+            deleted = super().delete(*args, **kwargs)
+            if previous_values is not None:
+                PurchaseDailyRollup.record(*previous_values, sign=-1)
+        return deleted
+
+    def stored_rollup_values(self):
+        if self.pk is None:
+            return None
+        return (
+            Purchase.objects.select_for_update()
+            .filter(pk=self.pk)
+            .values_list("course_id", "state", "amount", "purchase_date")
+            .first()
+        )
+
+
+class PurchaseDailyRollup(models.Model):
+    course = models.ForeignKey("courses.Course", related_name="income_rollups", on_delete=models.CASCADE)
+    day = models.DateField()
+    enrollments = models.IntegerField(default=0)
+    sales = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal("0.00"))
+
+    class Meta:
+        unique_together = ("course", "day")
+        verbose_name = "Purchase Daily Rollup"
+        verbose_name_plural = "Purchase Daily Rollups"
+
+    def __str__(self) -> str:
+        return f"{self.course} - {self.day}: {self.enrollments} enrollments, {self.revenue} EUR"
+
+    @classmethod
+    def record(cls, course_id, state, amount, purchase_date, sign=1):
+        if course_id is None or state != Purchase.State.ACCEPTED:
+            return
+
+        amount = Decimal(str(amount))
+        rollup, _ = cls.objects.get_or_create(course_id=course_id, day=timezone.localdate(purchase_date))
+        cls.objects.filter(pk=rollup.pk).update(
+            enrollments=F("enrollments") + sign,
+            sales=F("sales") + (sign if amount > 0 else 0),
+            revenue=F("revenue") + sign * amount,
+        )
+
+    @classmethod
+    def apply_changes(cls, changes):
+        changes = {key: change for key, change in changes.items() if any(change)}
+        if not changes:
+            return
+
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                [cls(course_id=course_id, day=day) for course_id, day in changes],
+                ignore_conflicts=True,
+                batch_size=1000,
+            )
+            rollups = cls.objects.select_for_update().filter(
+                course_id__in={course_id for course_id, _ in changes}, day__in={day for _, day in changes}
+            )
+            updated_rollups = []
+            for rollup in rollups:
+                change = changes.get((rollup.course_id, rollup.day))
+                if change is None:
+                    continue
+                enrollments, sales, revenue = change
+                rollup.enrollments += enrollments
+                rollup.sales += sales
+                rollup.revenue += revenue
+                updated_rollups.append(rollup)
+            cls.objects.bulk_update(updated_rollups, ["enrollments", "sales", "revenue"], batch_size=1000)
+
+    @classmethod
+    def rebuild(cls):
+        totals = defaultdict(lambda: {"enrollments": 0, "sales": 0, "revenue": Decimal("0.00")})
+        accepted_purchases = Purchase.objects.filter(state=Purchase.State.ACCEPTED, course__isnull=False)
+        for course_id, amount, purchase_date in accepted_purchases.values_list(
+            "course_id", "amount", "purchase_date"
+        ).iterator():
+            rollup = totals[course_id, timezone.localdate(purchase_date)]
+            rollup["enrollments"] += 1
+            rollup["sales"] += amount > 0
+            rollup["revenue"] += amount
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [cls(course_id=course_id, day=day, **rollup) for (course_id, day), rollup in totals.items()],
+                batch_size=1000,
+            )
+        return len(totals)
+
+
+class CheckoutSession(models.Model):
+    user = models.ForeignKey(get_user_model(), related_name="checkout_sessions", on_delete=models.CASCADE)
+    course = models.ForeignKey("courses.Course", related_name="checkout_sessions", on_delete=models.CASCADE)
+    price = models.DecimalField(max_digits=6, decimal_places=2)
+    session_id = models.CharField(max_length=255, unique=True)
+    url = models.URLField(max_length=2048)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["user", "course", "price", "expires_at"])]
+        verbose_name = "Checkout Session"
+        verbose_name_plural = "Checkout Sessions"
+
+    def __str__(self) -> str:
+        return f"{self.user} - {self.course} ({self.session_id})"
+
+
+class StripeWebhookEvent(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        PROCESSED = "PROCESSED", "Processed"
+        IGNORED = "IGNORED", "Ignored"
+        FAILED = "FAILED", "Failed"
+
+    event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=255)
+    object_id = models.CharField(max_length=255, blank=True)
+    stripe_created = models.DateTimeField()
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "stripe_created"]),
+            models.Index(fields=["object_id", "stripe_created"]),
+        ]
+        verbose_name = "Stripe Webhook Event"
+        verbose_name_plural = "Stripe Webhook Events"
+
+    def __str__(self) -> str:
+        return f"{self.event_type} {self.event_id} - {self.get_status_display()}"
@@ -0,0 +1,63 @@
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+import stripe
+from django.conf import settings
+from django.utils import timezone
+
+from purchases.models import CheckoutSession
+
+CHECKOUT_SESSION_REUSE_MARGIN = timedelta(minutes=5)
+
+
+def configure_stripe():
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    stripe.api_base = settings.STRIPE_API_BASE
+    stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+    stripe.default_http_client = stripe.RequestsClient(
+        timeout=(settings.STRIPE_CONNECT_TIMEOUT, settings.STRIPE_READ_TIMEOUT)
+    )
+
+
+def open_checkout_session(request, course):
+    reusable_after = timezone.now() + CHECKOUT_SESSION_REUSE_MARGIN
+    checkout_session = (
+        CheckoutSession.objects.filter(
+            user=request.user, course=course, price=course.price, expires_at__gt=reusable_after
+        )
+        .order_by("-expires_at")
+        .first()
+    )
+    if checkout_session is not None:
+        return checkout_session
+
+    session = stripe.checkout.Session.create(
+        payment_method_types=["card"],
+        customer_email=request.user.email,
+        line_items=[
+            {
+                "price_data": {
+                    "currency": "eur",
+                    "product_data": {"name": course.name},
+                    "unit_amount": int(float(course.price) * 100),
+                },
+                "quantity": 1,
+            }
+        ],
+        mode="payment",
+        success_url=request.build_absolute_uri("/courses/purchased-courses/"),
+        cancel_url=request.build_absolute_uri("/courses/purchased-courses/"),
+        metadata={
+            "course_id": str(course.id),
+            "user_id": str(request.user.id),
+        },
+    )
+    return CheckoutSession.objects.create(
+        user=request.user,
+        course=course,
+        price=course.price,
+        session_id=session.id,
+        url=session.url,
+        expires_at=datetime.fromtimestamp(session.expires_at, tz=UTC),
+    )
@@ -0,0 +1,197 @@
+from collections import defaultdict
+from datetime import UTC
+from datetime import datetime
+from decimal import Decimal
+
+import stripe
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from courses.models import Course
+from purchases.models import Purchase
+from purchases.models import PurchaseDailyRollup
+from purchases.webhooks import checkout_updates_purchase
+
+RECONCILIATION_PAGE_SIZE = 100
+RECONCILIATION_BATCH_SIZE = 1000
+PAID_SESSION_STATUSES = {"paid", "no_payment_required"}
+
+
+def checkout_session_state(session):
+    if session.get("status") == "complete" and session.get("payment_status") in PAID_SESSION_STATUSES:
+        return Purchase.State.ACCEPTED
+    if session.get("status") == "expired":
+        return Purchase.State.REFUSED
+    return None
+
+
+def payment_intent_state(payment_intent):
+    if payment_intent.get("status") == "succeeded":
+        return Purchase.State.ACCEPTED
+    if payment_intent.get("status") == "canceled":
+        return Purchase.State.REFUSED
+    return None
+
+
+def payment_intent_refunded(payment_intent):
+    charge = payment_intent.get("latest_charge")
+    return isinstance(charge, dict) and (charge.get("refunded") or charge.get("amount_refunded", 0) > 0)
+
+
+def stripe_objects(resource, created_since=None, expand=None):
+    params = {"limit": RECONCILIATION_PAGE_SIZE}
+    if expand:
+        params["expand"] = expand
+    if created_since is not None:
+        params["created"] = {"gte": int(created_since.timestamp())}
+    for stripe_object in resource.list(**params).auto_paging_iter():
+        yield stripe_object.to_dict()
+
+
+def purchase_from_entry(entry, **fields):
+    return Purchase(
+        state=entry["state"], amount=entry["amount"], stripe_payment_id=entry["stripe_payment_id"], **fields
+    )
+
+
+class PaymentReconciliation:
+    def __init__(self):
+        self.index = {}
+        self.changed = {}
+        self.missing = {}
+        for pk, user_id, course_id, state, amount, payment_id in Purchase.objects.values_list(
+            "pk", "user_id", "course_id", "state", "amount", "stripe_payment_id"
+        ).iterator(chunk_size=RECONCILIATION_BATCH_SIZE):
+            entry = {"pk": pk, "state": state, "amount": amount, "stripe_payment_id": payment_id}
+            self.index[user_id, course_id] = entry
+            if payment_id:
+                self.index[payment_id] = entry
+
+    def apply(self, entry, state, amount, payment_id):
+        payment_id = payment_id or entry["stripe_payment_id"]
+        if (entry["state"], entry["amount"], entry["stripe_payment_id"]) == (state, amount, payment_id):
+            return
+        entry.update(state=state, amount=amount, stripe_payment_id=payment_id)
+        if entry["pk"] is not None:
+            self.changed[entry["pk"]] = entry
+
+    def match_checkout_session(self, session):
+        state = checkout_session_state(session)
+        metadata = session.get("metadata") or {}
+        payment_id = session.get("payment_intent")
+        entry = self.index.get(payment_id)
+        if entry is None and metadata.get("user_id") and metadata.get("course_id"):
+            key = (int(metadata["user_id"]), int(metadata["course_id"]))
+            entry = self.index.get(key)
+            if entry is not None and not checkout_updates_purchase(
+                entry["state"], entry["stripe_payment_id"], state, payment_id
+            ):
+                return
+            if entry is None and state is not None:
+                entry = {
+                    "pk": None,
+                    "state": None,
+                    "amount": None,
+                    "stripe_payment_id": None,
+                    "purchase_date": datetime.fromtimestamp(session["created"], tz=UTC),
+                    "confirmed": not payment_id,
+                }
+                self.index[key] = self.missing[key] = entry
+        if entry is None or state is None:
+            return
+        self.apply(entry, state, Decimal(session.get("amount_total") or 0) / 100, payment_id)
+        if payment_id:
+            self.index[payment_id] = entry
+
+    def match_payment_intent(self, payment_intent):
+        state = payment_intent_state(payment_intent)
+        entry = self.index.get(payment_intent["id"])
+        if entry is None or state is None or payment_intent_refunded(payment_intent):
+            return
+        entry["confirmed"] = True
+        self.apply(entry, state, Decimal(payment_intent["amount"]) / 100, payment_intent["id"])
+
+    def updated_purchases(self):
+        return [purchase_from_entry(entry, pk=pk) for pk, entry in self.changed.items()]
+
+    def new_purchases(self):
+        user_ids = {user_id for user_id, _ in self.missing}
+        course_ids = {course_id for _, course_id in self.missing}
+        existing_user_ids = set(get_user_model().objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        existing_course_ids = set(Course.objects.filter(pk__in=course_ids).values_list("pk", flat=True))
+        return [
+            purchase_from_entry(entry, user_id=user_id, course_id=course_id, purchase_date=entry["purchase_date"])
+            for (user_id, course_id), entry in self.missing.items()
+            if entry["confirmed"] and user_id in existing_user_ids and course_id in existing_course_ids
+        ]
+
+
+def backdate_purchases(purchase_dates):
+    stored_purchases = Purchase.objects.filter(
+        user_id__in={user_id for user_id, _ in purchase_dates},
+        course_id__in={course_id for _, course_id in purchase_dates},
+    ).only("pk", "user_id", "course_id")
+    backdated_purchases = []
+    for purchase in stored_purchases.iterator(chunk_size=RECONCILIATION_BATCH_SIZE):
+        purchase_date = purchase_dates.get((purchase.user_id, purchase.course_id))
+        if purchase_date is not None:
+            purchase.purchase_date = purchase_date
+            backdated_purchases.append(purchase)
+    Purchase.objects.bulk_update(backdated_purchases, ["purchase_date"], batch_size=RECONCILIATION_BATCH_SIZE)
+
+
+def add_rollup_change(rollup_changes, rollup_values, sign=1):
+    course_id, state, amount, purchase_date = rollup_values
+    if course_id is None or state != Purchase.State.ACCEPTED:
+        return
+    change = rollup_changes[course_id, timezone.localdate(purchase_date)]
+    change[0] += sign
+    change[1] += sign if amount > 0 else 0
+    change[2] += sign * amount
+
+
+def update_rollups(updated_purchases, new_purchases):
+    rollup_changes = defaultdict(lambda: [0, 0, Decimal("0.00")])
+    stored_purchases = (
+        Purchase.objects.select_for_update()
+        .filter(pk__in=[purchase.pk for purchase in updated_purchases])
+        .values_list("pk", "course_id", "state", "amount", "purchase_date")
+    )
+    stored_values = {pk: values for pk, *values in stored_purchases.iterator(chunk_size=RECONCILIATION_BATCH_SIZE)}
+    for purchase in updated_purchases:
+        if purchase.pk not in stored_values:
+            continue
+        course_id, state, amount, purchase_date = stored_values[purchase.pk]
+        add_rollup_change(rollup_changes, (course_id, state, amount, purchase_date), sign=-1)
+        add_rollup_change(rollup_changes, (course_id, purchase.state, purchase.amount, purchase_date))
+    for purchase in new_purchases:
+        add_rollup_change(rollup_changes, (purchase.course_id, purchase.state, purchase.amount, purchase.purchase_date))
+    PurchaseDailyRollup.apply_changes(rollup_changes)
+
+
+def reconcile_payments(created_since=None, *, dry_run=False):
+    reconciliation = PaymentReconciliation()
+    for session in stripe_objects(stripe.checkout.Session, created_since):
+        reconciliation.match_checkout_session(session)
+    for payment_intent in stripe_objects(stripe.PaymentIntent, created_since, expand=["data.latest_charge"]):
+        reconciliation.match_payment_intent(payment_intent)
+
+    updated_purchases = reconciliation.updated_purchases()
+    new_purchases = reconciliation.new_purchases()
+    if not dry_run and (updated_purchases or new_purchases):
+        with transaction.atomic():
+            # Locks the updated purchases and applies only their changes to
+            # the income rollups, like Purchase.save() does.
+            update_rollups(updated_purchases, new_purchases)
+            Purchase.objects.bulk_update(
+                updated_purchases, ["state", "amount", "stripe_payment_id"], batch_size=RECONCILIATION_BATCH_SIZE
+            )
+            # bulk_create stamps purchase_date with the current time,
+            # so restore the checkout dates for the income rollups.
+            purchase_dates = {
+                (purchase.user_id, purchase.course_id): purchase.purchase_date for purchase in new_purchases
+            }
+            Purchase.objects.bulk_create(new_purchases, batch_size=RECONCILIATION_BATCH_SIZE)
+            backdate_purchases(purchase_dates)
+    return len(updated_purchases), len(new_purchases)
@@ -0,0 +1,8 @@
+from django.tasks import task
+
+from purchases.webhooks import process_pending_webhook_events
+
+
+@task
+def process_stripe_webhook_events_task():
+    return process_pending_webhook_events()
@@ -1,15 +1,41 @@
+import csv
+import hashlib
+import hmac
+import io
+import json
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
 from unittest.mock import MagicMock
 from unittest.mock import patch
+from urllib.parse import parse_qs
+from urllib.parse import urlsplit
 
 import stripe
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.db import connection
+from django.test import TestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django_webtest import WebTest
 
 from courses.models import Course
 from courses.models import Module
+from purchases.models import CheckoutSession
 from purchases.models import Purchase
+from purchases.models import PurchaseDailyRollup
+from purchases.models import StripeWebhookEvent
+from purchases.webhooks import process_pending_webhook_events
+from taskqueue.models import QueuedTask
+from taskqueue.worker import run_worker
 
 
 class PurchasesIntegrationWebTests(WebTest):
@@ -250,6 +276,48 @@ class PurchasesIntegrationWebTests(WebTest):
         self.assertIn(free_module2_url, urls)
 
 
+class StripeStandIn(ThreadingHTTPServer):
+    def __init__(self, routes):
+        super().__init__(("127.0.0.1", 0), StripeStandInHandler)
+        self.routes = routes
+        self.requests = []
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def api_base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *_exc_info):
+        self.shutdown()
+        self.server_close()
+
+
+class StripeStandInHandler(BaseHTTPRequestHandler):
+    def respond(self, params):
+        path = urlsplit(self.path).path
+        self.server.requests.append((self.command, path, params))
+        body = json.dumps(self.server.routes[self.command, path](params)).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.respond(parse_qs(urlsplit(self.path).query))
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.respond(parse_qs(self.rfile.read(length).decode()))
+
+    def log_message(self, *_args):
+        pass
+
+
 class EnrollmentDialogIntegrationTests(WebTest):
     csrf_checks = False
 
@@ -598,3 +666,525 @@ class PublisherIncomeIntegrationTests(WebTest):
         self.assertNotIn("Course 2", response.text)
         self.assertNotIn("Free Course", response.text)
         self.assertIn("25", response.text)
+
+    def test_publisher_income_totals_come_from_rollups(self):
+        PurchaseDailyRollup.objects.create(
+            course=self.course2, day="2026-01-05", enrollments=40, sales=38, revenue=Decimal("1900.00")
+        )
+
+        self.app.set_user(self.publisher.username)
+        response = self.app.get(reverse("purchases:publisher_income"))
+
+        self.assertEqual(response.context["total_income"], Decimal("1900.00"))
+        self.assertEqual(response.context["total_sales"], 38)
+        self.assertEqual(response.context["total_enrollments"], 40)
+        self.assertEqual(response.context["distinct_courses"], {"Course 2": Decimal("1900.00")})
+
+    def test_publisher_income_sales_list_is_paginated(self):
+        for index in range(30):
+            buyer = get_user_model().objects.create_user(username=f"buyer{index}", password="buyer-pass")  # noqa: S106
+            Purchase.objects.create(user=buyer, course=self.course1, amount=25.00, state=Purchase.State.ACCEPTED)
+
+        self.app.set_user(self.publisher.username)
+        first_page = self.app.get(reverse("purchases:publisher_income"))
+        second_page = self.app.get(reverse("purchases:publisher_income"), params={"page": 2})
+
+        self.assertEqual(len(first_page.context["purchases"]), 25)
+        self.assertEqual(len(second_page.context["purchases"]), 5)
+        self.assertEqual(first_page.context["total_enrollments"], 30)
+        self.assertIn("Page 1 of 2", first_page.text)
+
+    def test_publisher_income_series_is_bucketed_from_rollups(self):
+        today = timezone.localdate()
+        for days_ago, course, revenue in [
+            (0, self.course1, "25.00"),
+            (0, self.course2, "50.00"),
+            (40, self.course1, "25.00"),
+        ]:
+            PurchaseDailyRollup.objects.create(
+                course=course, day=today - timedelta(days=days_ago), enrollments=1, sales=1, revenue=Decimal(revenue)
+            )
+        PurchaseDailyRollup.objects.create(
+            course=self.other_course, day=today, enrollments=1, sales=1, revenue=Decimal("100.00")
+        )
+
+        self.app.set_user(self.publisher.username)
+        daily = self.app.get(reverse("purchases:publisher_income_series"), params={"bucket": "day"})
+        monthly = self.app.get(reverse("purchases:publisher_income_series"))
+
+        self.assertEqual(
+            [(row["period"], row["revenue"]) for row in daily.context["series"]],
+            [(today - timedelta(days=40), Decimal("25.00")), (today, Decimal("75.00"))],
+        )
+        self.assertEqual(sum(row["enrollments"] for row in monthly.context["series"]), 3)
+        self.assertEqual(monthly.context["series"][len(monthly.context["series"]) - 1]["period"], today.replace(day=1))
+
+    def test_publisher_income_series_rejects_unknown_bucket(self):
+        self.app.set_user(self.publisher.username)
+        response = self.app.get(
+            reverse("purchases:publisher_income_series"), params={"bucket": "hour"}, expect_errors=True
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_publisher_income_export_streams_accepted_purchases(self):
+        Purchase.objects.create(user=self.student, course=self.course1, amount=25.00)
+        Purchase.objects.create(user=self.student, course=self.course2, amount=50.00, state=Purchase.State.PENDING)
+        Purchase.objects.create(user=self.student, course=self.other_course, amount=100.00)
+
+        self.client.force_login(self.publisher)
+        response = self.client.get(reverse("purchases:publisher_income_export"))
+        rows = list(csv.reader(line.decode() for line in response.streaming_content))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertEqual(rows[0], ["purchase_date", "course_id", "course", "amount_eur"])
+        self.assertEqual([row[1:] for row in rows[1:]], [[str(self.course1.pk), "Course 1", "25.00"]])
+
+    def test_publisher_income_export_of_series(self):
+        PurchaseDailyRollup.objects.create(
+            course=self.course1, day=timezone.localdate(), enrollments=2, sales=1, revenue=Decimal("25.00")
+        )
+
+        self.app.set_user(self.publisher.username)
+        response = self.app.get(reverse("purchases:publisher_income_export"), params={"bucket": "week"})
+
+        self.assertIn('filename="income-by-week.csv"', response.headers["Content-Disposition"])
+        self.assertEqual(response.text.splitlines()[1].split(",")[1:], ["2", "1", "25.00"])
+
+
+class PurchaseDailyRollupTests(TestCase):
+    def setUp(self):
+        self.student = get_user_model().objects.create_user(username="student", password="student-pass")  # noqa: S106
+        self.course = Course.objects.create(name="Course", description="Paid", price=25.00, is_draft=False)
+
+    def rollup_totals(self):
+        return list(PurchaseDailyRollup.objects.values_list("enrollments", "sales", "revenue"))
+
+    def test_rollups_follow_purchase_state_transitions(self):
+        purchase = Purchase.objects.create(
+            user=self.student, course=self.course, amount=25.00, state=Purchase.State.PENDING
+        )
+        self.assertEqual(self.rollup_totals(), [])
+
+        purchase.state = Purchase.State.ACCEPTED
+        purchase.save()
+        self.assertEqual(self.rollup_totals(), [(1, 1, Decimal("25.00"))])
+
+        purchase.save()
+        self.assertEqual(self.rollup_totals(), [(1, 1, Decimal("25.00"))])
+
+        purchase.delete()
+        self.assertEqual(self.rollup_totals(), [(0, 0, Decimal("0.00"))])
+
+    def test_free_enrollments_count_without_sales(self):
+        Purchase.objects.update_or_create(
+            user=self.student, course=self.course, defaults={"amount": 0, "state": Purchase.State.ACCEPTED}
+        )
+
+        self.assertEqual(self.rollup_totals(), [(1, 0, Decimal("0.00"))])
+
+    def test_rebuild_command_recomputes_rollups(self):
+        Purchase.objects.create(user=self.student, course=self.course, amount=25.00)
+        Purchase.objects.update(amount=30)
+
+        call_command("rebuild_income_rollups", stdout=io.StringIO())
+
+        self.assertEqual(self.rollup_totals(), [(1, 1, Decimal("30.00"))])
+        self.assertEqual(PurchaseDailyRollup.objects.get().day, timezone.localdate())
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET="whsec_test")  # noqa: S106
+class StripeWebhookTests(TestCase):
+    def setUp(self):
+        self.student = get_user_model().objects.create_user(username="student", password="student-pass")  # noqa: S106
+        self.course = Course.objects.create(name="Course", description="Paid", price=25.00, is_draft=False)
+
+    def build_event(self, event_id, event_type, created, session_id="cs_test_1", payment_id="pi_test_1"):
+        return {
+            "id": event_id,
+            "object": "event",
+            "type": event_type,
+            "created": created,
+            "data": {
+                "object": {
+                    "id": session_id,
+                    "object": "checkout.session",
+                    "amount_total": 2500,
+                    "payment_intent": payment_id,
+                    "metadata": {"course_id": str(self.course.id), "user_id": str(self.student.id)},
+                }
+            },
+        }
+
+    def post_event(self, event, secret="whsec_test"):  # noqa: S107
+        payload = json.dumps(event)
+        timestamp = int(time.time())
+        digest = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+        return self.client.post(
+            reverse("purchases:stripe_webhook"),
+            data=payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=f"t={timestamp},v1={digest}",
+        )
+
+    def test_webhook_acknowledges_before_processing(self):
+        CheckoutSession.objects.create(
+            user=self.student,
+            course=self.course,
+            price=self.course.price,
+            session_id="cs_test_1",
+            url="https://checkout.stripe.com/c/pay/cs_test_1",
+            expires_at=timezone.now() + timedelta(hours=1),
+        )
+        response = self.post_event(self.build_event("evt_1", "checkout.session.completed", 100))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Purchase.objects.exists())
+        self.assertEqual(StripeWebhookEvent.objects.get().status, StripeWebhookEvent.Status.PENDING)
+
+        run_worker("test-worker", ["default"], max_tasks=1)
+
+        purchase = Purchase.objects.get()
+        self.assertEqual(purchase.state, Purchase.State.ACCEPTED)
+        self.assertEqual(purchase.amount, Decimal("25.00"))
+        self.assertEqual(purchase.stripe_payment_id, "pi_test_1")
+        self.assertEqual(StripeWebhookEvent.objects.get().status, StripeWebhookEvent.Status.PROCESSED)
+        self.assertFalse(CheckoutSession.objects.exists())
+
+    def test_duplicate_deliveries_are_recorded_once(self):
+        event = self.build_event("evt_1", "checkout.session.completed", 100)
+
+        self.assertEqual(self.post_event(event).status_code, 200)
+        self.assertEqual(self.post_event(event).status_code, 200)
+
+        self.assertEqual(StripeWebhookEvent.objects.count(), 1)
+        self.assertEqual(QueuedTask.objects.count(), 1)
+
+    def test_invalid_signature_is_rejected(self):
+        response = self.post_event(self.build_event("evt_1", "checkout.session.completed", 100), secret="whsec_other")  # noqa: S106
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StripeWebhookEvent.objects.exists())
+
+    def test_out_of_order_events_apply_in_creation_order(self):
+        self.post_event(self.build_event("evt_2", "checkout.session.async_payment_succeeded", 200))
+        self.post_event(self.build_event("evt_1", "checkout.session.async_payment_failed", 100))
+
+        run_worker("test-worker", ["default"], max_tasks=2)
+
+        self.assertEqual(Purchase.objects.get().state, Purchase.State.ACCEPTED)
+
+    def test_stale_event_does_not_override_newer_processed_event(self):
+        self.post_event(self.build_event("evt_2", "checkout.session.completed", 200))
+        run_worker("test-worker", ["default"], max_tasks=1)
+
+        self.post_event(self.build_event("evt_1", "checkout.session.expired", 100))
+        run_worker("test-worker", ["default"], max_tasks=1)
+
+        self.assertEqual(Purchase.objects.get().state, Purchase.State.ACCEPTED)
+        self.assertEqual(StripeWebhookEvent.objects.get(event_id="evt_1").status, StripeWebhookEvent.Status.IGNORED)
+
+    def test_failing_event_does_not_block_later_events(self):
+        broken_event = self.build_event("evt_1", "checkout.session.completed", 100)
+        broken_event["data"]["object"]["metadata"]["user_id"] = "not-a-user"
+        self.post_event(broken_event)
+        self.post_event(self.build_event("evt_2", "checkout.session.completed", 200))
+
+        with self.assertLogs("purchases.webhooks", level="ERROR"):
+            run_worker("test-worker", ["default"], max_tasks=2)
+
+        self.assertEqual(StripeWebhookEvent.objects.get(event_id="evt_1").status, StripeWebhookEvent.Status.FAILED)
+        self.assertEqual(StripeWebhookEvent.objects.get(event_id="evt_2").status, StripeWebhookEvent.Status.PROCESSED)
+        self.assertEqual(Purchase.objects.get().state, Purchase.State.ACCEPTED)
+
+    def test_event_is_marked_failed_when_its_transaction_fails(self):
+        self.post_event(self.build_event("evt_1", "checkout.session.completed", 100))
+
+        with (
+            patch.object(StripeWebhookEvent, "save", side_effect=IntegrityError("FOREIGN KEY constraint failed")),
+            self.assertLogs("purchases.webhooks", level="ERROR"),
+        ):
+            process_pending_webhook_events()
+
+        event = StripeWebhookEvent.objects.get()
+        self.assertEqual(event.status, StripeWebhookEvent.Status.FAILED)
+        self.assertIn("FOREIGN KEY", event.error)
+        self.assertFalse(Purchase.objects.exists())
+
+    def test_abandoned_session_does_not_override_paid_purchase(self):
+        self.post_event(self.build_event("evt_1", "checkout.session.completed", 100, "cs_paid", "pi_paid"))
+        run_worker("test-worker", ["default"], max_tasks=1)
+
+        self.post_event(self.build_event("evt_2", "checkout.session.expired", 200, "cs_abandoned", None))
+        self.post_event(self.build_event("evt_3", "checkout.session.async_payment_failed", 300, "cs_other", "pi_other"))
+        run_worker("test-worker", ["default"], max_tasks=2)
+
+        purchase = Purchase.objects.get()
+        self.assertEqual((purchase.state, purchase.stripe_payment_id), (Purchase.State.ACCEPTED, "pi_paid"))
+        self.assertEqual(
+            set(StripeWebhookEvent.objects.filter(event_id__in=["evt_2", "evt_3"]).values_list("status", flat=True)),
+            {StripeWebhookEvent.Status.IGNORED},
+        )
+
+    def test_unknown_event_types_are_ignored(self):
+        self.post_event(self.build_event("evt_1", "customer.created", 100))
+        run_worker("test-worker", ["default"], max_tasks=1)
+
+        self.assertFalse(Purchase.objects.exists())
+        self.assertEqual(StripeWebhookEvent.objects.get().status, StripeWebhookEvent.Status.IGNORED)
+
+
+class CheckoutSessionReuseTests(WebTest):
+    def setUp(self):
+        self.student = get_user_model().objects.create_user(
+            username="student",
+            email="student@example.com",
+            password="student-pass",  # noqa: S106
+        )
+        self.course = Course.objects.create(name="Paid Course", description="Paid", price=25.00, is_draft=False)
+        self.expires_at = int((timezone.now() + timedelta(hours=24)).timestamp())
+        self.stand_in = StripeStandIn({("POST", "/v1/checkout/sessions"): self.create_session})
+        self.enterContext(self.stand_in)
+        self.enterContext(patch.object(stripe, "api_base", self.stand_in.api_base))
+        self.enterContext(patch.object(stripe, "api_key", "sk_test_stand_in"))
+
+    def create_session(self, _params):
+        session_id = f"cs_test_{len(self.stand_in.requests)}"
+        return {
+            "id": session_id,
+            "object": "checkout.session",
+            "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+            "expires_at": self.expires_at,
+        }
+
+    def open_dialog(self):
+        self.app.set_user(self.student.username)
+        return self.app.get(reverse("purchases:enrollment_dialog"), params={"course_id": self.course.id})
+
+    def test_open_session_is_reused(self):
+        first = self.open_dialog()
+        second = self.open_dialog()
+
+        self.assertEqual(len(self.stand_in.requests), 1)
+        self.assertIn("https://checkout.stripe.com/c/pay/cs_test_1", first.text)
+        self.assertIn("https://checkout.stripe.com/c/pay/cs_test_1", second.text)
+        method, path, params = self.stand_in.requests[0]
+        self.assertEqual((method, path), ("POST", "/v1/checkout/sessions"))
+        self.assertEqual(params["metadata[course_id]"], [str(self.course.id)])
+        self.assertEqual(params["line_items[0][price_data][unit_amount]"], ["2500"])
+
+    def test_price_change_opens_new_session(self):
+        self.open_dialog()
+        self.course.price = Decimal("30.00")
+        self.course.save()
+        response = self.open_dialog()
+
+        self.assertEqual(len(self.stand_in.requests), 2)
+        self.assertIn("cs_test_2", response.text)
+
+    def test_expiring_session_is_replaced(self):
+        self.expires_at = int((timezone.now() + timedelta(minutes=1)).timestamp())
+        self.open_dialog()
+        self.open_dialog()
+
+        self.assertEqual(len(self.stand_in.requests), 2)
+        self.assertEqual(CheckoutSession.objects.count(), 2)
+
+
+def stripe_list_route(path, objects):
+    def list_objects(params):
+        start = 0
+        if "starting_after" in params:
+            start = [stripe_object["id"] for stripe_object in objects].index(params["starting_after"][0]) + 1
+        limit = int(params["limit"][0])
+        return {
+            "object": "list",
+            "url": path,
+            "data": objects[start : start + limit],
+            "has_more": start + limit < len(objects),
+        }
+
+    return ("GET", path), list_objects
+
+
+class ReconcilePaymentsTests(TestCase):
+    def setUp(self):
+        self.student = get_user_model().objects.create_user(username="student", password="student-pass")  # noqa: S106
+        self.buyer = get_user_model().objects.create_user(username="buyer", password="buyer-pass")  # noqa: S106
+        self.course = Course.objects.create(name="Course", description="Paid", price=25.00, is_draft=False)
+        self.free_course = Course.objects.create(name="Free", description="Free", price=0, is_draft=False)
+        self.checkout_sessions = []
+        self.payment_intents = []
+        self.enterContext(patch.object(stripe, "api_key", "sk_test_stand_in"))
+
+    def reconcile(self, *args):
+        stand_in = StripeStandIn(
+            dict(
+                [
+                    stripe_list_route("/v1/checkout/sessions", self.checkout_sessions),
+                    stripe_list_route("/v1/payment_intents", self.payment_intents),
+                ]
+            )
+        )
+        output = io.StringIO()
+        with stand_in, patch.object(stripe, "api_base", stand_in.api_base):
+            call_command("reconcile_payments", *args, stdout=output)
+        return output.getvalue(), stand_in.requests
+
+    def add_payment_intent(self, payment_id, status, amount=2500, amount_refunded=0):
+        self.payment_intents.append(
+            {
+                "id": payment_id,
+                "object": "payment_intent",
+                "status": status,
+                "amount": amount,
+                "latest_charge": {"id": f"ch_{payment_id}", "object": "charge", "amount_refunded": amount_refunded},
+            }
+        )
+
+    def add_checkout_session(self, session_id, user, course, status, **fields):
+        self.checkout_sessions.append(
+            {
+                "id": session_id,
+                "object": "checkout.session",
+                "created": int(timezone.now().timestamp()),
+                "payment_intent": None,
+                "status": status,
+                "payment_status": "paid" if status == "complete" else "unpaid",
+                "amount_total": 2500,
+                "metadata": {"user_id": str(user.id), "course_id": str(course.id)},
+                **fields,
+            }
+        )
+
+    def test_pending_purchases_follow_payment_intents(self):
+        accepted = Purchase.objects.create(
+            user=self.student, course=self.course, amount=25, state=Purchase.State.PENDING, stripe_payment_id="pi_1"
+        )
+        refused = Purchase.objects.create(
+            user=self.buyer, course=self.course, amount=25, state=Purchase.State.PENDING, stripe_payment_id="pi_2"
+        )
+        self.add_payment_intent("pi_1", "succeeded")
+        self.add_payment_intent("pi_2", "canceled")
+        self.add_payment_intent("pi_unknown", "succeeded")
+
+        output, _ = self.reconcile()
+
+        self.assertIn("Updated 2 purchases and created 0 missing purchases.", output)
+        accepted.refresh_from_db()
+        refused.refresh_from_db()
+        self.assertEqual(accepted.state, Purchase.State.ACCEPTED)
+        self.assertEqual(refused.state, Purchase.State.REFUSED)
+        self.assertEqual(
+            list(PurchaseDailyRollup.objects.values_list("enrollments", "sales", "revenue")),
+            [(1, 1, Decimal("25.00"))],
+        )
+
+    def test_only_rollups_of_changed_purchases_are_updated(self):
+        Purchase.objects.create(user=self.buyer, course=self.free_course, amount=0)
+        PurchaseDailyRollup.objects.filter(course=self.free_course).update(enrollments=5)
+        Purchase.objects.create(
+            user=self.student, course=self.course, amount=25, state=Purchase.State.PENDING, stripe_payment_id="pi_1"
+        )
+        self.add_payment_intent("pi_1", "succeeded")
+
+        self.reconcile()
+
+        self.assertEqual(
+            dict(PurchaseDailyRollup.objects.values_list("course", "enrollments")),
+            {self.free_course.pk: 5, self.course.pk: 1},
+        )
+
+    def test_completed_checkout_session_creates_missing_purchase(self):
+        self.add_checkout_session("cs_1", self.buyer, self.course, "complete", payment_intent="pi_1")
+        self.add_payment_intent("pi_1", "succeeded")
+
+        output, _ = self.reconcile()
+
+        self.assertIn("created 1 missing purchases", output)
+        purchase = Purchase.objects.get()
+        self.assertEqual(
+            (purchase.user, purchase.course, purchase.state, purchase.amount, purchase.stripe_payment_id),
+            (self.buyer, self.course, Purchase.State.ACCEPTED, Decimal("25.00"), "pi_1"),
+        )
+
+    def test_recreated_purchase_keeps_checkout_date(self):
+        paid_at = timezone.now() - timedelta(days=10)
+        self.add_checkout_session(
+            "cs_1", self.buyer, self.course, "complete", payment_intent="pi_1", created=int(paid_at.timestamp())
+        )
+        self.add_payment_intent("pi_1", "succeeded")
+
+        self.reconcile()
+
+        self.assertEqual(Purchase.objects.get().purchase_date.replace(microsecond=0), paid_at.replace(microsecond=0))
+        self.assertEqual(
+            list(PurchaseDailyRollup.objects.values_list("day", "revenue")),
+            [(timezone.localdate(paid_at), Decimal("25.00"))],
+        )
+
+    def test_refunded_purchase_is_not_recreated(self):
+        Purchase.objects.create(
+            user=self.buyer, course=self.course, amount=25, state=Purchase.State.ACCEPTED, stripe_payment_id="pi_1"
+        )
+        self.client.force_login(self.buyer)
+        with patch.object(stripe.Refund, "create"):
+            self.client.post(reverse("purchases:create_refund"), {"course_id": self.course.id})
+        self.assertFalse(Purchase.objects.exists())
+        self.add_checkout_session("cs_1", self.buyer, self.course, "complete", payment_intent="pi_1")
+        self.add_payment_intent("pi_1", "succeeded", amount_refunded=2500)
+
+        output, _ = self.reconcile()
+
+        self.assertIn("created 0 missing purchases", output)
+        self.assertFalse(Purchase.objects.exists())
+
+    def test_expired_session_does_not_revoke_enrollment(self):
+        Purchase.objects.create(user=self.student, course=self.free_course, amount=0)
+        self.add_checkout_session("cs_1", self.student, self.free_course, "expired")
+
+        output, _ = self.reconcile()
+
+        self.assertIn("Updated 0 purchases", output)
+        self.assertEqual(Purchase.objects.get().state, Purchase.State.ACCEPTED)
+
+    def test_dry_run_saves_nothing(self):
+        Purchase.objects.create(
+            user=self.student, course=self.course, amount=25, state=Purchase.State.PENDING, stripe_payment_id="pi_1"
+        )
+        self.add_payment_intent("pi_1", "succeeded")
+
+        output, _ = self.reconcile("--dry-run")
+
+        self.assertIn("Would update 1 purchases", output)
+        self.assertEqual(Purchase.objects.get().state, Purchase.State.PENDING)
+
+    def test_large_reconciliation_pages_and_updates_in_bulk(self):
+        courses = Course.objects.bulk_create(
+            [Course(name=f"Course {index}", description="Paid", price=25.00) for index in range(250)]
+        )
+        Purchase.objects.bulk_create(
+            [
+                Purchase(
+                    user=self.student,
+                    course=course,
+                    amount=25,
+                    state=Purchase.State.PENDING,
+                    stripe_payment_id=f"pi_{course.id}",
+                )
+                for course in courses
+            ]
+        )
+        for course in courses:
+            self.add_payment_intent(f"pi_{course.id}", "succeeded")
+
+        with CaptureQueriesContext(connection) as queries:
+            output, requests = self.reconcile()
+
+        self.assertIn("Updated 250 purchases", output)
+        self.assertEqual(Purchase.objects.filter(state=Purchase.State.ACCEPTED).count(), 250)
+        self.assertLess(len(queries), 20)
+        intent_pages = [params for method, path, params in requests if path == "/v1/payment_intents"]
+        self.assertEqual(len(intent_pages), 3)
+        self.assertEqual({page["limit"][0] for page in intent_pages}, {"100"})
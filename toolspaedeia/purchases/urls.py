@@ -3,6 +3,8 @@ from django.urls import path
 from purchases.views import CreateRefundView
 from purchases.views import EnrollCourseView
 from purchases.views import EnrollmentDialogView
+from purchases.views import PublisherIncomeExportView
+from purchases.views import PublisherIncomeSeriesView
 from purchases.views import PublisherIncomeView
 from purchases.views import PurchasedContentOfflineMapView
 from purchases.views import StripeWebhookView
@@ -11,6 +13,8 @@ app_name = "purchases"
 
 urlpatterns = [
     path("income/", PublisherIncomeView.as_view(), name="publisher_income"),
+    path("income/series/", PublisherIncomeSeriesView.as_view(), name="publisher_income_series"),
+    path("income/export/", PublisherIncomeExportView.as_view(), name="publisher_income_export"),
     path("offline-map/", PurchasedContentOfflineMapView.as_view(), name="offline_map"),
     path("enrollment-dialog/", EnrollmentDialogView.as_view(), name="enrollment_dialog"),
     path("enroll-course/", EnrollCourseView.as_view(), name="enroll_course"),
@@ -1,17 +1,26 @@
 import contextlib
+import csv
+import json
+from datetime import timedelta
+from itertools import chain
 
 import stripe
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.db.models import F
 from django.db.models import Sum
+from django.db.models.functions import TruncMonth
+from django.db.models.functions import TruncWeek
 from django.http import HttpResponse
 from django.http import JsonResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.shortcuts import redirect
 from django.template.loader import render_to_string
 from django.urls import reverse
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
@@ -21,9 +30,37 @@ from django.views.generic import ListView
 from courses.models import Course
 from courses.models import Module
 from purchases.models import Purchase
+from purchases.models import PurchaseDailyRollup
+from purchases.payments import open_checkout_session
+from purchases.tasks import process_stripe_webhook_events_task
+from purchases.webhooks import record_webhook_event
 from toolspaedeia.mixins import TitledViewMixin
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
+INCOME_SERIES_BUCKETS = {
+    "day": (F, 90),
+    "week": (TruncWeek, 52 * 7),
+    "month": (TruncMonth, None),
+}
+INCOME_EXPORT_CHUNK_SIZE = 2000
+
+
+class CsvEcho:
+    def write(self, value):
+        return value
+
+
+def publisher_income_series(publisher, bucket):
+    truncate, lookback_days = INCOME_SERIES_BUCKETS[bucket]
+    rollups = PurchaseDailyRollup.objects.filter(course__publisher=publisher)
+    if lookback_days is not None:
+        rollups = rollups.filter(day__gt=timezone.localdate() - timedelta(days=lookback_days))
+    return (
+        rollups.annotate(period=truncate("day"))
+        .values("period")
+        .annotate(enrollments=Sum("enrollments"), sales=Sum("sales"), revenue=Sum("revenue"))
+        .filter(enrollments__gt=0)
+        .order_by("period")
+    )
 
 
 class PublisherIncomeView(TitledViewMixin, LoginRequiredMixin, PermissionRequiredMixin, ListView):
@@ -33,40 +70,108 @@ class PublisherIncomeView(TitledViewMixin, LoginRequiredMixin, PermissionRequire
     login_url = "users:login"
     permission_required = "courses.add_course"
 
+    paginate_by = 25
+
     def get_queryset(self):
         return (
             Purchase.objects.filter(
                 state=Purchase.State.ACCEPTED,
                 course__publisher=self.request.user,
             )
-            .values("course_id", "course__name", "amount")
-            .order_by("-amount", "course__name")
+            .values("course_id", "course__name", "amount", "purchase_date")
+            .order_by("-purchase_date", "-pk")
         )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        purchases = Purchase.objects.filter(
-            state=Purchase.State.ACCEPTED,
-            course__publisher=self.request.user,
-        )
-
-        context["total_enrollments"] = purchases.count()
+        rollups = PurchaseDailyRollup.objects.filter(course__publisher=self.request.user)
 
-        totals = purchases.aggregate(total_income=Sum("amount"))
+        totals = rollups.aggregate(
+            total_enrollments=Sum("enrollments"),
+            total_income=Sum("revenue"),
+            total_sales=Sum("sales"),
+        )
+        context["total_enrollments"] = totals["total_enrollments"] or 0
         context["total_income"] = totals["total_income"] or 0
-
-        context["total_sales"] = purchases.filter(amount__gt=0).count()
+        context["total_sales"] = totals["total_sales"] or 0
 
         context["distinct_courses"] = dict(
-            purchases.values("course__name")
-            .annotate(total_amount=Sum("amount"))
+            rollups.values("course__name")
+            .annotate(total_amount=Sum("revenue"), total_enrollments=Sum("enrollments"))
+            .filter(total_enrollments__gt=0)
             .values_list("course__name", "total_amount")
         )
 
         return context
 
 
+class PublisherIncomeSeriesView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    http_method_names = ["get"]
+    login_url = "users:login"
+    permission_required = "courses.add_course"
+
+    def get(self, request):
+        bucket = request.GET.get("bucket", "month")
+        if bucket not in INCOME_SERIES_BUCKETS:
+            return HttpResponse("Invalid bucket", status=400)
+
+        context = {
+            "bucket": bucket,
+            "buckets": list(INCOME_SERIES_BUCKETS),
+            "series": publisher_income_series(request.user, bucket),
+        }
+        html = render_to_string("purchases/partials/income_series.html", context, request=request)
+        return HttpResponse(html)
+
+
+class PublisherIncomeExportView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    http_method_names = ["get"]
+    login_url = "users:login"
+    permission_required = "courses.add_course"
+
+    def get(self, request):
+        bucket = request.GET.get("bucket")
+        if bucket is None:
+            filename = "income.csv"
+            rows = self.purchase_rows(request.user)
+        elif bucket in INCOME_SERIES_BUCKETS:
+            filename = f"income-by-{bucket}.csv"
+            rows = self.series_rows(request.user, bucket)
+        else:
+            return HttpResponse("Invalid bucket", status=400)
+
+        writer = csv.writer(CsvEcho())
+        response = StreamingHttpResponse((writer.writerow(row) for row in rows), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def purchase_rows(self, publisher):
+        purchases = (
+            Purchase.objects.filter(state=Purchase.State.ACCEPTED, course__publisher=publisher)
+            .order_by("purchase_date", "pk")
+            .values_list("purchase_date", "course_id", "course__name", "amount")
+            .iterator(chunk_size=INCOME_EXPORT_CHUNK_SIZE)
+        )
+        return chain(
+            [("purchase_date", "course_id", "course", "amount_eur")],
+            (
+                (purchase_date.isoformat(), course_id, course_name, amount)
+                for purchase_date, course_id, course_name, amount in purchases
+            ),
+        )
+
+    def series_rows(self, publisher, bucket):
+        series = publisher_income_series(publisher, bucket).values_list("period", "enrollments", "sales", "revenue")
+        return chain(
+            [("period", "enrollments", "sales", "revenue_eur")],
+            (
+                (period.isoformat(), enrollments, sales, f"{revenue:.2f}")
+                for period, enrollments, sales, revenue in series.iterator(chunk_size=INCOME_EXPORT_CHUNK_SIZE)
+            ),
+        )
+
+
 class EnrollCourseView(LoginRequiredMixin, CreateView):
     http_method_names = ["post"]
     model = Purchase
@@ -159,32 +264,18 @@ class PurchasedContentOfflineMapView(LoginRequiredMixin, View):
 class StripeWebhookView(View):
     http_method_names = ["post"]
 
-    PAYMENT_COMPLETE_EVENTS = {"checkout.session.completed", "checkout.session.async_payment_succeeded"}
-    PAYMENT_FAILED_EVENTS = {"checkout.session.async_payment_failed", "checkout.session.expired"}
-
     def post(self, request):
         payload = request.body
         signature = request.META.get("HTTP_STRIPE_SIGNATURE", "")
         webhook_secret = settings.STRIPE_WEBHOOK_SECRET
 
-        webhook_event = stripe.Webhook.construct_event(payload, signature, webhook_secret)
-        course_id = webhook_event.data.object.metadata.course_id
-        user_id = webhook_event.data.object.metadata.user_id
-        state = None
-        if webhook_event.type in self.PAYMENT_COMPLETE_EVENTS:
-            state = Purchase.State.ACCEPTED
-        elif webhook_event.type in self.PAYMENT_FAILED_EVENTS:
-            state = Purchase.State.REFUSED
+        try:
+            stripe.Webhook.construct_event(payload, signature, webhook_secret)
+        except (ValueError, stripe.SignatureVerificationError):
+            return HttpResponse(status=400)
 
-        Purchase.objects.update_or_create(
-            user_id=user_id,
-            course_id=course_id,
-            defaults={
-                "amount": webhook_event.data.object.amount_total / 100.0,
-                "state": state,
-                "stripe_payment_id": webhook_event.data.object.payment_intent,
-            },
-        )
+        if record_webhook_event(json.loads(payload)):
+            process_stripe_webhook_events_task.enqueue()
         return HttpResponse(status=200)
 
 
@@ -209,28 +300,7 @@ class EnrollmentDialogView(LoginRequiredMixin, View):
         payment_link = None
         if course.price > 0:
             try:
-                session = stripe.checkout.Session.create(
-                    payment_method_types=["card"],
-                    customer_email=request.user.email,
-                    line_items=[
-                        {
-                            "price_data": {
-                                "currency": "eur",
-                                "product_data": {"name": course.name},
-                                "unit_amount": int(float(course.price) * 100),
-                            },
-                            "quantity": 1,
-                        }
-                    ],
-                    mode="payment",
-                    success_url=request.build_absolute_uri("/courses/purchased-courses/"),
-                    cancel_url=request.build_absolute_uri("/courses/purchased-courses/"),
-                    metadata={
-                        "course_id": str(course.id),
-                        "user_id": str(request.user.id),
-                    },
-                )
-                payment_link = session.url
+                payment_link = open_checkout_session(request, course).url
             except Exception as exc:  # noqa: BLE001
                 return HttpResponse(f"Error creating payment link: {exc!s}", status=400)
 
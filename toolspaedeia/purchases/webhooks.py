@@ -0,0 +1,117 @@
+import logging
+from datetime import UTC
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from purchases.models import CheckoutSession
+from purchases.models import Purchase
+from purchases.models import StripeWebhookEvent
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_COMPLETE_EVENTS = {"checkout.session.completed", "checkout.session.async_payment_succeeded"}
+PAYMENT_FAILED_EVENTS = {"checkout.session.async_payment_failed", "checkout.session.expired"}
+
+
+def record_webhook_event(event_data):
+    event_object = event_data["data"]["object"]
+    _, created = StripeWebhookEvent.objects.get_or_create(
+        event_id=event_data["id"],
+        defaults={
+            "event_type": event_data["type"],
+            "object_id": event_object.get("id") or "",
+            "stripe_created": datetime.fromtimestamp(event_data["created"], tz=UTC),
+            "payload": event_data,
+        },
+    )
+    return created
+
+
+def checkout_updates_purchase(stored_state, stored_payment_id, state, payment_id):
+    if stored_payment_id and stored_payment_id != payment_id:
+        return False
+    return not (stored_state == Purchase.State.ACCEPTED and state != Purchase.State.ACCEPTED)
+
+
+def apply_webhook_event(event):
+    if event.event_type in PAYMENT_COMPLETE_EVENTS:
+        state = Purchase.State.ACCEPTED
+    elif event.event_type in PAYMENT_FAILED_EVENTS:
+        state = Purchase.State.REFUSED
+    else:
+        return StripeWebhookEvent.Status.IGNORED
+
+    CheckoutSession.objects.filter(session_id=event.object_id).delete()
+    session = event.payload["data"]["object"]
+    metadata = session.get("metadata") or {}
+    if not metadata.get("course_id") or not metadata.get("user_id"):
+        return StripeWebhookEvent.Status.IGNORED
+
+    superseded = StripeWebhookEvent.objects.filter(
+        object_id=event.object_id,
+        status=StripeWebhookEvent.Status.PROCESSED,
+        stripe_created__gt=event.stripe_created,
+    ).exists()
+    if superseded:
+        return StripeWebhookEvent.Status.IGNORED
+
+    payment_id = session.get("payment_intent")
+    purchase = (
+        Purchase.objects.select_for_update()
+        .filter(user_id=metadata["user_id"], course_id=metadata["course_id"])
+        .first()
+    )
+    if purchase is None:
+        purchase = Purchase(user_id=metadata["user_id"], course_id=metadata["course_id"])
+    elif not checkout_updates_purchase(purchase.state, purchase.stripe_payment_id, state, payment_id):
+        return StripeWebhookEvent.Status.IGNORED
+
+    purchase.amount = Decimal(session.get("amount_total") or 0) / 100
+    purchase.state = state
+    purchase.stripe_payment_id = payment_id or purchase.stripe_payment_id
+    purchase.save()
+    return StripeWebhookEvent.Status.PROCESSED
+
+
+def process_pending_webhook_events():
+    pending_event_ids = list(
+        StripeWebhookEvent.objects.filter(status=StripeWebhookEvent.Status.PENDING)
+        .order_by("stripe_created", "pk")
+        .values_list("pk", flat=True)
+    )
+    processed = 0
+    for event_id in pending_event_ids:
+        try:
+            processed += process_webhook_event(event_id)
+        except Exception as exc:
+            logger.exception("Could not process Stripe webhook event %s", event_id)
+            StripeWebhookEvent.objects.filter(pk=event_id, status=StripeWebhookEvent.Status.PENDING).update(
+                status=StripeWebhookEvent.Status.FAILED, error=str(exc), processed_at=timezone.now()
+            )
+            processed += 1
+    return processed
+
+
+def process_webhook_event(event_id):
+    with transaction.atomic():
+        event = (
+            StripeWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(pk=event_id, status=StripeWebhookEvent.Status.PENDING)
+            .first()
+        )
+        if event is None:
+            return 0
+
+        try:
+            with transaction.atomic():
+                event.status = apply_webhook_event(event)
+        except Exception as exc:
+            logger.exception("Could not apply Stripe webhook event %s", event.event_id)
+            event.status = StripeWebhookEvent.Status.FAILED
+            event.error = str(exc)
+        event.processed_at = timezone.now()
+        event.save(update_fields=["status", "error", "processed_at"])
+    return 1
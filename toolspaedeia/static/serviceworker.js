@@ -1,5 +1,9 @@
 const APP_SHELL_CACHE = "toolspaedeia-shell-v4";
 const PRIVATE_CONTENT_CACHE = "toolspaedeia-private-content-v3";
+const OFFLINE_DATABASE = "toolspaedeia-offline";
+const QUIZ_SUBMISSIONS_STORE = "quiz-submissions";
+const QUIZ_SYNC_TAG = "quiz-submissions";
+const QUIZ_SYNC_URL = "/courses/quiz-sync/";
 
 const SHELL_URLS = [
     "/",
@@ -36,6 +40,11 @@ self.addEventListener("message", (event) => {
         return;
     }
 
+    if (data.type === "FLUSH_QUIZ_SUBMISSIONS") {
+        event.waitUntil(flushQuizSubmissions().catch(() => {}));
+        return;
+    }
+
     if (data.type !== "WARM_PURCHASED_CONTENT") {
         return;
     }
@@ -64,11 +73,105 @@ self.addEventListener("message", (event) => {
     );
 });
 
+self.addEventListener("sync", (event) => {
+    if (event.tag === QUIZ_SYNC_TAG) {
+        event.waitUntil(flushQuizSubmissions());
+    }
+});
+
+function openOfflineDatabase() {
+    return new Promise((resolve, reject) => {
+        const request = indexedDB.open(OFFLINE_DATABASE, 1);
+        request.onupgradeneeded = () => {
+            request.result.createObjectStore(QUIZ_SUBMISSIONS_STORE, { keyPath: "client_id" });
+        };
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function withQuizSubmissionsStore(mode, callback) {
+    const database = await openOfflineDatabase();
+    return new Promise((resolve, reject) => {
+        const transaction = database.transaction(QUIZ_SUBMISSIONS_STORE, mode);
+        const result = callback(transaction.objectStore(QUIZ_SUBMISSIONS_STORE));
+        transaction.oncomplete = () => resolve(result.result);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+async function queueQuizSubmission(request, courseId, quizId) {
+    const formData = await request.formData();
+    const questionIds = formData.getAll("question_ids");
+    const selectedAnswerIds = {};
+    for (const questionId of questionIds) {
+        selectedAnswerIds[questionId] = formData.getAll(`question-${questionId}`);
+    }
+
+    await withQuizSubmissionsStore("readwrite", (store) => store.put({
+        client_id: `${quizId}-${Date.now()}-${Math.random().toString(36).slice(2)}`,
+        course_id: courseId,
+        quiz_id: quizId,
+        question_ids: questionIds,
+        selected_answer_ids: selectedAnswerIds,
+        csrf_token: request.headers.get("X-CSRFToken") || ""
+    }));
+
+    if (self.registration.sync) {
+        await self.registration.sync.register(QUIZ_SYNC_TAG).catch(() => {});
+    }
+
+    return new Response(
+        `<article id="quiz-${quizId}"><p>You are offline. Your answers were saved and will be submitted when you are back online.</p></article>`,
+        {
+            headers: { "Content-Type": "text/html; charset=utf-8" },
+            status: 202,
+        }
+    );
+}
+
+async function flushQuizSubmissions() {
+    const submissions = await withQuizSubmissionsStore("readonly", (store) => store.getAll());
+    if (!submissions.length) {
+        return;
+    }
+
+    const response = await fetch(QUIZ_SYNC_URL, {
+        method: "POST",
+        credentials: "include",
+        headers: {
+            "Content-Type": "application/json",
+            "X-CSRFToken": submissions[submissions.length - 1].csrf_token
+        },
+        body: JSON.stringify({
+            submissions: submissions.map(({ csrf_token: _csrfToken, ...submission }) => submission)
+        })
+    });
+    if (!response.ok) {
+        throw new Error(`Quiz sync failed with status ${response.status}`);
+    }
+
+    const payload = await response.json();
+    const processedIds = payload.results.map((result) => result.client_id).filter(Boolean);
+    await withQuizSubmissionsStore("readwrite", (store) => {
+        for (const clientId of processedIds) {
+            store.delete(clientId);
+        }
+        return {};
+    });
+}
+
+function quizAttemptIds(pathname) {
+    const match = pathname.match(/^\/courses\/(\d+)\/quiz\/(\d+)\/attempt\/$/);
+    return match ? { courseId: match[1], quizId: match[2] } : null;
+}
+
 function isSensitiveMutationPath(pathname) {
     return pathname.includes("/enrollment-dialog/")
         || pathname.includes("/stripe/webhook/")
         || pathname.includes("/mark-complete/")
         || pathname.includes("/attempt/")
+        || pathname.includes("/quiz-sync/")
         || pathname.includes("/logout/");
 }
 
@@ -84,12 +187,20 @@ function isCourseOrModulePage(pathname) {
 
 self.addEventListener("fetch", (event) => {
     const request = event.request;
+    const url = new URL(request.url);
 
-    if (request.method !== "GET") {
+    const attemptIds = request.method === "POST" ? quizAttemptIds(url.pathname) : null;
+    if (attemptIds) {
+        const queuedRequest = request.clone();
+        event.respondWith(
+            fetch(request).catch(() => queueQuizSubmission(queuedRequest, attemptIds.courseId, attemptIds.quizId))
+        );
         return;
     }
 
-    const url = new URL(request.url);
+    if (request.method !== "GET") {
+        return;
+    }
 
     if (isSensitiveMutationPath(url.pathname)) {
         return;
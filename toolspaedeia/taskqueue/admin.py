@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from taskqueue.models import QueuedTask
+
+
+@admin.register(QueuedTask)
+class QueuedTaskAdmin(admin.ModelAdmin):
+    list_display = ["id", "task_path", "queue_name", "status", "enqueued_at", "finished_at"]
+    list_filter = ["status", "queue_name"]
+    search_fields = ["id", "task_path"]
@@ -0,0 +1,36 @@
+from django.tasks.backends.base import BaseTaskBackend
+from django.tasks.exceptions import TaskResultDoesNotExist
+from django.tasks.signals import task_enqueued
+from django.utils.crypto import get_random_string
+from django.utils.json import normalize_json
+
+from taskqueue.models import QueuedTask
+
+
+class DatabaseBackend(BaseTaskBackend):
+    supports_defer = True
+    supports_get_result = True
+    supports_priority = True
+
+    def enqueue(self, task, args, kwargs):
+        self.validate_task(task)
+
+        queued_task = QueuedTask.objects.create(
+            id=get_random_string(32),
+            task_path=task.module_path,
+            backend=self.alias,
+            queue_name=task.queue_name,
+            priority=task.priority,
+            run_after=task.run_after,
+            args=normalize_json(args),
+            kwargs=normalize_json(kwargs),
+        )
+        task_result = queued_task.to_task_result()
+        task_enqueued.send(type(self), task_result=task_result)
+        return task_result
+
+    def get_result(self, result_id):
+        queued_task = QueuedTask.objects.filter(pk=result_id).first()
+        if queued_task is None:
+            raise TaskResultDoesNotExist(result_id)
+        return queued_task.to_task_result()
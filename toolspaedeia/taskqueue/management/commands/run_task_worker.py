@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.tasks import DEFAULT_TASK_QUEUE_NAME
+from django.utils.crypto import get_random_string
+
+from taskqueue.worker import run_worker
+
+
+class Command(BaseCommand):
+    help = "Run queued tasks from the database task backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queue_names",
+            default=[],
+            help=f"Queue to take tasks from. Can be repeated. Defaults to {DEFAULT_TASK_QUEUE_NAME!r}.",
+        )
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument(
+            "--max-tasks", type=int, default=None, help="Stop after running this many tasks or when the queue is empty."
+        )
+
+    def handle(self, **options):
+        worker_id = get_random_string(32)
+        queue_names = options["queue_names"] or [DEFAULT_TASK_QUEUE_NAME]
+        self.stdout.write(f"Worker {worker_id} processing queues: {', '.join(queue_names)}")
+        processed = run_worker(worker_id, queue_names, interval=options["interval"], max_tasks=options["max_tasks"])
+        self.stdout.write(f"Processed {processed} tasks.")
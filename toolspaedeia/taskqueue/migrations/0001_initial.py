@@ -0,0 +1,57 @@
+# Generated by Django 6.0.5 on 2026-10-19 14:17
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="QueuedTask",
+            fields=[
+                ("id", models.CharField(editable=False, max_length=32, primary_key=True, serialize=False)),
+                ("task_path", models.CharField(max_length=255)),
+                ("backend", models.CharField(max_length=64)),
+                ("queue_name", models.CharField(default="default", max_length=64)),
+                ("priority", models.IntegerField(default=0)),
+                ("run_after", models.DateTimeField(blank=True, null=True)),
+                ("args", models.JSONField(blank=True, default=list)),
+                ("kwargs", models.JSONField(blank=True, default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("READY", "Ready"),
+                            ("RUNNING", "Running"),
+                            ("FAILED", "Failed"),
+                            ("SUCCESSFUL", "Successful"),
+                        ],
+                        default="READY",
+                        max_length=10,
+                    ),
+                ),
+                ("enqueued_at", models.DateTimeField(auto_now_add=True)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("last_attempted_at", models.DateTimeField(blank=True, null=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+                ("return_value", models.JSONField(blank=True, null=True)),
+                ("errors", models.JSONField(blank=True, default=list)),
+                ("worker_ids", models.JSONField(blank=True, default=list)),
+            ],
+            options={
+                "verbose_name": "Queued Task",
+                "verbose_name_plural": "Queued Tasks",
+                "ordering": ["-priority", "enqueued_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "queue_name", "-priority", "enqueued_at"],
+                        name="taskqueue_q_status_941538_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.tasks import DEFAULT_TASK_QUEUE_NAME
+from django.tasks import TaskResult
+from django.tasks import TaskResultStatus
+from django.tasks.base import DEFAULT_TASK_PRIORITY
+from django.tasks.base import TaskError
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+def running_task_cutoff(now=None):
+    return (now or timezone.now()) - timedelta(seconds=settings.TASK_RUNNING_TIMEOUT)
+
+
+class QueuedTask(models.Model):
+    id = models.CharField(primary_key=True, max_length=32, editable=False)
+    task_path = models.CharField(max_length=255)
+    backend = models.CharField(max_length=64)
+    queue_name = models.CharField(max_length=64, default=DEFAULT_TASK_QUEUE_NAME)
+    priority = models.IntegerField(default=DEFAULT_TASK_PRIORITY)
+    run_after = models.DateTimeField(null=True, blank=True)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=TaskResultStatus.choices, default=TaskResultStatus.READY)
+    enqueued_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    last_attempted_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    return_value = models.JSONField(null=True, blank=True)
+    errors = models.JSONField(default=list, blank=True)
+    worker_ids = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        ordering = ["-priority", "enqueued_at"]
+        indexes = [models.Index(fields=["status", "queue_name", "-priority", "enqueued_at"])]
+        verbose_name = "Queued Task"
+        verbose_name_plural = "Queued Tasks"
+
+    def __str__(self) -> str:
+        return f"{self.task_path} ({self.id}) - {self.get_status_display()}"
+
+    @property
+    def task(self):
+        return import_string(self.task_path).using(
+            priority=self.priority,
+            queue_name=self.queue_name,
+            run_after=self.run_after,
+            backend=self.backend,
+        )
+
+    def to_task_result(self):
+        task_result = TaskResult(
+            task=self.task,
+            id=self.id,
+            status=self.status,
+            enqueued_at=self.enqueued_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            last_attempted_at=self.last_attempted_at,
+            args=self.args,
+            kwargs=self.kwargs,
+            backend=self.backend,
+            errors=[TaskError(**error) for error in self.errors],
+            worker_ids=self.worker_ids,
+        )
+        object.__setattr__(task_result, "_return_value", self.return_value)
+        return task_result
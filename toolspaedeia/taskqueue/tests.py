@@ -0,0 +1,87 @@
+from datetime import timedelta
+
+from django.tasks import TaskResultStatus
+from django.tasks import task
+from django.test import TestCase
+from django.test import override_settings
+from django.utils import timezone
+
+from taskqueue.models import QueuedTask
+from taskqueue.worker import run_worker
+
+
+@task
+def add_numbers(first, second):
+    return first + second
+
+
+@task
+def fail_loudly():
+    msg = "Task exploded"
+    raise RuntimeError(msg)
+
+
+@task(priority=10)
+def urgent_echo(value):
+    return value
+
+
+class DatabaseBackendTests(TestCase):
+    def test_enqueue_stores_ready_task_until_a_worker_runs_it(self):
+        task_result = add_numbers.enqueue(2, 3)
+
+        self.assertEqual(task_result.status, TaskResultStatus.READY)
+        self.assertEqual(QueuedTask.objects.get().task_path, "taskqueue.tests.add_numbers")
+
+        self.assertEqual(run_worker("worker-1", ["default"], max_tasks=10), 1)
+
+        task_result.refresh()
+        self.assertEqual(task_result.status, TaskResultStatus.SUCCESSFUL)
+        self.assertEqual(task_result.return_value, 5)
+        self.assertEqual(task_result.worker_ids, ["worker-1"])
+        self.assertEqual(add_numbers.get_result(task_result.id).return_value, 5)
+
+    def test_failed_task_records_error(self):
+        task_result = fail_loudly.enqueue()
+
+        run_worker("worker-1", ["default"], max_tasks=1)
+
+        task_result.refresh()
+        self.assertEqual(task_result.status, TaskResultStatus.FAILED)
+        self.assertEqual(task_result.errors[0].exception_class, RuntimeError)
+        self.assertIn("Task exploded", task_result.errors[0].traceback)
+
+    @override_settings(TASK_RUNNING_TIMEOUT=60)
+    def test_worker_fails_tasks_left_running_by_a_stopped_worker(self):
+        stale_result = add_numbers.enqueue(1, 1)
+        active_result = add_numbers.enqueue(2, 2)
+        QueuedTask.objects.filter(pk=stale_result.id).update(
+            status=TaskResultStatus.RUNNING, started_at=timezone.now() - timedelta(seconds=61)
+        )
+        QueuedTask.objects.filter(pk=active_result.id).update(
+            status=TaskResultStatus.RUNNING, started_at=timezone.now() - timedelta(seconds=30)
+        )
+
+        self.assertEqual(run_worker("worker-1", ["default"], max_tasks=1), 0)
+
+        stale_result.refresh()
+        active_result.refresh()
+        self.assertEqual(stale_result.status, TaskResultStatus.FAILED)
+        self.assertEqual(stale_result.errors[0].exception_class, TimeoutError)
+        self.assertEqual(active_result.status, TaskResultStatus.RUNNING)
+
+    def test_worker_respects_priority_and_run_after(self):
+        deferred_result = add_numbers.using(run_after=timezone.now() + timedelta(hours=1)).enqueue(1, 1)
+        normal_result = add_numbers.enqueue(1, 2)
+        urgent_result = urgent_echo.enqueue("first")
+
+        run_worker("worker-1", ["default"], max_tasks=1)
+
+        urgent_result.refresh()
+        normal_result.refresh()
+        self.assertEqual(urgent_result.status, TaskResultStatus.SUCCESSFUL)
+        self.assertEqual(normal_result.status, TaskResultStatus.READY)
+
+        self.assertEqual(run_worker("worker-1", ["default"], max_tasks=10), 1)
+        deferred_result.refresh()
+        self.assertEqual(deferred_result.status, TaskResultStatus.READY)
@@ -0,0 +1,104 @@
+import time
+from traceback import format_exception
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
+from django.tasks import TaskContext
+from django.tasks import TaskResultStatus
+from django.tasks import task_backends
+from django.tasks.signals import task_finished
+from django.tasks.signals import task_started
+from django.utils import timezone
+from django.utils.json import normalize_json
+
+from taskqueue.models import QueuedTask
+from taskqueue.models import running_task_cutoff
+
+CLAIM_CANDIDATES = 10
+
+
+def fail_stale_tasks(now=None):
+    now = now or timezone.now()
+    stale_tasks = QueuedTask.objects.filter(
+        status=TaskResultStatus.RUNNING, started_at__lt=running_task_cutoff(now)
+    ).only("pk", "errors")
+    failed = 0
+    for queued_task in stale_tasks:
+        error = {
+            "exception_class_path": "builtins.TimeoutError",
+            "traceback": f"Task was still running {settings.TASK_RUNNING_TIMEOUT} seconds after it started; "
+            "its worker most likely stopped.",
+        }
+        failed += QueuedTask.objects.filter(pk=queued_task.pk, status=TaskResultStatus.RUNNING).update(
+            status=TaskResultStatus.FAILED, finished_at=now, errors=[*queued_task.errors, error]
+        )
+    return failed
+
+
+def claim_next_task(worker_id, queue_names):
+    now = timezone.now()
+    candidate_ids = (
+        QueuedTask.objects.filter(status=TaskResultStatus.READY, queue_name__in=queue_names)
+        .filter(Q(run_after__isnull=True) | Q(run_after__lte=now))
+        .order_by("-priority", "enqueued_at")
+        .values_list("pk", flat=True)[:CLAIM_CANDIDATES]
+    )
+    for candidate_id in candidate_ids:
+        claimed = QueuedTask.objects.filter(pk=candidate_id, status=TaskResultStatus.READY).update(
+            status=TaskResultStatus.RUNNING, started_at=now, last_attempted_at=now
+        )
+        if claimed:
+            queued_task = QueuedTask.objects.get(pk=candidate_id)
+            queued_task.worker_ids.append(worker_id)
+            queued_task.save(update_fields=["worker_ids"])
+            return queued_task
+    return None
+
+
+def run_queued_task(queued_task):
+    task_result = queued_task.to_task_result()
+    backend_class = type(task_backends[queued_task.backend])
+    task_started.send(sender=backend_class, task_result=task_result)
+
+    task = task_result.task
+    try:
+        if task.takes_context:
+            return_value = task.call(TaskContext(task_result=task_result), *queued_task.args, **queued_task.kwargs)
+        else:
+            return_value = task.call(*queued_task.args, **queued_task.kwargs)
+        queued_task.return_value = normalize_json(return_value)
+        queued_task.status = TaskResultStatus.SUCCESSFUL
+    except KeyboardInterrupt:
+        raise
+    except BaseException as exc:  # noqa: BLE001
+        exception_type = type(exc)
+        queued_task.errors.append(
+            {
+                "exception_class_path": f"{exception_type.__module__}.{exception_type.__qualname__}",
+                "traceback": "".join(format_exception(exc)),
+            }
+        )
+        queued_task.status = TaskResultStatus.FAILED
+
+    queued_task.finished_at = timezone.now()
+    queued_task.save(update_fields=["return_value", "status", "errors", "finished_at"])
+    task_finished.send(sender=backend_class, task_result=queued_task.to_task_result())
+    return queued_task
+
+
+def run_worker(worker_id, queue_names, *, interval=1.0, max_tasks=None):
+    processed = 0
+    while max_tasks is None or processed < max_tasks:
+        close_old_connections()
+        fail_stale_tasks()
+        queued_task = claim_next_task(worker_id, queue_names)
+        if queued_task is None:
+            if max_tasks is not None:
+                break
+            time.sleep(interval)
+            continue
+
+        run_queued_task(queued_task)
+        processed += 1
+    return processed
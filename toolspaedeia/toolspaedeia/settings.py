@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     "courses",
     "users",
     "purchases",
+    "taskqueue",
 ]
 
 MIDDLEWARE = [
@@ -119,3 +120,29 @@ PWA_APP_ICONS = [
 
 STRIPE_SECRET_KEY = ""
 STRIPE_WEBHOOK_SECRET = ""
+STRIPE_API_BASE = "https://api.stripe.com"
+STRIPE_CONNECT_TIMEOUT = 5
+STRIPE_READ_TIMEOUT = 30
+STRIPE_MAX_NETWORK_RETRIES = 2
+
+TASKS = {
+    "default": {
+        "BACKEND": "taskqueue.backends.DatabaseBackend",
+    },
+}
+
+TASK_RUNNING_TIMEOUT = 3600
+
+COURSE_IMPORT_WORKERS = 4
+
+EMBEDDING_SERVICE_SOCKET = None
+
+EMBEDDING_MODEL_PATH = None
+
+EMBEDDING_INFERENCE = "float32"
+
+TAG_SUGGESTION_BACKEND = "embedding"
+
+COURSE_SEMANTIC_SEARCH = False
+
+COURSE_SEARCH_INDEX_DIR = BASE_DIR / "search_index"